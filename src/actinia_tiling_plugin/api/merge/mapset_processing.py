@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Shared helpers of the merge, deletion and sweep jobs
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from copy import deepcopy
+from functools import partial
+import os
+import pickle
+import threading
+
+from actinia_processing_lib.exceptions import AsyncProcessError
+from actinia_core.processing.actinia_processing.persistent.mapset_management \
+    import (
+        PersistentMapsetDeleter,
+        PersistentMapsetUnlocker,
+    )
+
+from actinia_tiling_plugin.resources.config import MERGECONFIG
+from actinia_tiling_plugin.resources.processes import pctpl_to_pl
+
+
+class MapsetProcessingMixin(object):
+    """Mixin for PersistentProcessing jobs which change the target mapset,
+    delete mapsets and run their steps with several threads.
+    """
+
+    def _init_progress(self):
+        self.step = 0
+        self.num_of_steps = 0
+        self.progress_lock = threading.Lock()
+
+    def _execute_preparation(self):
+        """Locks the target mapset and creates the temporary mapset. The
+        job has to be set up before, e.g. to read the kvdb first.
+        """
+
+        # Check and lock the target and temp mapsets
+        self._check_lock_target_mapset()
+
+        if self.target_mapset_exists is False:
+            # Create the temp database and link the
+            # required mapsets into it
+            self._create_temp_database(self.required_mapsets)
+
+            # Initialize the GRASS environment and switch into PERMANENT
+            # mapset, which is always linked
+            self._create_grass_environment(
+                grass_data_base=self.temp_grass_data_base,
+                mapset_name="PERMANENT"
+            )
+
+            # Create the temporary mapset with the same name as the target
+            # mapset and switch into it
+            self._create_temporary_mapset(
+                temp_mapset_name=self.target_mapset_name,
+                interim_result_mapset=None,
+                interim_result_file_path=None)
+            self.temp_mapset_name = self.target_mapset_name
+        else:
+            # Init GRASS environment and create the temporary mapset
+            self._create_temporary_grass_environment(
+                source_mapset_name=self.target_mapset_name)
+            self._lock_temp_mapset()
+
+    def _execute_finalization(self):
+        # Copy local mapset to original project, merge mapsets
+        self._copy_merge_tmp_mapset_to_target_mapset()
+
+    def _set_progress(self):
+        self.progress["step"] = self.step
+        self.progress["num_of_steps"] = self.num_of_steps
+
+    def _add_progress(self, num_steps):
+        """Adds finished steps, which can be done by several threads."""
+        with self.progress_lock:
+            self.num_of_steps += num_steps
+            self._set_progress()
+
+    def _get_workers(self):
+        workers = int(self.request_data.get("workers", MERGECONFIG.workers))
+        if workers < 1:
+            raise AsyncProcessError("'workers' must be positive.")
+        return workers
+
+    def _get_deletion_workers(self, num_mapsets):
+        """Returns the number of mapsets which are deleted at the same time.
+        With 0 in the plugin configuration the mapsets are deleted at once up
+        to the number of CPUs.
+        """
+        workers = MERGECONFIG.deletion_workers
+        if workers < 1:
+            workers = min(num_mapsets, os.cpu_count() or 1)
+        return max(1, workers)
+
+    def _run_parallel(self, tasks, workers=None):
+        """Runs the tasks with at most 'workers' tasks at the same time, by
+        default the 'workers' of the request. If a task fails the tasks which
+        are not started yet are cancelled and the error is raised.
+        """
+        if workers is None:
+            workers = self._get_workers()
+        if workers == 1 or len(tasks) < 2:
+            for task in tasks:
+                task()
+            return
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = list()
+        try:
+            futures = [executor.submit(task) for task in tasks]
+            for future in as_completed(futures):
+                future.result()
+        finally:
+            # cancel_futures of shutdown needs Python 3.9
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _delete_mapset(self, mapset_name, unlock=True):
+        """Deletes the mapset. With 'unlock' the lock of the mapset is
+        removed first, otherwise the deletion of a locked mapset fails.
+        """
+        if mapset_name != "PERMANENT":
+            rdc_delete = deepcopy(self.rdc)
+            rdc_delete.mapset_name = mapset_name
+            if unlock is True:
+                unlocker = PersistentMapsetUnlocker(rdc_delete)
+                unlocker._execute()
+            mapset_deleter = PersistentMapsetDeleter(rdc_delete)
+            mapset_deleter._execute()
+
+    def _delete_mapsets(self, mapsets):
+        """Deletes the mapsets, several mapsets at the same time."""
+        self._run_parallel(
+            [partial(self._delete_mapset, mapset) for mapset in mapsets],
+            self._get_deletion_workers(len(mapsets)),
+        )
+
+    def _plan_delete(self, intermediates):
+        """Plans the deletion of temporary maps or regions, e.g. the
+        intermediate maps of the tree reduction.
+        """
+        pl_del = list()
+        for map_type, names in intermediates.items():
+            if names:
+                pl, _ = pctpl_to_pl(
+                    f"pc_delete_{map_type}.json",
+                    {f"{map_type}_name": ",".join(names)},
+                )
+                pl_del.extend(pl)
+        return pl_del
+
+    def _get_job_status(self, resource_id):
+        """Returns the status of a job of the user or None if the job is not
+        known (anymore).
+        """
+        response_data = self.resource_logger.get(self.user_id, resource_id)
+        if not response_data:
+            return None
+        _, response_model = pickle.loads(response_data)
+        return response_model["status"]
+
+    def _is_run_active(self, manifest):
+        """Checks if the job of a tiled run or one of its tile jobs is still
+        accepted or running. A run whose job is done without updating the
+        manifest, e.g. a terminated job, is not running anymore.
+        """
+        if manifest.get_state() != "running":
+            jobs = manifest.get_tile_jobs()
+        else:
+            jobs = manifest.get_tile_jobs().union([manifest.get_job()])
+        return any(
+            self._get_job_status(resource_id) in ["accepted", "running"]
+            for resource_id in jobs
+        )
+
+    def _execute_and_count(self, process_list):
+        self._execute_process_list(process_list)
+        self._add_progress(len(process_list))
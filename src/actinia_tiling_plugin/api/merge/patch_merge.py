@@ -25,8 +25,11 @@ __copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
 __maintainer__ = "mundialis GmbH % Co. KG"
 
 from copy import deepcopy
-import re
+from datetime import datetime
+from functools import partial
+import json
 import os
+import time
 
 from uuid import uuid4
 from flask import make_response, jsonify
@@ -35,25 +38,52 @@ import pickle
 
 
 from actinia_core.core.common.config import global_config
+from actinia_processing_lib.exceptions import AsyncProcessError
 from actinia_processing_lib.persistent_processing import PersistentProcessing
 from actinia_rest_lib.resource_base import ResourceBase
 from actinia_core.core.common.kvdb_interface import enqueue_job
-from actinia_core.processing.actinia_processing.persistent.mapset_management \
-    import (
-        PersistentMapsetDeleter,
-        PersistentMapsetUnlocker,
-    )
+from actinia_core.models.response_models import (
+    ProcessingResponseModel,
+    create_response_from_model,
+)
 
+from actinia_tiling_plugin.api.merge.mapset_processing import \
+    MapsetProcessingMixin
 from actinia_tiling_plugin.apidocs import merge
-from actinia_tiling_plugin.resources.processes import pctpl_to_pl
+from actinia_tiling_plugin.core.merge_costs import (
+    count_patch_levels,
+    patch_groups,
+    estimate_raster_costs,
+    estimate_vector_costs,
+    map_disk_usage,
+    raster_metadata,
+    sum_merge_costs,
+)
+from actinia_tiling_plugin.core.merge_inputs import (
+    check_merge_inputs,
+    check_stds_members,
+)
+from actinia_tiling_plugin.core.stds_members import StdsMembers
+from actinia_tiling_plugin.resources.config import MERGECONFIG
+from actinia_tiling_plugin.resources.manifest import (
+    MapsetDeletionMarks,
+    MosaicManifest,
+    VirtualRasterSources,
+)
+from actinia_tiling_plugin.resources.processes import (
+    pctpl_to_pl,
+    script_to_pl,
+)
+from actinia_tiling_plugin.models.response_models.merge import \
+    MergeDryRunResponseModel
 from actinia_tiling_plugin.models.response_models.tiling import \
     GridTilingResponseModel
 from actinia_tiling_plugin.resources.logging import log
 
 
 class AsyncMergeProcessPatchResource(ResourceBase):
-    """Merging mapsets with same raster, vector maps and strds in one mapset by
-    patching the maps.
+    """Merging mapsets with same raster, vector maps, strds and stvds in one
+    mapset by patching the maps.
     """
 
     def _execute(self, project_name, mapset_name):
@@ -68,7 +98,7 @@ class AsyncMergeProcessPatchResource(ResourceBase):
             # # for debugging use the following lines instead of enqueue_job
             # processing = AsyncMergeProcessPatch(rdc)
             # processing.run()
-            enqueue_job(self.job_timeout, start_job, rdc)
+            enqueue_job(self.job_timeout, start_job, rdc, self.job_timeout)
 
         return rdc
 
@@ -96,8 +126,8 @@ class AsyncMergeProcessPatchResource(ResourceBase):
         process_desc["parameters"][1]["schema"] = io_parameter_base_schema
         process_desc["parameters"][1]["description"] = (
             "A list of data to patch in the new mapset. The 'param' must "
-            "be on of 'vector', 'raster' or 'strds' and the 'value' is a "
-            "string of the maps which should be patched."
+            "be on of 'vector', 'raster', 'strds' or 'stvds' and the 'value' "
+            "is a string of the maps which should be patched."
         )
         return make_response(jsonify(process_desc), 200)
 
@@ -107,236 +137,951 @@ def start_job(*args):
     processing.run()
 
 
-class AsyncMergeProcessPatch(PersistentProcessing):
+def start_deletion_job(*args):
+    processing = AsyncMapsetDeletion(*args)
+    processing.run()
+
+
+class AsyncMergeProcessPatch(MapsetProcessingMixin, PersistentProcessing):
     """Create a grid.
     """
 
-    def __init__(self, *args):
-        PersistentProcessing.__init__(self, *args)
+    def __init__(self, rdc, job_timeout=None):
+        PersistentProcessing.__init__(self, rdc)
+        self._init_progress()
         self.response_model_class = GridTilingResponseModel
-        self.num_of_steps = 0
-        self.num_steps = {
-            "raster": [2],
-            "vector": [3],
-            "strds": [3, 2],
-            "stvds": [0],
+        # the timeout of the jobs which are enqueued by this job
+        self.job_timeout = job_timeout
+        # steps to read the STRDS and STVDS, the steps to patch the maps are
+        # added by the planner
+        self.num_steps = {"strds": [1], "stvds": [1]}
+        self._parse_outputs(self.request_data.get("outputs", list()))
+        self.mapsetlist = self.request_data.get("mapsetlist", list())
+        self.core_regions = self.request_data.get("core_regions")
+        self.attributetables = dict()
+        self.tmp_files = list()
+        self.tmp_regions = list()
+        self.patch_region = None
+        self.map_listing = None
+        self.missing_mapsets = list()
+        self.vector_features = dict()
+        self.member_mapsets = {"raster": dict(), "vector": dict()}
+        self.plan_funcs = {
+            "raster": self._plan_patch_raster,
+            "vector": self._plan_patch_vector,
         }
+
+    def _parse_outputs(self, outputs):
+        """Sets the lists of maps to patch and the number of steps from the
+        'outputs' of the request.
+        """
         self.step = 0
         self.raster_maps = list()
         self.vector_maps = list()
         self.strds = list()
-        self.strds_infos = dict()
         self.stvds = list()
-        for output in self.request_data["outputs"]:
+        self.stds_infos = {"strds": dict(), "stvds": dict()}
+        for output in outputs:
             if output["param"] == "raster":
                 self.raster_maps = output["value"].split(",")
             elif output["param"] == "vector":
                 self.vector_maps = output["value"].split(",")
             elif output["param"] == "strds":
                 self.strds = output["value"].split(",")
-            # elif output["param"] == "stvds":
-            #     self.stvds = output["value"].split(",")
+            elif output["param"] == "stvds":
+                self.stvds = output["value"].split(",")
             else:
                 log.info(f"Output type '{output['param']}' not yet supported!")
             self.step += (
-                sum(self.num_steps[output["param"]]) * len(
+                sum(self.num_steps.get(output["param"], [0])) * len(
                     output["value"].split(","))
             )
-        self.mapsetlist = self.request_data["mapsetlist"]
 
-    def _execute_preparation(self):
-
-        self._setup()
+    def _enqueue_deletion_job(self, mapsets):
+        """Marks the mapsets for deletion and enqueues a job which deletes
+        them in the background, so that the merge can finish as soon as the
+        target mapset is final. Returns the resource id of the job.
+        """
+        MapsetDeletionMarks(
+            self.lock_interface.kvdb_server, self.user_id, self.project_name
+        ).mark(mapsets)
+        resource_id = f"resource_id-{uuid4()}"
+        rdc_delete = deepcopy(self.rdc)
+        rdc_delete.resource_id = resource_id
+        rdc_delete.status_url = self.status_url.replace(
+            self.resource_id, resource_id
+        )
+        rdc_delete.iteration = None
+        rdc_delete.set_request_data({
+            "mapsetlist": mapsets,
+            "workers": self._get_deletion_workers(len(mapsets)),
+        })
+        response_data = create_response_from_model(
+            ProcessingResponseModel,
+            status="accepted",
+            user_id=self.user_id,
+            resource_id=resource_id,
+            iteration=None,
+            process_log=None,
+            results={},
+            message="Resource accepted",
+            http_code=200,
+            orig_time=time.time(),
+            orig_datetime=datetime.now(),
+            status_url=rdc_delete.status_url,
+            api_info=self.api_info,
+        )
+        self.resource_logger.commit(
+            self.user_id, resource_id, None, response_data
+        )
+        enqueue_job(self.job_timeout, start_deletion_job, rdc_delete)
+        return resource_id
 
-        # Check and lock the target and temp mapsets
-        self._check_lock_target_mapset()
+    def _get_fan_in(self):
+        """Returns the number of maps which are patched into one map by the
+        tree reduction. With 0 all inputs are patched at once.
+        """
+        fan_in = int(self.request_data.get("fan_in", MERGECONFIG.fan_in))
+        # virtual rasters reference their inputs, so intermediate maps can
+        # not be deleted
+        if fan_in == 0 or self.method == "virtual":
+            return 0
+        if fan_in < 2:
+            raise AsyncProcessError("'fan_in' must be 0 or at least 2.")
+        return fan_in
 
-        if self.target_mapset_exists is False:
-            # Create the temp database and link the
-            # required mapsets into it
-            self._create_temp_database(self.required_mapsets)
-
-            # Initialize the GRASS environment and switch into PERMANENT
-            # mapset, which is always linked
-            self._create_grass_environment(
-                grass_data_base=self.temp_grass_data_base,
-                mapset_name="PERMANENT"
-            )
+    def _get_patch_resources(self):
+        """Returns the number of threads and the memory in MB of each
+        r.patch. By default the CPUs of the worker and the memory of the
+        plugin configuration are divided by the number of workers.
+        """
+        workers = self._get_workers()
+        nprocs = MERGECONFIG.nprocs
+        if nprocs == 0:
+            nprocs = max(1, (os.cpu_count() or 1) // workers)
+        nprocs = int(self.request_data.get("nprocs", nprocs))
+        memory = int(self.request_data.get(
+            "memory", max(1, MERGECONFIG.memory // workers)
+        ))
+        if nprocs < 1 or memory < 1:
+            raise AsyncProcessError("'nprocs' and 'memory' must be positive.")
+        return nprocs, memory
 
-            # Create the temporary mapset with the same name as the target
-            # mapset and switch into it
-            self._create_temporary_mapset(
-                temp_mapset_name=self.target_mapset_name,
-                interim_result_mapset=None,
-                interim_result_file_path=None)
-            self.temp_mapset_name = self.target_mapset_name
-        else:
-            # Init GRASS environment and create the temporary mapset
-            self._create_temporary_grass_environment(
-                source_mapset_name=self.target_mapset_name)
-            self._lock_temp_mapset()
-
-    def _execute_finalization(self):
-        # Copy local mapset to original project, merge mapsets
-        self._copy_merge_tmp_mapset_to_target_mapset()
-
-    def _generate_name_mapset_str(self, name):
-        name_list = list()
-        for mapset in self.mapsetlist:
-            name_list.append(f"{name}@{mapset}")
-        return ",".join(name_list)
-
-    def _set_progress(self):
-        self.progress["step"] = self.step
-        self.progress["num_of_steps"] = self.num_of_steps
-
-    def _delete_mapset(self, mapset_name):
-        if mapset_name != "PERMANENT":
-            rdc_delete = deepcopy(self.rdc)
-            rdc_delete.mapset_name = mapset_name
-            unlocker = PersistentMapsetUnlocker(rdc_delete)
-            unlocker._execute()
-            mapset_deleter = PersistentMapsetDeleter(rdc_delete)
-            mapset_deleter._execute()
-
-    def _patch_raster(self, rast):
-        # patch raster map
-        tpl = "patch/pc_patch_raster.json"
-        rasterlist = self._generate_name_mapset_str(rast)
-        tpl_rpatch = {
-            "rasterlist": rasterlist,
-            "raster": rast,
+    def _plan_patch_raster(self, rast, inputs, output, core_regions=None):
+        """Plans the patch of the input rasters. The region is only set for
+        the patch script, so that several rasters can be patched at the same
+        time. If core regions are given, the inputs are cropped to them first.
+        """
+        nprocs, memory = self._get_patch_resources()
+        script_values = {
+            "input": ",".join(inputs),
+            "output": output,
+            "nprocs": nprocs,
+            "memory": memory,
         }
-        plr, _ = pctpl_to_pl(tpl, tpl_rpatch)
-        self._execute_process_list(plr)
-        self.num_of_steps += self.num_steps["raster"][0]
-        self._set_progress()
+        if core_regions:
+            script_values["core_regions"] = ",".join(core_regions)
+        if self.patch_region and output == rast:
+            script_values["region"] = self.patch_region
+        return script_to_pl(
+            "patch_raster.py", script_values, f"patch_raster_{output}"
+        )
+
+    def _save_patch_region(self):
+        """Sets the region of the final raster patches. With 'union' the
+        region which covers the inputs of all rasters is computed once and
+        saved, so that the headers of the inputs are not read again for
+        every raster. The inputs of all rasters are used, because the maps of
+        the STRDS only exist in the mapsets in which they are registered.
+        Otherwise 'region' is the name of a saved region. Without 'region'
+        each raster is patched in the region covering its inputs.
+        """
+        region = self.request_data.get("region")
+        self.patch_region = None
+        if region != "union":
+            self.patch_region = region
+            return
+        if not self.raster_maps:
+            return
+        inputs = dict()
+        for rast in self.raster_maps:
+            inputs.update(dict.fromkeys(self._get_inputs("raster", rast)[0]))
+        self.patch_region = f"merge_union_{uuid4().hex}"
+        pl_region, _ = pctpl_to_pl(
+            "patch/pc_save_union_region.json",
+            {"rasterlist": ",".join(inputs), "region": self.patch_region},
+        )
+        self._execute_process_list(pl_region)
+        self.tmp_regions.append(self.patch_region)
+
+    def _plan_vrt(self, rast, inputs, output, core_regions=None):
+        """Plans a virtual raster over the input rasters without copying
+        cells. The inputs are passed by file to keep the command line short.
+        """
+        tmp_vrt_file = os.path.join(
+            global_config.TMP_WORKDIR, f"vrt_{output}_{uuid4()}.txt"
+        )
+        with open(tmp_vrt_file, "w") as f:
+            f.write("\n".join(inputs) + "\n")
+        self.tmp_files.append(tmp_vrt_file)
+        plvrt, _ = pctpl_to_pl(
+            "patch/pc_buildvrt_raster.json",
+            {"file": tmp_vrt_file, "raster": output},
+        )
+        return plvrt
 
-    def _patch_vector(self, vect):
-        # check for attribute table
-        tpl_check = "patch/pc_vector_check_attrtable.json"
-        tpl_check_val = {"map": vect}
-        plcheck, pconv = pctpl_to_pl(tpl_check, tpl_check_val)
-        self.output_parser_list = pconv.output_parser_list
-        self._execute_process_list(plcheck)
-        self._parse_module_outputs()
-        attrcheck = self.module_results["attrtable"]
-        attributetable = False if attrcheck[0] == "" else True
-        # patch vector maps
+    def _plan_patch_vector(self, vect, inputs, output, core_regions=None):
+        """Plans the patch of the input vectors. With the 'deferred' vector
+        topology the topology is not built by the patches but once for the
+        result, which can be cleaned afterwards by snapping and removing
+        duplicates, e.g. at the tile borders.
+        """
+        # the topology of the vectors of the STVDS is built once per result
+        deferred = (
+            self.request_data.get("vector_topology") == "deferred"
+            or vect in self.member_mapsets["vector"]
+        )
+        snap_threshold = self.request_data.get("snap_threshold")
+        is_result = output == vect
+        patch_output = output
+        if is_result and snap_threshold is not None:
+            patch_output = f"{vect}_unclean_{uuid4().hex}"
         tpl = "patch/pc_patch_vector.json"
-        vectorlist = self._generate_name_mapset_str(vect)
         tpl_vpatch = {
-            "vectorlist": vectorlist,
-            "vector": vect,
-            "attributetable": attributetable,
+            "vectorlist": ",".join(inputs),
+            "vector": output,
+            "patch_output": patch_output,
+            "attributetable": self.attributetables[vect],
+            "no_topology": deferred,
+            "build": deferred and is_result,
+            "snap_threshold": snap_threshold if is_result else None,
         }
         plv, _ = pctpl_to_pl(tpl, tpl_vpatch)
-        self._execute_process_list(plv)
-        self.num_of_steps += self.num_steps["vector"][0]
-        self._set_progress()
+        return plv
 
-    def _prepare_patch_strds(self):
-        """Prepares the patch of STRDS by reading one STRDS and adding the
-        rasters to the list of rasters to patch and writing other information
-        to the dict self.strds_infos.
+    def _check_attribute_tables(self, features=False):
+        """Reads the attribute tables of all vectors in all mapsets at once
+        and caches for each vector if it has an attribute table. Raises an
+        error before patching if the attribute tables of a vector differ
+        between the mapsets. With features the number of features of each
+        vector is cached too, with the incremental merge also of the existing
+        mosaics of the target mapset.
         """
-        for strds in self.strds:
-            # strds get list of rasters and other STRDS infos
-            tpl_values_strds = {"strds": f"{strds}@{self.mapsetlist[0]}"}
-            pl_strds, pconv = pctpl_to_pl(
-                "patch/pc_strds_list_rasters.json", tpl_values_strds)
-            self.output_parser_list = pconv.output_parser_list
-            self._execute_process_list(pl_strds)
-            self._parse_module_outputs()
-            strds_rasters = self.module_results["rasters"]
-            strds_desc = self.module_results["strds_description"]
-            strds_info = self.module_results["strds_info"]
-            col_names = strds_rasters[0].split("|")
-            strds_raster_infos = dict()
-            strds_raster_infos["rasters"] = list()
-            for idx in range(1, len(strds_rasters)):
-                rast_info = dict()
-                rinfos = strds_rasters[idx].split("|")
-                for j in range(len(rinfos)):
-                    rast_info[col_names[j]] = rinfos[j]
-                rast_info["all"] = strds_rasters[idx]
-                strds_raster_infos["rasters"].append(rast_info)
-                if rast_info["name"] not in self.raster_maps:
-                    self.raster_maps.append(rast_info["name"])
-            desc = "".join([entry[2:] if entry not in [
-                "# Title:", "# Description:", "# Command history:"] else entry
-                for entry in strds_desc])
-            strds_raster_infos["title"] = re.findall(
-                r"# Title:(.*?)# Description:", desc
-            )[0]
-            strds_raster_infos["description"] = re.findall(
-                r"# Description:(.*?)# Command history:", desc
-            )[0]
-            strds_raster_infos["temporaltype"] = strds_info["temporal_type"]
-            strds_raster_infos["semantictype"] = strds_info["semantic_type"]
-            self.strds_infos[strds] = strds_raster_infos
-            self.num_of_steps += self.num_steps["strds"][0]
-            self.step += (
-                self.num_steps["raster"][0] * len(
-                    strds_raster_infos["rasters"]
+        if not self.vector_maps or self.attributetables:
+            return
+        attributes_file = os.path.join(
+            global_config.TMP_WORKDIR, f"vector_attributes_{uuid4().hex}.json"
+        )
+        mapsets = list(self.mapsetlist)
+        if features and self.incremental:
+            mapsets.append(self.target_mapset_name)
+        script_values = {
+            "vectors": ",".join(self.vector_maps),
+            "mapsets": ",".join(mapsets),
+            "output": attributes_file,
+        }
+        if features:
+            script_values["features"] = "true"
+        pl = script_to_pl(
+            "vector_attributes.py", script_values, "vector_attributes"
+        )
+        self._execute_process_list(pl)
+        with open(attributes_file) as f:
+            attributes = json.load(f)
+        os.remove(attributes_file)
+        if features:
+            self.vector_features = {
+                name: attrs.pop("features")
+                for name, attrs in attributes.items()
+            }
+
+        mismatches = list()
+        for vect in self.vector_maps:
+            mapsets = self.member_mapsets["vector"].get(vect, self.mapsetlist)
+            reference_mapset = mapsets[0]
+            reference = attributes[f"{vect}@{reference_mapset}"]
+            differing = [
+                mapset for mapset in mapsets[1:]
+                if attributes[f"{vect}@{mapset}"] != reference
+            ]
+            if differing:
+                mismatches.append(
+                    f"<{vect}> in the mapsets {', '.join(differing)} differs "
+                    f"from <{vect}@{reference_mapset}>"
                 )
+            self.attributetables[vect] = reference["table"]
+        if mismatches:
+            raise AsyncProcessError(
+                "The attribute tables of the vectors differ between the "
+                f"mapsets: {'; '.join(mismatches)}."
             )
-            self._set_progress()
 
-    def _patch_strds(self, strds_name, strds_info):
-        """Creates new STRDS as a duplicate with patched rasters.
+    def _mosaic_exists(self, map_type, name):
+        """Checks if the map exists in the target mapset."""
+        element = "cell" if map_type == "raster" else "vector"
+        return os.path.exists(os.path.join(
+            self.user_project_path, self.target_mapset_name, element, name
+        ))
+
+    def _get_inputs(self, map_type, name):
+        """Returns the maps of all mapsets to patch and their core regions.
+        With the incremental merge the existing mosaic of the target mapset
+        is the first input, which is not cropped.
+        """
+        # the maps of the STRDS and STVDS are only patched from the mapsets
+        # in which they are registered
+        mapsets = self.member_mapsets[map_type].get(name, self.mapsetlist)
+        inputs = [f"{name}@{mapset}" for mapset in mapsets]
+        core_regions = None
+        if self.core_regions:
+            mapset_regions = dict(zip(self.mapsetlist, self.core_regions))
+            core_regions = [mapset_regions[mapset] for mapset in mapsets]
+        if self.incremental and self._mosaic_exists(map_type, name):
+            inputs.insert(0, f"{name}@{self.target_mapset_name}")
+            if core_regions:
+                core_regions.insert(0, "")
+        return inputs, core_regions
+
+    def _plan_patch_tree(self, maps):
+        """Plans the patch of the maps of all mapsets by a tree reduction.
+        Groups of 'fan_in' maps are patched into intermediate maps level by
+        level until at most 'fan_in' maps are left, which are patched into
+        the result. The intermediate maps of a level are deleted after the
+        next level, so that not more than 'fan_in' maps are opened by one
+        patch.
+
+        Args:
+            maps (list): Tuples of the map type ('raster' or 'vector') and the
+                         map name
+
+        Returns:
+            (list): The plan, a list of levels, each a list of process lists
+                    which can be executed concurrently
+        """
+        fan_in = self._get_fan_in()
+        # the rasters are cropped to the core regions in the first level
+        inputs = {
+            (map_type, name): self._get_inputs(map_type, name)
+            for map_type, name in maps
+        }
+        plan = list()
+        intermediates = dict()
+        level = 0
+        while inputs:
+            level_plan = list()
+            next_inputs = dict()
+            for (map_type, name), (map_inputs, regions) in inputs.items():
+                groups = patch_groups(len(map_inputs), fan_in)
+                if groups is None:
+                    level_plan.append(self.plan_funcs[map_type](
+                        name, map_inputs, name, regions
+                    ))
+                    continue
+                outputs = list()
+                for idx, group in enumerate(groups):
+                    output = f"{name}_level{level}_{idx}_{uuid4().hex}"
+                    group_regions = None
+                    if regions:
+                        group_regions = regions[group]
+                    level_plan.append(self.plan_funcs[map_type](
+                        name, map_inputs[group], output, group_regions,
+                    ))
+                    outputs.append(output)
+                next_inputs[(map_type, name)] = (outputs, None)
+            plan.append(level_plan)
+            if level > 0:
+                # delete the intermediate maps which are patched by this level
+                plan.append([self._plan_delete(intermediates)])
+            intermediates = {"raster": list(), "vector": list()}
+            for (map_type, _), (outputs, _) in next_inputs.items():
+                intermediates[map_type].extend(outputs)
+            inputs = next_inputs
+            level += 1
+        return plan
+
+    def _execute_plan(self, plan):
+        """Executes the plan, a list of levels, each a list of process lists
+        which can be executed concurrently. The progress steps are the
+        processes of the plan, the progress is updated after each process
+        list. With one worker the process lists are executed one after the
+        other.
+        """
+        self.step += sum(len(pl) for level in plan for pl in level)
+        self._set_progress()
+        if self._get_workers() == 1:
+            for pl in [pl for level in plan for pl in level if pl]:
+                self._execute_and_count(pl)
+            return
+        for level in plan:
+            self._run_parallel([
+                partial(self._execute_and_count, pl) for pl in level if pl
+            ])
+
+    def _prepare_patch_stds(self, mapsets):
+        """Prepares the patch of STRDS and STVDS by reading their registered
+        maps in all mapsets at once. The union of the maps of all mapsets is
+        added to the list of rasters or vectors to patch, each map is only
+        patched from the mapsets in which it is registered. The information
+        to create the new space time datasets is written to the dict
+        self.stds_infos.
+        """
+        if not self.strds and not self.stvds:
+            return
+        stds_file = os.path.join(
+            global_config.TMP_WORKDIR, f"stds_maps_{uuid4().hex}.json"
+        )
+        script_values = {
+            "strds": ",".join(self.strds),
+            "stvds": ",".join(self.stvds),
+            "mapsets": ",".join(mapsets),
+            "output": stds_file,
+        }
+        pl = script_to_pl("stds_maps.py", script_values, "stds_maps")
+        self._execute_process_list(pl)
+        with open(stds_file) as f:
+            stds_maps = json.load(f)
+        os.remove(stds_file)
+        for stds_type, map_type, map_names in [
+            ("strds", "raster", self.raster_maps),
+            ("stvds", "vector", self.vector_maps),
+        ]:
+            member_mapsets = self.member_mapsets[map_type]
+            known_maps = set(map_names)
+            for stds, stds_info in stds_maps[stds_type].items():
+                members = StdsMembers.from_mapsets(stds_info["maps"])
+                for name, map_mapsets in zip(members.names(), members.mapsets):
+                    if name not in member_mapsets:
+                        member_mapsets[name] = map_mapsets
+                    else:
+                        # a map which is registered in several STDS
+                        member_mapsets[name] = list(dict.fromkeys(
+                            member_mapsets[name] + map_mapsets
+                        ))
+                    if name not in known_maps:
+                        known_maps.add(name)
+                        map_names.append(name)
+                self.stds_infos[stds_type][stds] = dict(stds_info["info"])
+                self.stds_infos[stds_type][stds]["maps"] = members
+        self._add_progress(len(self.strds) + len(self.stvds))
+
+    def _plan_patch_stds(self, stds_type, stds_name, stds_info):
+        """Plans the creation of the new STRDS or STVDS as a duplicate with
+        patched maps, which are registered by one t.register.
         """
         id = str(uuid4())
-        tmp_strds_file = os.path.join(
-            global_config.TMP_WORKDIR, f"strds_{strds_name}_{id}.txt"
+        tmp_stds_file = os.path.join(
+            global_config.TMP_WORKDIR, f"{stds_type}_{stds_name}_{id}.txt"
         )
-        # write file to register the rasters in the STRDS without the mapset
-        with open(tmp_strds_file, "w") as f:
-            for rast in strds_info["rasters"]:
-                r_info = rast["all"].replace(
-                    f"{self.mapsetlist[0]}|", ""
+        # write file to register the maps in the STDS without the mapset
+        with open(tmp_stds_file, "w") as f:
+            for line in stds_info["maps"].registration_lines():
+                f.write(line + "\n")
+        self.tmp_files.append(tmp_stds_file)
+        tpl_values_stds_create = {
+            "stds": f"{stds_name}",
+            "stds_type": stds_type,
+            "map_type": "raster" if stds_type == "strds" else "vector",
+            "temporaltype": stds_info["temporaltype"],
+            "semantictype": stds_info["semantictype"],
+            "description": stds_info["description"],
+            "title": stds_info["title"],
+            "file": tmp_stds_file,
+        }
+        pl_stds_c, _ = pctpl_to_pl(
+            "patch/pc_stds_create.json", tpl_values_stds_create)
+        return pl_stds_c
+
+    def _check_inputs(self):
+        """Checks that all rasters, vectors, STRDS and STVDS exist in all
+        mapsets.
+        The maps of each mapset are listed once and the listing is cached,
+        e.g. to check the maps of the STRDS and STVDS later.
+
+        Returns:
+            (list): Messages of the missing or type-mismatched inputs
+        """
+        if self.map_listing is None:
+            self.map_listing = dict()
+            mapsets = [
+                mapset for mapset in self.mapsetlist
+                if mapset not in self.missing_mapsets
+            ]
+            if mapsets:
+                listing_file = os.path.join(
+                    global_config.TMP_WORKDIR, f"list_maps_{uuid4().hex}.json"
                 )
-                f.write(r_info + "\n")
-        tpl_values_strds_create = {
-            "strds": f"{strds_name}",
-            "temporaltype": strds_info["temporaltype"],
-            "semantictype": strds_info["semantictype"],
-            "description": strds_info["description"],
-            "title": strds_info["title"],
-            "file": tmp_strds_file,
+                script_values = {
+                    "mapsets": ",".join(mapsets),
+                    "output": listing_file,
+                }
+                pl = script_to_pl("list_maps.py", script_values, "list_maps")
+                self._execute_process_list(pl)
+                with open(listing_file) as f:
+                    self.map_listing = json.load(f)
+                os.remove(listing_file)
+            # the missing mapsets are not linked, they are reported together
+            # with the missing maps of the other mapsets
+            for mapset in self.missing_mapsets:
+                self.map_listing[mapset] = None
+        return check_merge_inputs(
+            self.map_listing,
+            self.mapsetlist,
+            {
+                "raster": self.raster_maps,
+                "vector": self.vector_maps,
+                "strds": self.strds,
+                "stvds": self.stvds,
+            },
+        )
+
+    def _preflight(self):
+        """Checks all inputs of the merge before anything is patched, also
+        the maps of the STRDS and STVDS in the mapsets in which they are
+        registered.
+
+        Returns:
+            (list): Messages of the missing or type-mismatched inputs
+        """
+        problems = self._check_inputs()
+        if problems:
+            return problems
+        self._prepare_patch_stds(self.mapsetlist)
+        return check_stds_members(self.map_listing, self.member_mapsets)
+
+    def _skip_merged_mapsets(self):
+        """Removes the mapsets which are already merged into the mosaic of an
+        output by the same run from the inputs of the output. The record of a
+        mosaic which does not exist anymore is cleared. Mapsets which are
+        merged into all mosaics are removed from the mapsets to merge.
+        Returns False if all mapsets are already merged.
+        """
+        self.mosaic = MosaicManifest(
+            self.lock_interface.kvdb_server,
+            self.user_id,
+            self.project_name,
+            self.target_mapset_name,
+            self.request_data.get("run_id", self.resource_id),
+        )
+        merged_everywhere = set(self.mapsetlist)
+        for map_type, names in [
+            ("raster", self.raster_maps), ("vector", self.vector_maps)
+        ]:
+            for name in names:
+                if self._mosaic_exists(map_type, name):
+                    merged = self.mosaic.get_merged(map_type, name)
+                else:
+                    self.mosaic.clear(map_type, name)
+                    merged = set()
+                self.member_mapsets[map_type][name] = [
+                    mapset for mapset in self.mapsetlist
+                    if mapset not in merged
+                ]
+                merged_everywhere &= merged
+        # outputs without new mapsets are not patched
+        self.raster_maps = [
+            rast for rast in self.raster_maps
+            if self.member_mapsets["raster"][rast]
+        ]
+        self.vector_maps = [
+            vect for vect in self.vector_maps
+            if self.member_mapsets["vector"][vect]
+        ]
+        if self.core_regions:
+            self.core_regions = [
+                core_region for mapset, core_region
+                in zip(self.mapsetlist, self.core_regions)
+                if mapset not in merged_everywhere
+            ]
+        self.mapsetlist = [
+            mapset for mapset in self.mapsetlist
+            if mapset not in merged_everywhere
+        ]
+        return len(self.mapsetlist) > 0
+
+    def _record_merged_mapsets(self):
+        """Records the merged mapsets of the mosaics after an incremental
+        merge. A merge which replaces the outputs clears their records.
+        """
+        if not self.incremental:
+            self.mosaic = MosaicManifest(
+                self.lock_interface.kvdb_server,
+                self.user_id,
+                self.project_name,
+                self.target_mapset_name,
+                self.resource_id,
+            )
+        for map_type, names in [
+            ("raster", self.raster_maps), ("vector", self.vector_maps)
+        ]:
+            for name in names:
+                if self.incremental:
+                    self.mosaic.add_merged(
+                        map_type, name, self.member_mapsets[map_type][name]
+                    )
+                else:
+                    self.mosaic.clear(map_type, name)
+
+    def _record_virtual_sources(self):
+        """Records the mapsets which are read by the virtual rasters, so that
+        the sweeper does not delete them. The records of rasters which are
+        patched or materialized are cleared, because they are real rasters.
+        """
+        sources = VirtualRasterSources(
+            self.lock_interface.kvdb_server, self.user_id, self.project_name
+        )
+        for rast in self.raster_maps:
+            if self.method == "virtual":
+                sources.set_sources(
+                    self.target_mapset_name,
+                    rast,
+                    self.member_mapsets["raster"].get(rast, self.mapsetlist),
+                )
+            else:
+                sources.clear(self.target_mapset_name, rast)
+
+    def _materialize(self):
+        """Replaces the virtual rasters and the virtual rasters of the STRDS
+        in the target mapset by real rasters.
+        """
+        if self.target_mapset_exists is False:
+            raise AsyncProcessError(
+                f"The mapset <{self.target_mapset_name}> with the virtual "
+                "rasters to materialize does not exist."
+            )
+        self._prepare_patch_stds([self.target_mapset_name])
+        # the STRDS are kept, the rasters are written under the same names
+        # into the temporary mapset and replace the virtual rasters of the
+        # target mapset by the finalization
+        self._execute_plan([[
+            script_to_pl(
+                "patch_raster.py",
+                {"materialize": f"{rast}@{self.target_mapset_name}"},
+                f"materialize_raster_{rast}",
+            )
+            for rast in self.raster_maps
+        ]])
+
+    def _remove_vrt_markers(self):
+        """Removes the virtual raster markers of the materialized rasters in
+        the target mapset. The finalization copies the real rasters into the
+        target mapset, but keeps the marker, so that GRASS GIS would still
+        read the rasters as virtual rasters over the merged mapsets.
+        """
+        for rast in self.raster_maps:
+            vrt_file = os.path.join(
+                self.user_project_path, self.target_mapset_name,
+                "cell_misc", rast, "vrt",
+            )
+            if os.path.isfile(vrt_file):
+                os.remove(vrt_file)
+
+    def _plan_merge(self):
+        """Plans the patch of the rasters and vectors (also the maps of the
+        STRDS and STVDS) and the creation of the new STRDS and STVDS as
+        duplicates with patched maps. With the 'virtual' method virtual
+        rasters are built instead of patching the rasters.
+        """
+        self._save_patch_region()
+        if self.method == "virtual":
+            self.plan_funcs["raster"] = self._plan_vrt
+        plan = self._plan_patch_tree(
+            [("raster", rast) for rast in self.raster_maps]
+            + [("vector", vect) for vect in self.vector_maps]
+        )
+        if self.tmp_regions:
+            plan.append([self._plan_delete({"region": self.tmp_regions})])
+        # create the new STRDS and STVDS after all maps are patched
+        pl_stds = [
+            process
+            for stds_type, stds_infos in self.stds_infos.items()
+            for stds_name, stds_info in stds_infos.items()
+            for process in self._plan_patch_stds(
+                stds_type, stds_name, stds_info
+            )
+        ]
+        if pl_stds:
+            plan.append([pl_stds])
+        return plan
+
+    def _remove_tmp_files(self):
+        for tmp_file in self.tmp_files:
+            os.remove(tmp_file)
+        self.tmp_files = list()
+
+    def _merge(self):
+        """Patches the rasters, vectors, STRDS and STVDS of the mapsets. All
+        patches are planned first and then executed together.
+        """
+        problems = self._preflight()
+        if problems:
+            raise AsyncProcessError(
+                f"{len(problems)} inputs of the merge are missing or have "
+                f"the wrong type: {'; '.join(problems)}."
+            )
+        self._check_attribute_tables()
+        plan = self._plan_merge()
+        try:
+            self._execute_plan(plan)
+        finally:
+            self._remove_tmp_files()
+
+    def _estimate_costs(self):
+        """Estimates the cells, features and bytes of the inputs and results
+        of the merge from the headers and files of the maps. With the
+        incremental merge the existing mosaic is counted as input.
+        """
+        fan_in = self._get_fan_in()
+        raster_costs = dict()
+        for rast in self.raster_maps:
+            inputs, _ = self._get_inputs("raster", rast)
+            metadata = list()
+            for raster in inputs:
+                name, mapset = raster.split("@")
+                metadata.append(raster_metadata(
+                    os.path.join(self.user_project_path, mapset), name
+                ))
+            raster_costs[rast] = estimate_raster_costs(
+                metadata,
+                count_patch_levels(len(inputs), fan_in),
+                self.method == "virtual",
+            )
+        vector_costs = dict()
+        for vect in self.vector_maps:
+            inputs, _ = self._get_inputs("vector", vect)
+            metadata = list()
+            for vector in inputs:
+                name, mapset = vector.split("@")
+                metadata.append({
+                    "features": self.vector_features.get(vector, 0),
+                    "bytes": map_disk_usage(
+                        os.path.join(self.user_project_path, mapset),
+                        "vector", name,
+                    ),
+                })
+            vector_costs[vect] = estimate_vector_costs(
+                metadata, count_patch_levels(len(inputs), fan_in)
+            )
+        return {
+            "raster": raster_costs,
+            "vector": vector_costs,
+            "total": sum_merge_costs(raster_costs, vector_costs),
         }
-        pl_strds_c, _ = pctpl_to_pl(
-            "patch/pc_strds_create.json", tpl_values_strds_create)
-        self._execute_process_list(pl_strds_c)
-        os.remove(tmp_strds_file)
-        self.num_of_steps += self.num_steps["strds"][1]
-        self._set_progress()
+
+    @staticmethod
+    def _describe_process(process):
+        """Returns the command line of a process, scripts of the core package
+        by their file name.
+        """
+        params = [str(param) for param in process.executable_params]
+        if process.exec_type == "exec":
+            return " ".join([os.path.basename(params[0])] + params[1:])
+        return " ".join([process.executable] + params)
+
+    def _dry_run(self):
+        """Checks the inputs and plans the merge without executing the plan.
+
+        Returns:
+            (dict): The 'problems' of the inputs, and if there are none the
+                    resolved 'plan' as list of levels with the commands
+                    which can be executed concurrently, the number of
+                    'processes' per module and the 'costs' estimated from
+                    the metadata of the maps
+        """
+        result = {"problems": list()}
+        if self.method == "materialize":
+            return result
+        problems = self._preflight()
+        if not problems:
+            try:
+                self._check_attribute_tables(features=True)
+            except AsyncProcessError as e:
+                problems = [str(e)]
+        if problems:
+            result["problems"] = problems
+            return result
+        try:
+            plan = self._plan_merge()
+        finally:
+            self._remove_tmp_files()
+        processes = dict()
+        for process in [
+            process for level in plan for pl in level for process in pl
+        ]:
+            module = process.executable
+            if process.id.startswith("patch_raster_"):
+                module = "r.patch"
+            processes[module] = processes.get(module, 0) + 1
+        result["plan"] = [
+            [self._describe_process(process) for pl in level for process in pl]
+            for level in plan
+        ]
+        result["processes"] = processes
+        result["rasters"] = self.raster_maps
+        result["vectors"] = self.vector_maps
+        result["costs"] = self._estimate_costs()
+        return result
 
     def _execute(self):
 
-        keep_mapsets = self.request_data["keep_mapsets"]
-        self.required_mapsets.extend(self.mapsetlist)
+        self._setup()
+        keep_mapsets = self.request_data.get("keep_mapsets", "false")
+        self.method = self.request_data.get("method", "patch")
+        if self.method not in ["patch", "virtual", "materialize"]:
+            raise AsyncProcessError(
+                f"The merge method <{self.method}> is not supported."
+            )
+        if self.method == "virtual":
+            if self.core_regions:
+                raise AsyncProcessError(
+                    "The 'core_regions' can not be used with the 'virtual' "
+                    "method, because the rasters are not copied."
+                )
+            # the virtual rasters read the rasters of the mapsets
+            keep_mapsets = "true"
+        if self.method == "materialize" and (self.vector_maps or self.stvds):
+            raise AsyncProcessError(
+                "Only rasters and STRDS can be materialized."
+            )
+        if self.request_data.get("vector_topology", "build") not in [
+            "build", "deferred"
+        ]:
+            raise AsyncProcessError(
+                "The 'vector_topology' has to be 'build' or 'deferred'."
+            )
+        self.incremental = str(
+            self.request_data.get("incremental", "false")
+        ).lower() == "true"
+        if self.incremental and (
+            self.method != "patch" or self.strds or self.stvds
+        ):
+            raise AsyncProcessError(
+                "Only rasters and vectors can be merged incrementally with "
+                "the 'patch' method."
+            )
+        if self.core_regions and \
+                len(self.core_regions) != len(self.mapsetlist):
+            raise AsyncProcessError(
+                "The number of 'core_regions' has to match the number of "
+                "mapsets in the 'mapsetlist'."
+            )
+        if self.incremental and self._skip_merged_mapsets() is False:
+            self.finish_message = (
+                "Processing successfully finished. All mapsets are already "
+                "merged."
+            )
+            self.module_results = list()
+            return
+        # missing mapsets can not be linked into the temporary database
+        self.missing_mapsets = [
+            mapset for mapset in self.mapsetlist
+            if not os.path.isdir(os.path.join(self.user_project_path, mapset))
+        ]
+        self.required_mapsets.extend(
+            mapset for mapset in self.mapsetlist
+            if mapset not in self.missing_mapsets
+        )
+        if self.core_regions:
+            for core_region in self.core_regions:
+                if "@" in core_region:
+                    self.required_mapsets.append(core_region.split("@")[1])
 
         self._execute_preparation()
         self._set_progress()
 
-        self._prepare_patch_strds()
-        for rast in self.raster_maps:
-            self._patch_raster(rast)
-        for vect in self.vector_maps:
-            self._patch_vector(vect)
-        # create new STRDS as a duplicate with patched rasters
-        for strds_name, strds_info in self.strds_infos.items():
-            self._patch_strds(strds_name, strds_info)
+        if str(self.request_data.get("dry_run", "false")).lower() == "true":
+            # only plan the merge, the target mapset is not changed
+            self.response_model_class = MergeDryRunResponseModel
+            self.module_results = self._dry_run()
+            problems = self.module_results["problems"]
+            if problems:
+                self.finish_message = (
+                    f"Dry run finished. {len(problems)} inputs of the merge "
+                    "are missing or have the wrong type."
+                )
+            else:
+                self.finish_message = (
+                    "Dry run finished. All inputs of the merge exist."
+                )
+            return
 
-        # TODO STVDS
+        if self.method == "materialize":
+            self._materialize()
+        else:
+            self._merge()
 
         # delete temporary mapsets
-        if keep_mapsets is not True and keep_mapsets.lower() != "true":
-            for mapset_name in self.mapsetlist:
-                self._delete_mapset(mapset_name)
+        delete_mapsets = str(keep_mapsets).lower() != "true"
+        background_deletion = delete_mapsets and str(self.request_data.get(
+            "background_deletion", "false"
+        )).lower() == "true"
+        deletion_fallback = background_deletion and self.job_timeout is None
+        if deletion_fallback:
+            # without the timeout of the jobs, e.g. if the merge is not
+            # started by the endpoint, no deletion job can be enqueued
+            log.warning(
+                "No job timeout is given, so the merged mapsets are deleted "
+                "by the merge instead of a background job."
+            )
+            background_deletion = False
+        # the materialized rasters read the mapsets until the finalization
+        if delete_mapsets and not background_deletion and \
+                self.method != "materialize":
+            self._delete_mapsets(self.mapsetlist)
 
         self._execute_finalization()
+        if self.method == "materialize":
+            self._remove_vrt_markers()
+            if delete_mapsets and not background_deletion:
+                self._delete_mapsets(self.mapsetlist)
+        if self.method != "materialize":
+            self._record_merged_mapsets()
+        self._record_virtual_sources()
+        if background_deletion:
+            resource_id = self._enqueue_deletion_job(self.mapsetlist)
+            self.finish_message = (
+                "Processing successfully finished. The merged mapsets are "
+                f"deleted in the background by the job <{resource_id}>."
+            )
+        elif deletion_fallback:
+            self.finish_message = (
+                "Processing successfully finished. The merged mapsets are "
+                "deleted by the merge, because no background deletion job "
+                "can be enqueued."
+            )
 
         # make response pretty
         self.module_results = list()
+
+
+class AsyncMapsetDeletion(MapsetProcessingMixin, PersistentProcessing):
+    """Delete the merged mapsets of a merge in the background.
+    """
+
+    def __init__(self, rdc):
+        PersistentProcessing.__init__(self, rdc)
+        self._init_progress()
+        self.response_model_class = GridTilingResponseModel
+        self.mapsetlist = self.request_data.get("mapsetlist", list())
+
+    def _delete_marked_mapset(self, mapset_name):
+        self._delete_mapset(mapset_name)
+        self.deletion_marks.unmark(mapset_name)
+        self._add_progress(1)
+
+    def _execute(self):
+
+        self._setup()
+        self.deletion_marks = MapsetDeletionMarks(
+            self.lock_interface.kvdb_server, self.user_id, self.project_name
+        )
+        self.step = len(self.mapsetlist)
+        self._set_progress()
+        self._run_parallel([
+            partial(self._delete_marked_mapset, mapset)
+            for mapset in self.mapsetlist
+        ])
+        self.finish_message = (
+            f"Processing successfully finished. {len(self.mapsetlist)} "
+            "mapsets are deleted."
+        )
+        self.module_results = self.mapsetlist
@@ -24,21 +24,47 @@ __author__ = "Anika Weinmann"
 __copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
 __maintainer__ = "mundialis GmbH % Co. KG"
 
-from flask import make_response, jsonify
+from flask import make_response, jsonify, request
 from flask_restful_swagger_2 import swagger
+import json
+import os
 import pickle
+import shutil
 from uuid import uuid4
 from copy import deepcopy
 
+import numpy as np
+
+from actinia_core.core.common.config import global_config
+from actinia_processing_lib.exceptions import AsyncProcessError
 from actinia_processing_lib.persistent_processing import PersistentProcessing
 from actinia_rest_lib.resource_base import ResourceBase
 from actinia_core.core.common.kvdb_interface import enqueue_job
 from actinia_core.core.common.process_chain import ProcessChainConverter
+from actinia_core.models.response_models import create_response_from_model
 
 from actinia_tiling_plugin.apidocs import tiling
-from actinia_tiling_plugin.resources.processes import pctpl_to_pl
-from actinia_tiling_plugin.models.response_models.tiling import \
-    GridTilingResponseModel
+from actinia_tiling_plugin.core.tiles import (
+    TILE_MODES,
+    check_tile_mode,
+    compute_grid_tile_list,
+    compute_tile_layout,
+    find_region_file,
+    format_tile_layout,
+    grid_tiles_extent,
+    prune_tiles,
+    read_region_file,
+    tile_names,
+)
+from actinia_tiling_plugin.resources.config import TILINGCONFIG
+from actinia_tiling_plugin.resources.processes import (
+    pctpl_to_pl,
+    script_to_pl,
+)
+from actinia_tiling_plugin.models.response_models.tiling import (
+    GridTilingResponseModel,
+    VirtualGridTilingResponseModel,
+)
 
 
 class AsyncTilingProcessGridResource(ResourceBase):
@@ -61,10 +87,100 @@ class AsyncTilingProcessGridResource(ResourceBase):
 
         return rdc
 
+    def _execute_virtual(self, project_name, mapset_name):
+        """Compute the extents of the grid tiles from the region of the mapset
+        without creating vector maps and without starting a job. The
+        request is checked like the other requests by preprocess and the
+        number of tiles is limited before the tiles are computed.
+        """
+        rdc = self.preprocess(
+            has_json=True,
+            has_xml=False,
+            project_name=project_name,
+            mapset_name=mapset_name,
+        )
+        if rdc is None:
+            html_code, response_model = pickle.loads(self.response_data)
+            return make_response(jsonify(response_model), html_code)
+        self.request_data = rdc.request_data
+        if "mask_raster" in self.request_data or \
+                "mask_vector" in self.request_data:
+            return self.get_error_response(
+                message="The 'mask_raster' and 'mask_vector' are not "
+                "supported in the 'virtual' mode."
+            )
+        region_file = find_region_file(
+            self.grass_data_base,
+            self.grass_user_data_base,
+            self.user_group,
+            project_name,
+            mapset_name,
+        )
+        if region_file is None:
+            return self.get_error_response(
+                message=f"Unable to find the region of mapset <{mapset_name}>"
+                f" in project <{project_name}>."
+            )
+        try:
+            region = read_region_file(region_file)
+            layout = compute_tile_layout(
+                region,
+                self.request_data.get("width"),
+                self.request_data.get("height"),
+                self.request_data.get("max_cells_per_tile"),
+                self.request_data.get("memory_budget_mb"),
+                TILINGCONFIG.max_tiles,
+            )
+            results = compute_grid_tile_list(
+                region,
+                layout["width"],
+                layout["height"],
+                self.request_data["grid_prefix"],
+                self.request_data.get("overlap", 0),
+                self.request_data.get("overlap_unit", "map_units"),
+                TILINGCONFIG.max_tiles,
+            )
+        except (KeyError, ValueError) as e:
+            return self.get_error_response(
+                message=f"Unable to compute the grid tiles: {e}"
+            )
+        self.response_data = create_response_from_model(
+            VirtualGridTilingResponseModel,
+            status="finished",
+            user_id=self.user_id,
+            resource_id=self.resource_id,
+            queue=self.queue,
+            iteration=self.iteration,
+            process_log=None,
+            results=results,
+            message="Processing successfully finished. "
+            f"{format_tile_layout(layout)}",
+            http_code=200,
+            orig_time=self.orig_time,
+            orig_datetime=self.orig_datetime,
+            status_url=self.status_url,
+            api_info=self.api_info,
+        )
+        self.resource_logger.commit(
+            self.user_id, self.resource_id, self.iteration, self.response_data
+        )
+        html_code, response_model = pickle.loads(self.response_data)
+        return make_response(jsonify(response_model), html_code)
+
     @swagger.doc(tiling.grid_tiling_post_docs)
     def post(self, project_name, mapset_name):
         """Create grid tiles.
         """
+        req_data = request.get_json(silent=True)
+        if isinstance(req_data, dict):
+            try:
+                check_tile_mode(
+                    req_data.get("mode", "vector"), TILE_MODES + ["virtual"]
+                )
+            except ValueError as e:
+                return self.get_error_response(message=str(e))
+            if req_data.get("mode") == "virtual":
+                return self._execute_virtual(project_name, mapset_name)
         self._execute(project_name, mapset_name)
         html_code, response_model = pickle.loads(self.response_data)
         return make_response(jsonify(response_model), html_code)
@@ -78,8 +194,12 @@ class AsyncTilingProcessGridResource(ResourceBase):
         process_desc["process_results"] = dict()
         process_desc["process_results"]["type"] = "array"
         process_desc["process_results"]["items"] = "string"
-        process_desc["process_results"]["description"] = \
-            "List of the vector names of the created grid tiles."
+        process_desc["process_results"]["description"] = (
+            "List of the vector or region names of the created grid tiles. "
+            "In the "
+            "'virtual' mode a list of objects with the tile 'name' and the "
+            "tile extent 'n', 's', 'e' and 'w'."
+        )
         return make_response(jsonify(process_desc), 200)
 
 
@@ -131,21 +251,154 @@ class AsyncTilingProcessGrid(PersistentProcessing):
     def _execute_finalization(self):
         # Copy local mapset to original project, merge mapsets
         self._copy_merge_tmp_mapset_to_target_mapset()
+        # saved regions are not merged into an existing target mapset
+        if self.target_mapset_exists is True:
+            windows_path = os.path.join(self.temp_mapset_path, "windows")
+            if os.path.isdir(windows_path):
+                shutil.copytree(
+                    windows_path,
+                    os.path.join(
+                        self.user_project_path,
+                        self.target_mapset_name,
+                        "windows",
+                    ),
+                    dirs_exist_ok=True,
+                )
+
+    def _compute_layout(self):
+        """Compute the tile size from the current region of the temporary
+        mapset, either from the given width and height or from the cell
+        budget of a tile. The chosen layout is reported in the finish
+        message.
+        """
+        self.region = read_region_file(
+            os.path.join(self.temp_mapset_path, "WIND")
+        )
+        try:
+            self.layout = compute_tile_layout(
+                self.region,
+                self.request_data.get("width"),
+                self.request_data.get("height"),
+                self.request_data.get("max_cells_per_tile"),
+                self.request_data.get("memory_budget_mb"),
+                TILINGCONFIG.max_tiles,
+            )
+        except ValueError as e:
+            raise AsyncProcessError(f"Unable to compute the grid tiles: {e}")
+        self.finish_message = (
+            f"Processing successfully finished. "
+            f"{format_tile_layout(self.layout)}"
+        )
 
-    def _execute(self):
+    def _compute_tiles(self):
+        """Compute the tile extents of the tile layout."""
+        try:
+            return compute_grid_tile_list(
+                self.region,
+                self.layout["width"],
+                self.layout["height"],
+                self.request_data["grid_prefix"],
+                self.request_data.get("overlap", 0),
+                self.request_data.get("overlap_unit", "map_units"),
+                TILINGCONFIG.max_tiles,
+            )
+        except ValueError as e:
+            raise AsyncProcessError(f"Unable to compute the grid tiles: {e}")
+
+    def _add_required_mapset(self, map_name):
+        """Link the mapset of a map, which is used as input, into the
+        temporary database.
+        """
+        if "@" in map_name:
+            mapset = map_name.split("@")[1]
+            if mapset not in self.required_mapsets + [
+                "PERMANENT", self.target_mapset_name
+            ]:
+                self.required_mapsets.append(mapset)
+
+    def _get_mask(self):
+        """Return the name and type of the mask map or None."""
+        masks = [
+            (self.request_data[f"mask_{map_type}"], map_type)
+            for map_type in ["raster", "vector"]
+            if self.request_data.get(f"mask_{map_type}")
+        ]
+        if len(masks) > 1:
+            raise AsyncProcessError(
+                "Only one of 'mask_raster' and 'mask_vector' can be set."
+            )
+        return masks[0] if masks else None
+
+    def _compute_workload(self, map_name, map_type, grid, method="features"):
+        """Measure the workload of a map, e.g. the number of non-null cells,
+        per cell of the grid.
+        """
+        workload_file = os.path.join(
+            global_config.TMP_WORKDIR, f"workload_{uuid4().hex}.npy"
+        )
+        script_values = {
+            "map": map_name,
+            "type": map_type,
+            "method": method,
+            "n": grid["n"],
+            "s": grid["s"],
+            "e": grid["e"],
+            "w": grid["w"],
+            "rows": grid["rows"],
+            "cols": grid["cols"],
+            "output": workload_file,
+        }
+        pl = script_to_pl("workload.py", script_values, "compute_workload")
+        self._execute_process_list(pl)
+        workload = np.load(workload_file)
+        os.remove(workload_file)
+        return workload
+
+    def _prune_tiles(self, tile_list, mask_name, mask_type):
+        """Remove the tiles without data in the mask."""
+        coverage = self._compute_workload(
+            mask_name,
+            mask_type,
+            grid_tiles_extent(self.region, self.layout),
+            method="cover",
+        )
+        try:
+            pruned_list = prune_tiles(tile_list, coverage)
+        except ValueError as e:
+            raise AsyncProcessError(f"Unable to prune the grid tiles: {e}")
+        self.finish_message += (
+            f" {len(tile_list) - len(pruned_list)} of {len(tile_list)} tiles "
+            f"without data in the mask <{mask_name}> were removed."
+        )
+        return pruned_list
 
+    def _write_tiles(self, tile_list, tile_type):
+        """Write the computed tiles in one batch as vector maps or as saved
+        regions.
+        """
+        tiles_file = os.path.join(
+            global_config.TMP_WORKDIR, f"tiles_{uuid4().hex}.json"
+        )
+        with open(tiles_file, "w") as f:
+            json.dump(tile_list, f)
+        script_values = {"tiles": tiles_file, "type": tile_type}
+        pl = script_to_pl("write_tiles.py", script_values, "write_tiles")
+        self._execute_process_list(pl)
+        os.remove(tiles_file)
+
+    def _create_grid_tiles(self):
+        """Create the grid with v.mkgrid and write one vector map per grid
+        cell.
+        """
         grid_step_num = 2
         post_step_num = 1
-        self.progress["step"] = grid_step_num + post_step_num
-
-        self._execute_preparation()
         pconv = ProcessChainConverter()
 
         # v.mkgrid with output map and box
         req_data_orig = self.request_data
         grid_prefix = req_data_orig["grid_prefix"]
         grid_name = f"grid_{uuid4().hex}"
-        box = f"{req_data_orig['width']},{req_data_orig['height']}"
+        box = f"{self.layout['width']},{self.layout['height']}"
         tpl_values1 = {"grid_name": grid_name, "box": box}
         pl1, pconv = pctpl_to_pl("pc_create_grid.json", tpl_values1)
         self.output_parser_list = pconv.output_parser_list
@@ -158,39 +411,50 @@ class AsyncTilingProcessGrid(PersistentProcessing):
         ][0])
         num_of_steps = grid_step_num
         self.progress["num_of_steps"] = num_of_steps
-        self.progress["step"] = grid_step_num + post_step_num + num_grid_cells
-
-        # extract grid cells
-        grid_data = list()
-        zp_len = len(str(num_grid_cells))
-        text = "{:0%s}" % zp_len
-        grid_data = [
-            {"cat": cat, "zeropaddedcat": text.format(cat)}
-            for cat in range(1, num_grid_cells + 1)
-        ]
-        tpl_values2 = {
-            "grid_name": grid_name,
-            "grid_prefix": grid_prefix,
-            "data": grid_data,
-            # "n": num_grid_cells,
+        self.progress["step"] = grid_step_num + post_step_num + 1
+
+        # write all grid cells as tiles in one pass over the grid
+        script_values = {
+            "grid": grid_name,
+            "prefix": grid_prefix,
+            "digits": len(str(num_grid_cells)),
         }
-        pl2, _ = pctpl_to_pl("pc_extract_grid.json", tpl_values2)
+        pl2 = script_to_pl("write_tiles.py", script_values, "write_tiles")
         self._execute_process_list(pl2)
-        num_of_steps += num_grid_cells
+        num_of_steps += 1
         self.progress["num_of_steps"] = num_of_steps
-        self.progress["step"] = grid_step_num + post_step_num + num_grid_cells
 
         # delete grid
         tpl_values3 = {"vector_name": grid_name}
         pl3, _ = pctpl_to_pl("pc_delete_vector.json", tpl_values3)
         self._execute_process_list(pl3)
+        return tile_names(num_grid_cells, grid_prefix)
+
+    def _execute(self):
+
+        self.progress["step"] = 4
+        mask = self._get_mask()
+        if mask:
+            self._add_required_mapset(mask[0])
+        self._execute_preparation()
+        self._compute_layout()
+
+        mode = self.request_data.get("mode", "vector")
+        overlap = float(self.request_data.get("overlap", 0))
+        if mode == "region" or overlap > 0 or mask:
+            # computed tiles as saved regions or buffered vector tiles, the
+            # core extents of buffered tiles are saved as <tile>_core regions
+            tile_list = self._compute_tiles()
+            if mask:
+                tile_list = self._prune_tiles(tile_list, *mask)
+            self._write_tiles(tile_list, mode)
+            names = [tile["name"] for tile in tile_list]
+            self.progress["num_of_steps"] = 1
+        else:
+            names = self._create_grid_tiles()
 
         self._execute_finalization()
-        num_of_steps += post_step_num
-        self.progress["num_of_steps"] = num_of_steps
-        self.progress["step"] = grid_step_num + post_step_num + num_grid_cells
+        self.progress["num_of_steps"] += 1
 
         # make response pretty
-        self.module_results = list()
-        for val in grid_data:
-            self.module_results.append(f"{grid_prefix}{val['zeropaddedcat']}")
+        self.module_results = names
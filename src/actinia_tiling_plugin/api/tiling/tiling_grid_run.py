@@ -0,0 +1,495 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Grid Tiling Run Class
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+from datetime import datetime
+from flask import make_response, jsonify, request
+from flask_restful_swagger_2 import swagger
+import json
+import os
+import pickle
+import time
+from uuid import uuid4
+from copy import deepcopy
+
+from actinia_processing_lib.exceptions import (
+    AsyncProcessError,
+    AsyncProcessTermination,
+)
+from actinia_processing_lib.persistent_processing import PersistentProcessing
+from actinia_rest_lib.resource_base import ResourceBase
+from actinia_core.core.common.kvdb_interface import enqueue_job
+from actinia_core.models.response_models import (
+    ProcessingResponseModel,
+    create_response_from_model,
+)
+
+from actinia_tiling_plugin.apidocs import tiling
+from actinia_tiling_plugin.api.merge.patch_merge import AsyncMergeProcessPatch
+from actinia_tiling_plugin.core.process_chain import unsupported_expressions
+from actinia_tiling_plugin.core.tiles import check_tile_mode
+from actinia_tiling_plugin.api.tiling.tiling_grid import (
+    AsyncTilingProcessGrid,
+)
+from actinia_tiling_plugin.resources.config import RUNCONFIG
+from actinia_tiling_plugin.resources.manifest import (
+    MapsetDeletionMarks,
+    TileManifest,
+    process_chain_hash,
+)
+from actinia_tiling_plugin.resources.processes import render_process_chain
+from actinia_tiling_plugin.models.response_models.tiling import \
+    GridTilingResponseModel
+
+
+class AsyncTilingProcessGridRunResource(ResourceBase):
+    """Create grid tiles, run a process chain template on every tile and
+    merge the results.
+    """
+
+    def _execute(self, project_name, mapset_name):
+
+        rdc = self.preprocess(
+            has_json=True,
+            has_xml=False,
+            project_name=project_name,
+            mapset_name=mapset_name,
+        )
+        if rdc:
+            # # for debugging use the following lines instead of enqueue_job
+            # processing = AsyncTilingProcessGridRun(rdc, self.job_timeout)
+            # processing.run()
+            enqueue_job(self.job_timeout, start_job, rdc, self.job_timeout)
+
+        return rdc
+
+    @swagger.doc(tiling.grid_tiling_run_post_docs)
+    def post(self, project_name, mapset_name):
+        """Run a process chain template on grid tiles and merge the results.
+        """
+        req_data = request.get_json(silent=True)
+        if isinstance(req_data, dict) and req_data.get("mode") == "virtual":
+            return self.get_error_response(
+                message="The 'virtual' mode is not supported for tiled runs."
+            )
+        if isinstance(req_data, dict) and \
+                req_data.get("method") == "materialize":
+            return self.get_error_response(
+                message="The 'materialize' method is not supported for tiled "
+                "runs."
+            )
+        if isinstance(req_data, dict):
+            try:
+                check_tile_mode(req_data.get("mode", "vector"))
+            except ValueError as e:
+                return self.get_error_response(message=str(e))
+        if isinstance(req_data, dict) and "process_chain" in req_data:
+            process_chain = req_data["process_chain"]
+            if not isinstance(process_chain, str):
+                process_chain = json.dumps(process_chain)
+            unsupported = unsupported_expressions(process_chain)
+            if unsupported:
+                return self.get_error_response(
+                    message="Only '{{ grid }}', '{{ tile }}' and "
+                    "'{{ mapset }}' can be used in the process chain "
+                    f"template, not {', '.join(unsupported)}."
+                )
+        self._execute(project_name, mapset_name)
+        html_code, response_model = pickle.loads(self.response_data)
+        return make_response(jsonify(response_model), html_code)
+
+    @swagger.doc(tiling.grid_tiling_run_get_docs)
+    def get(self, project_name, mapset_name):
+        """Get description of the grid tiling run process.
+        """
+        process_desc = deepcopy(tiling.grid_tiling_run_post_docs)
+        del process_desc["responses"]
+        for param in process_desc["parameters"]:
+            if param["name"] == "outputs":
+                param["schema"] = {
+                    "type": "array",
+                    "items": "object with properties 'param' and 'value'.",
+                }
+        process_desc["process_results"] = dict()
+        process_desc["process_results"]["type"] = "array"
+        process_desc["process_results"]["items"] = "string"
+        process_desc["process_results"]["description"] = (
+            "List of the names of the grid tiles on which the process chain "
+            "was run."
+        )
+        return make_response(jsonify(process_desc), 200)
+
+
+def start_job(*args):
+    processing = AsyncTilingProcessGridRun(*args)
+    processing.run()
+
+
+def start_tile_job(*args):
+    processing = PersistentProcessing(*args)
+    processing.run()
+
+
+class AsyncTilingProcessGridRun(AsyncMergeProcessPatch):
+    """Create grid tiles, run a process chain on every tile in its own
+    temporary mapset and patch the results into the target mapset.
+    """
+
+    def __init__(self, rdc, job_timeout):
+        AsyncMergeProcessPatch.__init__(self, rdc, job_timeout)
+        self.response_model_class = GridTilingResponseModel
+
+    def _create_tiles(self):
+        """Create the grid tiles in the target mapset."""
+        rdc_tiling = deepcopy(self.rdc)
+        tiling = AsyncTilingProcessGrid(rdc_tiling)
+        try:
+            tiling._execute()
+        finally:
+            tiling._final_cleanup()
+        return tiling.module_results
+
+    def _tile_mapset(self, idx):
+        """Return the name of the temporary mapset of the tile, which
+        contains the run id, so that runs do not share tile mapsets.
+        """
+        run_hex = self.manifest.run_id.replace("resource_id-", "").replace(
+            "-", ""
+        )
+        return f"{self.target_mapset_name}_{run_hex}_tmp{idx}"
+
+    def _render_tile_process_chain(self, tile, mapset):
+        """Render the process chain template for a tile."""
+        try:
+            return render_process_chain(
+                self.request_data["process_chain"],
+                {
+                    "grid": f"{tile}@{self.target_mapset_name}",
+                    "tile": tile,
+                    "mapset": mapset,
+                },
+            )
+        except ValueError as e:
+            raise AsyncProcessError(str(e))
+
+    def _enqueue_tile_job(self, mapset, process_chain):
+        """Enqueue the processing of a tile like processing_async and
+        return the resource id of the job. The tile job gets its own queue,
+        because this job occupies the worker of its queue while it waits for
+        the tile jobs, e.g. with per user queues all jobs of the user would
+        wait for this job.
+        """
+        resource_id = f"resource_id-{uuid4()}"
+        rdc_tile = deepcopy(self.rdc)
+        rdc_tile.resource_id = resource_id
+        rdc_tile.status_url = self.status_url.replace(
+            self.resource_id, resource_id
+        )
+        rdc_tile.iteration = None
+        rdc_tile.mapset_name = mapset
+        rdc_tile.set_request_data(process_chain)
+        response_data = create_response_from_model(
+            ProcessingResponseModel,
+            status="accepted",
+            user_id=self.user_id,
+            resource_id=resource_id,
+            iteration=None,
+            process_log=None,
+            results={},
+            message="Resource accepted",
+            http_code=200,
+            orig_time=time.time(),
+            orig_datetime=datetime.now(),
+            status_url=rdc_tile.status_url,
+            api_info=self.api_info,
+        )
+        self.resource_logger.commit(
+            self.user_id, resource_id, None, response_data
+        )
+        enqueue_job(
+            self.job_timeout, start_tile_job, rdc_tile,
+            queue_type_overwrite=True,
+        )
+        return resource_id
+
+    def _get_tile_job_status(self, resource_id):
+        """Return the status of a tile job."""
+        return self._get_job_status(resource_id) or "accepted"
+
+    def _check_termination(self, resource_ids):
+        """Terminate the running tile jobs if this job was terminated."""
+        if self.resource_logger.get_termination(
+            self.user_id, self.resource_id, self.iteration
+        ) is True:
+            for resource_id in resource_ids:
+                self.resource_logger.commit_termination(
+                    self.user_id, resource_id
+                )
+            raise AsyncProcessTermination(
+                "The tiled run was terminated by user request."
+            )
+
+    def _run_tile_jobs(self, tile_jobs):
+        """Enqueue the tile jobs with at most 'max_parallel_jobs' jobs at the
+        same time and wait until all of them are done. The status of every
+        tile is recorded in the manifest.
+
+        Args:
+            tile_jobs (list): Tuples of the tile, the mapset and the process
+                              chain
+        """
+        max_parallel_jobs = int(self.request_data.get(
+            "max_parallel_jobs", RUNCONFIG.max_parallel_jobs
+        ))
+        if max_parallel_jobs < 1:
+            raise AsyncProcessError("'max_parallel_jobs' must be positive.")
+        merge_batch_size = self._get_merge_batch_size()
+        pending = list(tile_jobs)
+        running = dict()
+        failed = list()
+        finished = list()
+        num_done = 0
+        while pending or running:
+            while pending and len(running) < max_parallel_jobs:
+                tile, mapset, process_chain = pending.pop(0)
+                resource_id = self._enqueue_tile_job(mapset, process_chain)
+                self.manifest.update_tile(
+                    tile,
+                    status="running",
+                    mapset=mapset,
+                    pc_hash=process_chain_hash(process_chain),
+                    resource_id=resource_id,
+                )
+                running[resource_id] = (tile, mapset)
+            time.sleep(RUNCONFIG.poll_interval)
+            self._check_termination(running.keys())
+            for resource_id, (tile, mapset) in list(running.items()):
+                status = self._get_tile_job_status(resource_id)
+                if status in ["accepted", "running"]:
+                    continue
+                del running[resource_id]
+                self.manifest.update_tile(tile, status=status)
+                num_done += 1
+                self.num_of_steps += 1
+                if status != "finished":
+                    failed.append(f"{mapset} ({resource_id}: {status})")
+                else:
+                    finished.append(tile)
+            self._set_progress()
+            self._send_resource_update(
+                message=f"{num_done} of {len(tile_jobs)} tile jobs done"
+            )
+            # merge the finished tiles while the other tiles are processed
+            if merge_batch_size > 0 and len(finished) >= merge_batch_size:
+                self._merge_tiles(finished)
+                finished = list()
+        if failed:
+            raise AsyncProcessError(
+                f"The processing of {len(failed)} tiles failed: "
+                f"{', '.join(failed)}. Resume the run with 'resume_run_id': "
+                f"'{self.manifest.run_id}' to process only these tiles."
+            )
+
+    def _get_merge_batch_size(self):
+        """Returns the number of finished tiles which are merged together by
+        the incremental merge. With 0 all tiles are merged at the end.
+        """
+        merge_batch_size = int(self.request_data.get("merge_batch_size", 0))
+        if merge_batch_size < 0:
+            raise AsyncProcessError("'merge_batch_size' must not be negative.")
+        if merge_batch_size > 0 and (self.strds or self.stvds):
+            raise AsyncProcessError(
+                "STRDS and STVDS can not be merged incrementally, "
+                "'merge_batch_size' can only be used for raster and vector "
+                "outputs."
+            )
+        return merge_batch_size
+
+    def _merge_tiles(self, tiles):
+        """Merges the outputs of the tiles incrementally into the mosaics of
+        the target mapset and marks the tiles as merged in the manifest.
+        """
+        if not tiles:
+            return
+        request_data = {
+            key: self.request_data[key]
+            for key in [
+                "outputs", "keep_mapsets", "background_deletion", "workers",
+                "fan_in", "vector_topology", "snap_threshold", "nprocs",
+                "memory", "region",
+            ]
+            if key in self.request_data
+        }
+        request_data["mapsetlist"] = [
+            self.manifest.get_tile(tile)["mapset"] for tile in tiles
+        ]
+        request_data["incremental"] = True
+        request_data["run_id"] = self.manifest.run_id
+        if float(self.request_data.get("overlap", 0)) > 0:
+            request_data["core_regions"] = [
+                f"{tile}_core@{self.target_mapset_name}" for tile in tiles
+            ]
+        rdc_merge = deepcopy(self.rdc)
+        rdc_merge.set_request_data(request_data)
+        merge = AsyncMergeProcessPatch(rdc_merge, self.job_timeout)
+        try:
+            merge._execute()
+        finally:
+            merge._final_cleanup()
+        for tile in tiles:
+            self.manifest.update_tile(tile, merged=True)
+
+    def _init_manifest(self):
+        """Create the grid tiles and the manifest of a new run or load the
+        manifest of the run which should be resumed.
+
+        Returns:
+            (tuple): The tile names and their mapsets
+        """
+        kvdb_server = self.lock_interface.kvdb_server
+        resume_run_id = self.request_data.get("resume_run_id")
+        if resume_run_id is None:
+            self.manifest = TileManifest(
+                kvdb_server, self.user_id, self.resource_id
+            )
+            tiles = self._create_tiles()
+            tile_mapsets = [
+                self._tile_mapset(idx) for idx in range(1, len(tiles) + 1)
+            ]
+            self.manifest.create(self.request_data, tiles, tile_mapsets)
+            return tiles, tile_mapsets
+
+        self.manifest = TileManifest(kvdb_server, self.user_id, resume_run_id)
+        if not self.manifest.exists():
+            raise AsyncProcessError(
+                f"No manifest of the tiled run <{resume_run_id}> found."
+            )
+        if self.manifest.get_state() == "merged":
+            raise AsyncProcessError(
+                f"The tiled run <{resume_run_id}> is already merged and can "
+                "not be resumed."
+            )
+        # the mapsets of the incomplete tiles are deleted by the resume
+        if self._is_run_active(self.manifest):
+            raise AsyncProcessError(
+                f"The tiled run <{resume_run_id}> or one of its tile jobs is "
+                "still running and can not be resumed."
+            )
+        # parameters of the resume request overwrite the original ones
+        request_data = self.manifest.get_request()
+        request_data.update(self.request_data)
+        del request_data["resume_run_id"]
+        self.request_data = request_data
+        self._parse_outputs(self.request_data.get("outputs", list()))
+        self.manifest.set_state("running")
+        # the sweeper checks with the job if the run is still running
+        self.manifest.set_job(self.resource_id)
+        tiles = self.manifest.get_tiles()
+        tile_mapsets = [
+            self.manifest.get_tile(tile)["mapset"] for tile in tiles
+        ]
+        return tiles, tile_mapsets
+
+    def _get_incomplete_tile_jobs(self, tiles, tile_mapsets):
+        """Return the jobs of the tiles which are not finished with the same
+        process chain or whose mapset was deleted. Existing mapsets of these
+        tiles are deleted to recompute them from scratch.
+        """
+        tile_jobs = list()
+        for tile, mapset in zip(tiles, tile_mapsets):
+            process_chain = self._render_tile_process_chain(tile, mapset)
+            pc_hash = process_chain_hash(process_chain)
+            # merged tiles are done, even if their mapset was deleted
+            if self.manifest.get_tile(tile).get("merged") and \
+                    self.manifest.is_complete(tile, pc_hash):
+                continue
+            mapset_exists = os.path.isdir(
+                os.path.join(self.user_project_path, mapset)
+            )
+            if mapset_exists and self.manifest.is_complete(tile, pc_hash):
+                continue
+            if mapset_exists:
+                self._delete_mapset(mapset)
+            tile_jobs.append((tile, mapset, process_chain))
+        return tile_jobs
+
+    def _finalize_manifest(self, state):
+        """Sets the final state of the run and marks its tile mapsets for
+        deletion, so that the sweeper finds the mapsets which are left, e.g.
+        kept or of failed tiles, even after the manifest expired.
+        """
+        self.manifest.set_state(state)
+        MapsetDeletionMarks(
+            self.lock_interface.kvdb_server, self.user_id, self.project_name
+        ).mark(sorted(self.manifest.get_mapsets()))
+
+    def _process_tiles(self, tiles, tile_mapsets):
+        """Runs the jobs of the incomplete tiles and merges their results.
+        Returns the jobs which are run.
+        """
+        tile_jobs = self._get_incomplete_tile_jobs(tiles, tile_mapsets)
+        self.step += len(tile_jobs)
+        self._set_progress()
+        self.request_data.setdefault("keep_mapsets", "false")
+        self._run_tile_jobs(tile_jobs)
+
+        if self._get_merge_batch_size() > 0:
+            # merge the remaining tiles into the mosaics
+            self._merge_tiles([
+                tile for tile in tiles
+                if not self.manifest.get_tile(tile).get("merged")
+            ])
+            # the merge steps are done by the incremental merges
+            self.num_of_steps = self.step
+            self._set_progress()
+        else:
+            # merge the results of all tiles into the target mapset
+            self.mapsetlist = tile_mapsets
+            if float(self.request_data.get("overlap", 0)) > 0:
+                self.core_regions = [
+                    f"{tile}_core@{self.target_mapset_name}" for tile in tiles
+                ]
+            AsyncMergeProcessPatch._execute(self)
+        return tile_jobs
+
+    def _execute(self):
+
+        self._setup()
+        tiles, tile_mapsets = self._init_manifest()
+        try:
+            tile_jobs = self._process_tiles(tiles, tile_mapsets)
+        except Exception:
+            # the run can be resumed, its mapsets are kept until the sweep
+            self._finalize_manifest("failed")
+            raise
+        self._finalize_manifest("merged")
+
+        self.finish_message = (
+            f"Processing successfully finished. Tiled run "
+            f"<{self.manifest.run_id}>: {len(tile_jobs)} of {len(tiles)} "
+            "tiles processed, the other tiles were already finished."
+        )
+        # make response pretty
+        self.module_results = tiles
@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Quadtree Tiling Class
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+from flask import make_response, jsonify, request
+from flask_restful_swagger_2 import swagger
+import os
+import pickle
+from copy import deepcopy
+
+from actinia_processing_lib.exceptions import AsyncProcessError
+from actinia_rest_lib.resource_base import ResourceBase
+from actinia_core.core.common.kvdb_interface import enqueue_job
+
+from actinia_tiling_plugin.apidocs import tiling
+from actinia_tiling_plugin.api.tiling.tiling_grid import (
+    AsyncTilingProcessGrid,
+)
+from actinia_tiling_plugin.core.tiles import (
+    buffered_tiles_to_list,
+    check_tile_mode,
+    compute_quadtree_tiles,
+    quadtree_workload_grid,
+    read_region_file,
+)
+
+
+class AsyncTilingProcessQuadtreeResource(ResourceBase):
+    """Create quadtree tiles balanced by the workload of a reference map.
+    """
+
+    def _execute(self, project_name, mapset_name):
+
+        rdc = self.preprocess(
+            has_json=True,
+            has_xml=False,
+            project_name=project_name,
+            mapset_name=mapset_name,
+        )
+        if rdc:
+            # # for debugging use the following lines instead of enqueue_job
+            # processing = AsyncTilingProcessQuadtree(rdc)
+            # processing.run()
+            enqueue_job(self.job_timeout, start_job, rdc)
+
+        return rdc
+
+    @swagger.doc(tiling.quadtree_tiling_post_docs)
+    def post(self, project_name, mapset_name):
+        """Create quadtree tiles.
+        """
+        req_data = request.get_json(silent=True)
+        if isinstance(req_data, dict):
+            missing = [
+                param for param in ["reference_map", "max_workload"]
+                if param not in req_data
+            ]
+            if missing:
+                return self.get_error_response(
+                    message="The required parameters "
+                    f"{', '.join(repr(param) for param in missing)} are "
+                    "missing."
+                )
+            try:
+                check_tile_mode(req_data.get("mode", "vector"))
+            except ValueError as e:
+                return self.get_error_response(message=str(e))
+        self._execute(project_name, mapset_name)
+        html_code, response_model = pickle.loads(self.response_data)
+        return make_response(jsonify(response_model), html_code)
+
+    @swagger.doc(tiling.quadtree_tiling_get_docs)
+    def get(self, project_name, mapset_name):
+        """Get description of the quadtree tiling process.
+        """
+        process_desc = deepcopy(tiling.quadtree_tiling_post_docs)
+        del process_desc["responses"]
+        process_desc["process_results"] = dict()
+        process_desc["process_results"]["type"] = "array"
+        process_desc["process_results"]["items"] = "string"
+        process_desc["process_results"]["description"] = (
+            "List of the vector or region names of the created quadtree tiles."
+        )
+        return make_response(jsonify(process_desc), 200)
+
+
+def start_job(*args):
+    processing = AsyncTilingProcessQuadtree(*args)
+    processing.run()
+
+
+class AsyncTilingProcessQuadtree(AsyncTilingProcessGrid):
+    """Create quadtree tiles.
+    """
+
+    def _execute(self):
+
+        quadtree_step_num = 2
+        post_step_num = 1
+        self.progress["step"] = quadtree_step_num + post_step_num
+        self.progress["num_of_steps"] = 0
+
+        reference_map = self.request_data["reference_map"]
+        self._add_required_mapset(reference_map)
+        self._execute_preparation()
+
+        region = read_region_file(os.path.join(self.temp_mapset_path, "WIND"))
+        try:
+            grid = quadtree_workload_grid(
+                region, self.request_data.get("max_depth", 8)
+            )
+            workload = self._compute_workload(
+                reference_map,
+                self.request_data.get("reference_type", "raster"),
+                grid,
+            )
+            self.progress["num_of_steps"] += 1
+            tiles, tile_workload = compute_quadtree_tiles(
+                region, grid, workload,
+                float(self.request_data["max_workload"]),
+            )
+            tile_list = buffered_tiles_to_list(
+                region,
+                tiles,
+                self.request_data["tile_prefix"],
+                self.request_data.get("overlap", 0),
+                self.request_data.get("overlap_unit", "map_units"),
+            )
+        except (TypeError, ValueError) as e:
+            raise AsyncProcessError(
+                f"Unable to compute the quadtree tiles: {e}"
+            )
+        self.finish_message = (
+            f"Processing successfully finished. {len(tile_list)} quadtree "
+            f"tiles with a maximum workload of {tile_workload.max():g} and a "
+            f"total workload of {tile_workload.sum():g}."
+        )
+
+        self._write_tiles(tile_list, self.request_data.get("mode", "vector"))
+        self.progress["num_of_steps"] += 1
+        self._execute_finalization()
+        self.progress["num_of_steps"] += 1
+
+        # make response pretty
+        self.module_results = [tile["name"] for tile in tile_list]
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Sweep of orphaned tile mapsets and grids
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+from copy import deepcopy
+from flask import make_response, jsonify
+from flask_restful_swagger_2 import swagger
+from functools import partial
+import os
+import pickle
+import time
+
+from actinia_processing_lib.exceptions import AsyncProcessError
+from actinia_processing_lib.persistent_processing import PersistentProcessing
+from actinia_rest_lib.resource_base import ResourceBase
+from actinia_core.core.common.kvdb_interface import enqueue_job
+
+from actinia_tiling_plugin.apidocs import tiling
+from actinia_tiling_plugin.api.merge.mapset_processing import \
+    MapsetProcessingMixin
+from actinia_tiling_plugin.core.merge_costs import path_size
+from actinia_tiling_plugin.core.sweep import (
+    GRID_PATTERN,
+    newest_mtime,
+    select_orphans,
+    tile_mapset_pattern,
+)
+from actinia_tiling_plugin.resources.config import RUNCONFIG
+from actinia_tiling_plugin.resources.manifest import (
+    MapsetDeletionMarks,
+    TileManifest,
+    VirtualRasterSources,
+)
+from actinia_tiling_plugin.models.response_models.tiling import \
+    SweepResponseModel
+
+
+class AsyncTilingProcessSweepResource(ResourceBase):
+    """Delete orphaned tile mapsets and grids of tiled runs.
+    """
+
+    def _execute(self, project_name, mapset_name):
+
+        rdc = self.preprocess(
+            has_json=True,
+            has_xml=False,
+            project_name=project_name,
+            mapset_name=mapset_name,
+        )
+        if rdc:
+            # # for debugging use the following lines instead of enqueue_job
+            # processing = AsyncTilingProcessSweep(rdc)
+            # processing.run()
+            enqueue_job(self.job_timeout, start_job, rdc)
+
+        return rdc
+
+    @swagger.doc(tiling.sweep_post_docs)
+    def post(self, project_name, mapset_name):
+        """Delete orphaned tile mapsets and grids of tiled runs.
+        """
+        self._execute(project_name, mapset_name)
+        html_code, response_model = pickle.loads(self.response_data)
+        return make_response(jsonify(response_model), html_code)
+
+    @swagger.doc(tiling.sweep_get_docs)
+    def get(self, project_name, mapset_name):
+        """Get description of the sweep of orphaned tile mapsets and grids.
+        """
+        process_desc = deepcopy(tiling.sweep_post_docs)
+        del process_desc["responses"]
+        process_desc["process_results"] = dict()
+        process_desc["process_results"]["type"] = "object"
+        process_desc["process_results"]["description"] = (
+            "The deleted tile 'mapsets' and grid 'vectors', the skipped "
+            "'locked' mapsets and the 'reclaimed_bytes'."
+        )
+        return make_response(jsonify(process_desc), 200)
+
+
+def start_job(*args):
+    processing = AsyncTilingProcessSweep(*args)
+    processing.run()
+
+
+class AsyncTilingProcessSweep(MapsetProcessingMixin, PersistentProcessing):
+    """Delete the tile mapsets of the tiled runs and the mapsets which are
+    marked for deletion by a merge, if they are not used anymore, not locked
+    and not changed within the TTL, and the grids of the mapset which are not
+    changed within the TTL.
+    """
+
+    def __init__(self, rdc):
+        PersistentProcessing.__init__(self, rdc)
+        self._init_progress()
+        self.response_model_class = SweepResponseModel
+        self.locked = list()
+
+    def _get_run_mapsets(self):
+        """Returns the tile mapsets of the runs of the user which are still
+        running and the tile mapsets of the other runs, e.g. of failed runs
+        or left by merged runs.
+        """
+        running, done = set(), set()
+        for manifest in TileManifest.find(
+            self.lock_interface.kvdb_server, self.user_id
+        ):
+            if self._is_run_active(manifest):
+                running.update(manifest.get_mapsets())
+            else:
+                done.update(manifest.get_mapsets())
+        return running, done
+
+    def _get_virtual_sources(self, dry_run):
+        """Returns the mapsets which are read by the virtual rasters of the
+        project. The records of virtual rasters which do not exist anymore
+        are removed.
+        """
+        virtual_sources = VirtualRasterSources(
+            self.lock_interface.kvdb_server, self.user_id, self.project_name
+        )
+        mapsets = set()
+        for (mapset_name, raster), sources in virtual_sources.find().items():
+            vrt_file = os.path.join(
+                self.user_project_path, mapset_name, "cell_misc", raster,
+                "vrt",
+            )
+            if os.path.isfile(vrt_file):
+                mapsets.update(sources)
+            elif not dry_run:
+                virtual_sources.clear(mapset_name, raster)
+        return mapsets
+
+    def _is_locked(self, mapset_name):
+        return bool(self.lock_interface.get(self._generate_mapset_lock_id(
+            self.user_group, self.project_name, mapset_name
+        )))
+
+    def _delete_orphan_mapset(self, mapset_name):
+        """Deletes the mapset without removing its lock, so that a mapset
+        which is locked in the meantime is skipped.
+        """
+        try:
+            self._delete_mapset(mapset_name, unlock=False)
+        except AsyncProcessError:
+            if not self._is_locked(mapset_name):
+                raise
+            with self.progress_lock:
+                self.locked.append(mapset_name)
+        else:
+            self.deletion_marks.unmark(mapset_name)
+        self._add_progress(1)
+
+    def _execute(self):
+
+        self._setup()
+        ttl = float(self.request_data.get("ttl", RUNCONFIG.sweep_ttl))
+        if ttl < 0:
+            raise AsyncProcessError("'ttl' must not be negative.")
+        before = time.time() - ttl
+        dry_run = str(
+            self.request_data.get("dry_run", "false")
+        ).lower() == "true"
+
+        self.deletion_marks = MapsetDeletionMarks(
+            self.lock_interface.kvdb_server, self.user_id, self.project_name,
+        )
+        project_path = self.user_project_path
+        project_mapsets = os.listdir(project_path)
+        running, done = self._get_run_mapsets()
+        referenced = running.union(self._get_virtual_sources(dry_run))
+        # only the mapsets which are registered by a tiled run or marked for
+        # deletion by a merge are deleted, never other mapsets with a similar
+        # name
+        mapsets = select_orphans(
+            [mapset for mapset in project_mapsets if mapset in done],
+            tile_mapset_pattern(self.target_mapset_name),
+            referenced,
+            lambda name: newest_mtime(os.path.join(project_path, name)),
+            before,
+        )
+        # the mapsets which are marked for deletion by a merge, e.g. left by
+        # a cancelled or failed deletion job
+        marked = self.deletion_marks.get_marked()
+        mapsets = sorted(set(mapsets).union(select_orphans(
+            [mapset for mapset in project_mapsets if mapset in marked],
+            None,
+            referenced,
+            lambda name: newest_mtime(os.path.join(project_path, name)),
+            before,
+        )))
+        # locked mapsets are used by a job and are skipped
+        self.locked = [mapset for mapset in mapsets if self._is_locked(mapset)]
+        mapsets = [mapset for mapset in mapsets if mapset not in self.locked]
+        vector_path = os.path.join(
+            project_path, self.target_mapset_name, "vector"
+        )
+        grids = list()
+        if os.path.isdir(vector_path):
+            grids = select_orphans(
+                os.listdir(vector_path),
+                GRID_PATTERN,
+                set(),
+                lambda name: newest_mtime(os.path.join(vector_path, name)),
+                before,
+            )
+        mapset_sizes = {
+            mapset: path_size(os.path.join(project_path, mapset))
+            for mapset in mapsets
+        }
+        grid_bytes = sum(
+            path_size(os.path.join(vector_path, grid)) for grid in grids
+        )
+
+        if not dry_run:
+            pl = self._plan_delete({"vector": grids})
+            self.step = len(mapsets) + len(pl)
+            self._set_progress()
+            if pl:
+                # the grids are removed in the target mapset, which is locked
+                self._execute_preparation()
+                self._execute_and_count(pl)
+                self._execute_finalization()
+            # the marks of mapsets which are already deleted are obsolete
+            for mapset in marked.difference(project_mapsets):
+                self.deletion_marks.unmark(mapset)
+            workers = None
+            if "workers" not in self.request_data:
+                workers = self._get_deletion_workers(len(mapsets))
+            self._run_parallel([
+                partial(self._delete_orphan_mapset, mapset)
+                for mapset in mapsets
+            ], workers)
+            mapsets = [
+                mapset for mapset in mapsets if mapset not in self.locked
+            ]
+            self.finish_message = (
+                f"Processing successfully finished. {len(mapsets)} mapsets "
+                f"and {len(grids)} vectors are deleted, {len(self.locked)} "
+                "locked mapsets are skipped."
+            )
+        else:
+            self.finish_message = (
+                f"Dry run finished. {len(mapsets)} mapsets and {len(grids)} "
+                f"vectors are orphaned, {len(self.locked)} locked mapsets "
+                "are skipped."
+            )
+        # mapsets which are locked in the meantime are not reclaimed
+        reclaimed_bytes = sum(
+            mapset_sizes[mapset] for mapset in mapsets
+        ) + grid_bytes
+        self.module_results = {
+            "mapsets": mapsets,
+            "locked": sorted(self.locked),
+            "vectors": grids,
+            "reclaimed_bytes": reclaimed_bytes,
+            "dry_run": dry_run,
+        }
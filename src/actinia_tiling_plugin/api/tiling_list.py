@@ -42,7 +42,15 @@ class TilingListResource(ResourceBase):
         """Returns a list of all tiling prcesses"""
 
         grid_doc = tiling.grid_tiling_post_docs
-        tiling_docs = [("grid", grid_doc)]
+        quadtree_doc = tiling.quadtree_tiling_post_docs
+        grid_run_doc = tiling.grid_tiling_run_post_docs
+        sweep_doc = tiling.sweep_post_docs
+        tiling_docs = [
+            ("grid", grid_doc),
+            ("grid/run", grid_run_doc),
+            ("quadtree", quadtree_doc),
+            ("sweep", sweep_doc),
+        ]
 
         tiling_processes = list()
         for (t_name, t_doc) in tiling_docs:
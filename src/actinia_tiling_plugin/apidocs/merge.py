@@ -68,22 +68,28 @@ patch_merge_get_docs = {
 patch_merge_post_docs = {
     # "summary" is taken from the description of the get method
     "tags": ["Merge"],
-    "description": "Merge raster, vector and STRDS data from different "
-    "mapsets defined in a 'mapsetlist' by patching them "
+    "description": "Merge raster, vector, STRDS and STVDS data from "
+    "different mapsets defined in a 'mapsetlist' by patching them "
     "in the new/target mapset. Minimum required user role: user.",
     "consumes": ["application/json"],
     "parameters": [
         {
             "name": "mapsetlist",
             "description": "The list of mapset names which should be merged "
-            "into the given mapset.",
+            "into the given mapset. With the 'materialize' method it is only "
+            "used to delete the mapsets of the virtual rasters.",
             "required": True,
             "in": "body",
             "schema": {"type": "string"}
         },
         {
             "name": "outputs",
-            "description": "A list of output parameters.",
+            "description": "A list of output parameters. The new STRDS and "
+            "STVDS contain the maps of all timestamps which are registered in "
+            "any of the mapsets, each map is patched from the mapsets in "
+            "which it is registered. The topology of the vectors of a STVDS "
+            "is built once after patching and all maps of a STRDS or STVDS "
+            "are registered at once.",
             "required": True,
             "in": "body",
             "schema": IOParameterBase
@@ -96,6 +102,167 @@ patch_merge_post_docs = {
             "required": False,
             "in": "body",
             "schema": {"type": "bool"}
+        },
+        {
+            "name": "background_deletion",
+            "description": "A boolean if it is set to 'true' then the merged "
+            "mapsets are marked for deletion and deleted by a separate job, "
+            "several mapsets at the same time, so that the merge finishes as "
+            "soon as the target mapset is final. The resource id of the "
+            "deletion job is given in the message of the response. If no job "
+            "can be enqueued, the merge deletes the mapsets and says so in "
+            "its message. Only used "
+            "if 'keep_mapsets' is not 'true'. The default value is 'false'.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "bool"}
+        },
+        {
+            "name": "core_regions",
+            "description": "A list of saved regions with the core extents of "
+            "the tiles in the same order as the 'mapsetlist', e.g. the "
+            "'<tile>_core' regions created by the grid tiling with an "
+            "'overlap'. If it is set, the rasters of each mapset are cropped "
+            "to the core region of the tile before patching, so that the "
+            "overlapping tile borders are removed.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "array", "items": {"type": "string"}}
+        },
+        {
+            "name": "workers",
+            "description": "The number of maps which are patched at the same "
+            "time. Rasters, vectors and the maps of STRDS and STVDS are "
+            "patched independently of each other. The default is set in the "
+            "plugin configuration and is 1, so the maps are only patched "
+            "concurrently on request.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "fan_in",
+            "description": "The number of mapsets which are patched together "
+            "by the tree reduction merge. Groups of 'fan_in' maps are patched "
+            "into intermediate maps, level by level, until at most 'fan_in' "
+            "maps are left which are patched into the result. The groups of "
+            "each level are patched concurrently. With 0 the maps of all "
+            "mapsets are patched at once. The default is set in the plugin "
+            "configuration.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "method",
+            "description": "The merge method. 'patch' (default) patches the "
+            "maps. 'virtual' builds virtual rasters (r.buildvrt) over the "
+            "rasters of the mapsets without copying any cells, the vectors "
+            "are patched and the mapsets are always kept, because the "
+            "virtual rasters read from them. 'materialize' replaces the "
+            "virtual raster 'outputs' in the given mapset by real rasters, "
+            "the mapsets of the 'mapsetlist' are deleted afterwards if "
+            "'keep_mapsets' is not 'true'.",
+            "required": False,
+            "in": "body",
+            "schema": {
+                "type": "string",
+                "enum": ["patch", "virtual", "materialize"]
+            }
+        },
+        {
+            "name": "incremental",
+            "description": "A boolean if it is set to 'true' then the rasters "
+            "and vectors of the mapsets are patched into the existing maps "
+            "with the same names in the given mapset (the mosaics). The "
+            "merged mapsets are recorded per mosaic and per 'run_id', so that "
+            "mapsets which are already merged into a mosaic by the same run "
+            "are skipped. The record of a mosaic is cleared when the mosaic "
+            "is replaced. Can only be used with the 'patch' method and "
+            "without STRDS and STVDS. The default value is 'false'.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "bool"}
+        },
+        {
+            "name": "run_id",
+            "description": "The id of the run to which the incremental merge "
+            "belongs, e.g. the id of a tiled run. Mapsets which are merged "
+            "into a mosaic by an incremental merge with the same 'run_id' are "
+            "skipped. The default is the resource id of the merge.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string"}
+        },
+        {
+            "name": "vector_topology",
+            "description": "'build' (default) builds the topology by every "
+            "vector patch. 'deferred' patches the vectors without building "
+            "the topology (v.patch -b) and builds the topology once for the "
+            "result (v.build), which is faster for large vectors from many "
+            "mapsets.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string", "enum": ["build", "deferred"]}
+        },
+        {
+            "name": "snap_threshold",
+            "description": "If it is set, the patched vectors are cleaned "
+            "once by snapping vertices within this threshold in map units and "
+            "removing duplicate features (v.clean tool=snap,rmdupl), e.g. "
+            "the duplicates at the tile borders.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "number"}
+        },
+        {
+            "name": "nprocs",
+            "description": "The number of threads of each r.patch (GRASS GIS "
+            "8.3 or newer). By default the CPUs of the worker are divided by "
+            "the number of 'workers'.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "memory",
+            "description": "The memory in MB of each r.patch (GRASS GIS 8.3 "
+            "or newer). By default the memory of the plugin configuration is "
+            "divided by the number of 'workers'.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "region",
+            "description": "The region of the patched rasters. With 'union' "
+            "the region which covers all rasters of all mapsets is computed "
+            "once and used for all rasters, so rasters which only exist in "
+            "some mapsets are patched into the same extent. Any other "
+            "value is the name of a saved region. By default the region is "
+            "computed for each raster separately.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string"}
+        },
+        {
+            "name": "dry_run",
+            "description": "A boolean if it is set to 'true' then the merge "
+            "is only planned and the target mapset is not changed. First all "
+            "rasters, vectors, STRDS and STVDS are checked to exist in all "
+            "mapsets with the requested type and the maps of the STRDS and "
+            "STVDS in the mapsets in which they are registered, the missing "
+            "or type-mismatched inputs are returned as 'problems' in the "
+            "'process_results'. If all inputs exist, the 'process_results' "
+            "contain the resolved 'plan', the number of r.patch, v.patch and "
+            "other 'processes' and the 'costs' estimated from the metadata "
+            "of the maps: the cells, features and bytes of the inputs, the "
+            "expected size of the results and the disk space needed in the "
+            "target mapset. The same check is done before every merge. The "
+            "default value is 'false'.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "bool"}
         }
     ],
     "responses": {
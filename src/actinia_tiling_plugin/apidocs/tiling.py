@@ -25,15 +25,20 @@ __copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
 __maintainer__ = "mundialis GmbH % Co. KG"
 
 
+from copy import deepcopy
+
 from actinia_core.models.response_models import (
     ProcessingErrorResponseModel,
 )
 
+from actinia_tiling_plugin.apidocs.merge import patch_merge_post_docs
+
 from actinia_tiling_plugin.models.response_models.general import (
     SimpleStatusCodeResponseModel,
 )
 from actinia_tiling_plugin.models.response_models.tiling import (
     GridTilingResponseModel,
+    SweepResponseModel,
     TilingListResponseModel,
 )
 
@@ -70,21 +75,30 @@ grid_tiling_post_docs = {
     "description": "Creates grid tiles with a specified 'width' and 'height' "
                    "in the current computational region. The created grids "
                    "have the given 'grid_prefix' and will be listed in the "
-                   "'process_results'. "
+                   "'process_results'. With the 'mode' 'virtual' only the "
+                   "extents of the tiles are computed and returned directly "
+                   "without creating vector maps. Instead of 'width' and "
+                   "'height' the tile size can be derived from a cell budget "
+                   "with 'max_cells_per_tile' or 'memory_budget_mb'. The "
+                   "number of tiles is limited by the plugin configuration. "
                    "Minimum required user role: user.",
     "consumes": ["application/json"],
     "parameters": [
         {
             "name": "width",
-            "description": "The width of one grid tile in map units.",
-            "required": True,
+            "description": "The width of one grid tile in map units. "
+            "Required if neither 'max_cells_per_tile' nor 'memory_budget_mb' "
+            "is set.",
+            "required": False,
             "in": "body",
             "schema": {"type": "string"}
         },
         {
             "name": "height",
-            "description": "The height of one grid tile in map units.",
-            "required": True,
+            "description": "The height of one grid tile in map units. "
+            "Required if neither 'max_cells_per_tile' nor 'memory_budget_mb' "
+            "is set.",
+            "required": False,
             "in": "body",
             "schema": {"type": "string"}
         },
@@ -94,6 +108,79 @@ grid_tiling_post_docs = {
             "required": True,
             "in": "body",
             "schema": {"type": "string"}
+        },
+        {
+            "name": "mode",
+            "description": "The tiling mode: 'vector' (default) creates one "
+            "vector map per tile; 'region' saves one named region per tile, "
+            "which can be used with 'g.region region=<tile>'; 'virtual' "
+            "computes only the tile extents (n, s, e, w) from the region of "
+            "the mapset and returns them directly in the 'process_results' "
+            "without starting a job.",
+            "required": False,
+            "in": "body",
+            "schema": {
+                "type": "string",
+                "enum": ["vector", "region", "virtual"],
+            }
+        },
+        {
+            "name": "overlap",
+            "description": "The overlap which is added to each side of the "
+            "tiles, e.g. for neighborhood operations. The core extent of each "
+            "tile is saved as region '<tile>_core' (or returned as 'core' in "
+            "the 'virtual' mode) and can be used with the 'core_regions' of "
+            "the patch merge to crop the tiles back. Default is 0.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string"}
+        },
+        {
+            "name": "overlap_unit",
+            "description": "The unit of the 'overlap': 'map_units' (default) "
+            "or 'cells' of the current region.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string", "enum": ["map_units", "cells"]}
+        },
+        {
+            "name": "max_cells_per_tile",
+            "description": "The maximum number of raster cells of one tile. "
+            "The tile width and height are derived from the resolution of the "
+            "current region and aligned to its cells, the cells are balanced "
+            "over the tiles. Overrides 'width' and 'height'. The chosen tile "
+            "layout is reported in the message of the response.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "memory_budget_mb",
+            "description": "The memory budget of one tile in MB, converted to "
+            "a maximum number of cells with 8 bytes (DCELL) per cell. If "
+            "'max_cells_per_tile' is also set, the smaller budget is used.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "number"}
+        },
+        {
+            "name": "mask_raster",
+            "description": "A raster map, e.g. 'country@PERMANENT'. Tiles "
+            "without non-null cells of the map are removed and not listed in "
+            "the 'process_results'. Not supported in the 'virtual' mode.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string"}
+        },
+        {
+            "name": "mask_vector",
+            "description": "A vector map, e.g. 'country@PERMANENT'. Tiles "
+            "which do not overlap the map (rasterized with the resolution of "
+            "the current region) are removed and not listed in the "
+            "'process_results'. Not supported in the 'virtual' mode.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string"}
         }
     ],
     "responses": {
@@ -108,3 +195,288 @@ grid_tiling_post_docs = {
         },
     },
 }
+
+quadtree_tiling_get_docs = {
+    # "summary" is taken from the description of the get method
+    "tags": ["Tiling"],
+    "description": "Returns only the API description of the POST endpoint.",
+    "responses": {
+        "200": {
+            "description": "This response returns the API description of the "
+                           "POST endpoint.",
+            "schema": SimpleStatusCodeResponseModel,
+        }
+    },
+}
+
+quadtree_tiling_post_docs = {
+    # "summary" is taken from the description of the get method
+    "tags": ["Tiling"],
+    "description": "Creates quadtree tiles in the current computational "
+                   "region balanced by the workload of a 'reference_map': "
+                   "the region is split recursively into quadrants until the "
+                   "number of non-null raster cells or vector features of "
+                   "each tile is at most 'max_workload'. The created tiles "
+                   "have the given 'tile_prefix' and will be listed in the "
+                   "'process_results' like the tiles of the grid tiling. "
+                   "Minimum required user role: user.",
+    "consumes": ["application/json"],
+    "parameters": [
+        {
+            "name": "reference_map",
+            "description": "The raster or vector map which defines the "
+            "workload, e.g. 'buildings@PERMANENT'.",
+            "required": True,
+            "in": "body",
+            "schema": {"type": "string"}
+        },
+        {
+            "name": "reference_type",
+            "description": "The type of the 'reference_map': 'raster' "
+            "(default), the workload is the number of non-null cells, or "
+            "'vector', the workload is the number of features.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string", "enum": ["raster", "vector"]}
+        },
+        {
+            "name": "max_workload",
+            "description": "The maximum workload of one tile. Tiles which "
+            "cannot be split further can exceed it.",
+            "required": True,
+            "in": "body",
+            "schema": {"type": "number"}
+        },
+        {
+            "name": "max_depth",
+            "description": "The maximum number of recursive splits, which "
+            "limits the smallest tile to 1/2^max_depth of the region in each "
+            "direction. Default is 8.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "tile_prefix",
+            "description": "The prefix of the tiles.",
+            "required": True,
+            "in": "body",
+            "schema": {"type": "string"}
+        },
+        {
+            "name": "mode",
+            "description": "The tiling mode: 'vector' (default) creates one "
+            "vector map per tile; 'region' saves one named region per tile.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string", "enum": ["vector", "region"]}
+        },
+        {
+            "name": "overlap",
+            "description": "The overlap which is added to each side of the "
+            "tiles. The core extent of each tile is saved as region "
+            "'<tile>_core'. Default is 0.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string"}
+        },
+        {
+            "name": "overlap_unit",
+            "description": "The unit of the 'overlap': 'map_units' (default) "
+            "or 'cells' of the current region.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "string", "enum": ["map_units", "cells"]}
+        }
+    ],
+    "responses": {
+        "200": {
+            "description": "This response returns the processing response with"
+                           " the tile names in the 'processing_results'.",
+            "schema": GridTilingResponseModel
+        },
+        "400": {
+            "description": "This response returns a detail error message",
+            "schema": ProcessingErrorResponseModel
+        },
+    },
+}
+
+grid_tiling_run_get_docs = {
+    # "summary" is taken from the description of the get method
+    "tags": ["Tiling"],
+    "description": "Returns only the API description of the POST endpoint.",
+    "responses": {
+        "200": {
+            "description": "This response returns the API description of the "
+                           "POST endpoint.",
+            "schema": SimpleStatusCodeResponseModel,
+        }
+    },
+}
+
+grid_tiling_run_parameters = [
+    deepcopy(param) for param in grid_tiling_post_docs["parameters"]
+]
+for param in grid_tiling_run_parameters:
+    if param["name"] == "mode":
+        param["description"] = (
+            "The tiling mode: 'vector' (default) creates one vector map per "
+            "tile; 'region' saves one named region per tile."
+        )
+        param["schema"]["enum"] = ["vector", "region"]
+grid_tiling_run_parameters.extend([
+    {
+        "name": "process_chain",
+        "description": "The process chain template which is run on every "
+        "tile in its own temporary mapset '<mapset>_<run id>_tmp<N>', like a "
+        "'processing_async' request. The template can use '{{ grid }}' for "
+        "the tile with mapset, e.g. 'g.region vector={{ grid }}', '{{ tile "
+        "}}' for the tile name and '{{ mapset }}' for the temporary mapset. "
+        "Other template expressions are rejected.",
+        "required": True,
+        "in": "body",
+        "schema": {"type": "object"}
+    },
+    {
+        "name": "max_parallel_jobs",
+        "description": "The maximum number of tile jobs which are queued at "
+        "the same time. The default is set in the plugin configuration.",
+        "required": False,
+        "in": "body",
+        "schema": {"type": "integer"}
+    },    {
+        "name": "resume_run_id",
+        "description": "The resource id of an earlier run which should be "
+        "resumed. The tiles and parameters are taken from the tile manifest "
+        "of that run (given parameters overwrite them) and only the tiles "
+        "which are not finished with the same process chain are processed "
+        "again before all tiles are merged. Runs which are merged or whose "
+        "job or tile jobs are still running can not be resumed.",
+        "required": False,
+        "in": "body",
+        "schema": {"type": "string"}
+    },
+    {
+        "name": "merge_batch_size",
+        "description": "If it is set, the outputs of every 'merge_batch_size' "
+        "finished tiles are merged incrementally into the mosaics in the "
+        "target mapset while the other tiles are processed, and the merged "
+        "tiles are recorded in the tile manifest. Only for raster and vector "
+        "outputs. The default 0 merges all tiles when all tile jobs are "
+        "finished.",
+        "required": False,
+        "in": "body",
+        "schema": {"type": "integer"}
+    },
+])
+grid_tiling_run_parameters.extend([
+    deepcopy(param) for param in patch_merge_post_docs["parameters"]
+    if param["name"] in [
+        "outputs", "keep_mapsets", "background_deletion", "workers",
+        "fan_in", "method", "vector_topology", "snap_threshold", "nprocs",
+        "memory", "region",
+    ]
+])
+
+grid_tiling_run_post_docs = {
+    # "summary" is taken from the description of the get method
+    "tags": ["Tiling"],
+    "description": "Creates grid tiles like the grid tiling, runs the "
+                   "'process_chain' template on every tile in its own "
+                   "temporary mapset and merges the 'outputs' of all tiles "
+                   "into the target mapset like the patch merge when all "
+                   "tile jobs are finished. The status of every tile is "
+                   "stored in a tile manifest, so that a failed run can be "
+                   "resumed with 'resume_run_id'. "
+                   "Minimum required user role: user.",
+    "consumes": ["application/json"],
+    "parameters": grid_tiling_run_parameters,
+    "responses": {
+        "200": {
+            "description": "This response returns the processing response with"
+                           " the grid tile names in the 'processing_results'.",
+            "schema": GridTilingResponseModel
+        },
+        "400": {
+            "description": "This response returns a detail error message",
+            "schema": ProcessingErrorResponseModel
+        },
+    },
+}
+
+sweep_get_docs = {
+    # "summary" is taken from the description of the get method
+    "tags": ["Tiling"],
+    "description": "Returns only the API description of the POST endpoint.",
+    "responses": {
+        "200": {
+            "description": "This response returns the API description of the "
+                           "POST endpoint.",
+            "schema": SimpleStatusCodeResponseModel,
+        }
+    },
+}
+
+sweep_post_docs = {
+    # "summary" is taken from the description of the get method
+    "tags": ["Tiling"],
+    "description": "Deletes the orphaned temporary tile mapsets "
+                   "'<mapset>_<run id>_tmp<N>' and grids 'grid_<uuid>' of "
+                   "the mapset, e.g. of failed or cancelled tiled runs. "
+                   "Only mapsets which are registered in the tile manifest "
+                   "of a run which is not running anymore or which are "
+                   "marked for deletion by a finished run or by a merge with "
+                   "'background_deletion' are deleted, other mapsets of the "
+                   "project are never deleted. Mapsets which are read by "
+                   "the virtual rasters of a 'virtual' merge and locked "
+                   "mapsets are skipped. Only mapsets and grids which are "
+                   "not changed within the 'ttl' are deleted, so a failed "
+                   "run can be resumed with all its tiles within the 'ttl'. "
+                   "The bytes which are reclaimed are returned. "
+                   "Minimum required user role: user.",
+    "consumes": ["application/json"],
+    "parameters": [
+        {
+            "name": "ttl",
+            "description": "The number of seconds since the last change "
+            "after which an orphaned tile mapset or grid is deleted. The "
+            "default is set in the plugin configuration.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "workers",
+            "description": "The number of mapsets which are deleted at the "
+            "same time. The default is the 'deletion_workers' of the merge "
+            "in the plugin configuration, with 0 all mapsets are deleted at "
+            "the same time up to the number of CPUs.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "integer"}
+        },
+        {
+            "name": "dry_run",
+            "description": "A boolean if it is set to 'true' then the "
+            "orphaned tile mapsets and grids and the bytes which would be "
+            "reclaimed are only returned and nothing is deleted. The default "
+            "value is 'false'.",
+            "required": False,
+            "in": "body",
+            "schema": {"type": "bool"}
+        },
+    ],
+    "responses": {
+        "200": {
+            "description": "This response returns the processing response with"
+                           " the deleted tile mapsets and grids and the "
+                           "reclaimed bytes in the 'processing_results'.",
+            "schema": SweepResponseModel
+        },
+        "400": {
+            "description": "This response returns a detail error message",
+            "schema": ProcessingErrorResponseModel
+        },
+    },
+}
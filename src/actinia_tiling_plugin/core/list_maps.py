@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Script to list the rasters, vectors, STRDS and STVDS of several mapsets
+
+The script is started by the patch merge inside the GRASS GIS session of the
+actinia job. The rasters and vectors of each mapset are listed by one g.list
+call and the STRDS and STVDS by one query each of the temporal database of
+the mapset. The result is saved as JSON file with the mapsets as keys and the
+values {"raster": [...], "vector": [...], "strds": [...], "stvds": [...]} or
+null if the mapset does not exist.
+
+Usage:
+    python list_maps.py mapsets=<mapset1,mapset2,...> output=<json file>
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import json
+import os
+import sqlite3
+import sys
+
+
+def list_stds(mapset_path, stds_type):
+    """List the STRDS or STVDS in the temporal database (SQLite) of the
+    mapset.
+    """
+    tgis_db = os.path.join(mapset_path, "tgis", "sqlite.db")
+    if not os.path.isfile(tgis_db):
+        return list()
+    connection = sqlite3.connect(tgis_db)
+    try:
+        return [row[0] for row in connection.execute(
+            f"SELECT name FROM {stds_type}_base"
+        )]
+    except sqlite3.OperationalError:
+        # no table of the type, e.g. only other space time datasets
+        return list()
+    finally:
+        connection.close()
+
+
+def list_maps(mapset, mapset_path):
+    """List the rasters, vectors, STRDS and STVDS of the mapset."""
+    import grass.script as grass
+
+    maps = {
+        "raster": list(),
+        "vector": list(),
+        "strds": list_stds(mapset_path, "strds"),
+        "stvds": list_stds(mapset_path, "stvds"),
+    }
+    for line in grass.read_command(
+        "g.list", type="raster,vector", mapset=mapset, flags="t"
+    ).splitlines():
+        if "/" in line:
+            map_type, name = line.strip().split("/", 1)
+            maps[map_type].append(name)
+    return maps
+
+
+def main(args):
+    import grass.script as grass
+
+    options = dict(arg.split("=", 1) for arg in args)
+    env = grass.gisenv()
+    project_path = os.path.join(env["GISDBASE"], env["LOCATION_NAME"])
+    maps = dict()
+    for mapset in options["mapsets"].split(","):
+        mapset_path = os.path.join(project_path, mapset)
+        if os.path.isdir(mapset_path):
+            maps[mapset] = list_maps(mapset, mapset_path)
+        else:
+            maps[mapset] = None
+    with open(options["output"], "w") as f:
+        json.dump(maps, f)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Functions to estimate the costs of a merge from the metadata of the maps
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import os
+
+from actinia_tiling_plugin.core.tiles import read_region_file
+
+
+# elements of a mapset which contain files or directories of a raster map
+RASTER_ELEMENTS = ["cell", "fcell", "cellhd", "cats", "colr", "hist",
+                   "cell_misc"]
+
+
+def path_size(path):
+    """Return the size in bytes of a file or of all files in a directory,
+    0 if the path does not exist.
+    """
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    size = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            size += os.path.getsize(os.path.join(root, file))
+    return size
+
+
+def map_disk_usage(mapset_path, map_type, name):
+    """Return the size in bytes of a raster or vector map in a mapset."""
+    if map_type == "raster":
+        return sum(
+            path_size(os.path.join(mapset_path, element, name))
+            for element in RASTER_ELEMENTS
+        )
+    return path_size(os.path.join(mapset_path, "vector", name))
+
+
+def raster_metadata(mapset_path, name):
+    """Return the region of a raster map read from its header together with
+    its size in bytes.
+    """
+    metadata = read_region_file(os.path.join(mapset_path, "cellhd", name))
+    metadata["bytes"] = map_disk_usage(mapset_path, "raster", name)
+    return metadata
+
+
+def patch_groups(num_inputs, fan_in):
+    """Return the slices of the inputs which are patched into one
+    intermediate map each by the next level of the tree reduction or None,
+    if the inputs are patched into the result at once. With 'fan_in' 0 all
+    inputs are patched at once, e.g. also the existing mosaic of an
+    incremental merge together with the maps of all mapsets.
+    """
+    if fan_in == 0 or num_inputs <= fan_in:
+        return None
+    return [
+        slice(idx, idx + fan_in) for idx in range(0, num_inputs, fan_in)
+    ]
+
+
+def count_patch_levels(num_inputs, fan_in):
+    """Return the number of levels of the tree reduction which patches
+    'num_inputs' maps with at most 'fan_in' maps per patch.
+    """
+    levels = 1
+    groups = patch_groups(num_inputs, fan_in)
+    while groups is not None:
+        groups = patch_groups(len(groups), fan_in)
+        levels += 1
+    return levels
+
+
+def peak_disk_usage(output_bytes, levels):
+    """Return the disk space needed to patch a map of 'output_bytes' by
+    'levels' levels. With more than one level the intermediate maps of one
+    level exist while the next level is written, so about twice the size of
+    the result is needed.
+    """
+    return output_bytes * min(levels, 2)
+
+
+def estimate_raster_costs(metadata, levels, virtual=False):
+    """Estimate the costs of patching rasters.
+
+    Args:
+        metadata (list): The metadata of the inputs from raster_metadata
+        levels (int): The number of levels of the tree reduction
+        virtual (bool): If a virtual raster is built, which does not copy the
+                        cells of the inputs
+
+    Returns:
+        (dict): The cells and bytes of the inputs and the estimated cells and
+                bytes of the result and the disk space needed to create it
+    """
+    input_cells = sum(meta["rows"] * meta["cols"] for meta in metadata)
+    input_bytes = sum(meta["bytes"] for meta in metadata)
+    # the result covers all inputs with the resolution of the first input
+    nsres = metadata[0]["nsres"]
+    ewres = metadata[0]["ewres"]
+    north = max(meta["n"] for meta in metadata)
+    south = min(meta["s"] for meta in metadata)
+    east = max(meta["e"] for meta in metadata)
+    west = min(meta["w"] for meta in metadata)
+    output_cells = round((north - south) / nsres) * round(
+        (east - west) / ewres)
+    if virtual:
+        output_bytes = 0
+    elif input_cells:
+        # overlapping inputs are only written once
+        output_bytes = round(input_bytes * min(output_cells / input_cells, 1))
+    else:
+        output_bytes = input_bytes
+    return {
+        "input_cells": input_cells,
+        "input_bytes": input_bytes,
+        "output_cells": output_cells,
+        "output_bytes": output_bytes,
+        "disk_bytes": peak_disk_usage(output_bytes, levels),
+    }
+
+
+def estimate_vector_costs(metadata, levels):
+    """Estimate the costs of patching vectors.
+
+    Args:
+        metadata (list): The metadata of the inputs as dicts with the number
+                         of 'features' and the 'bytes'
+        levels (int): The number of levels of the tree reduction
+
+    Returns:
+        (dict): The features and bytes of the inputs and the estimated
+                features and bytes of the result and the disk space needed
+                to create it
+    """
+    input_features = sum(meta["features"] for meta in metadata)
+    input_bytes = sum(meta["bytes"] for meta in metadata)
+    return {
+        "input_features": input_features,
+        "input_bytes": input_bytes,
+        "output_features": input_features,
+        "output_bytes": input_bytes,
+        "disk_bytes": peak_disk_usage(input_bytes, levels),
+    }
+
+
+def sum_merge_costs(raster_costs, vector_costs):
+    """Return the total costs of a merge from the costs of each map."""
+    costs = list(raster_costs.values()) + list(vector_costs.values())
+    return {
+        "input_cells": sum(
+            cost["input_cells"] for cost in raster_costs.values()),
+        "input_features": sum(
+            cost["input_features"] for cost in vector_costs.values()),
+        "input_bytes": sum(cost["input_bytes"] for cost in costs),
+        "output_bytes": sum(cost["output_bytes"] for cost in costs),
+        "disk_bytes": sum(cost["disk_bytes"] for cost in costs),
+    }
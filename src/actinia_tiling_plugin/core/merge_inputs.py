@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Functions to check the inputs of a merge
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+def check_merge_inputs(maps, mapsets, requested):
+    """Check that all requested maps exist in all mapsets with the requested
+    type.
+
+    Args:
+        maps (dict): The listing of each mapset as dict with the map types as
+                     keys and lists of map names as values, or None if the
+                     mapset does not exist
+        mapsets (list): The mapsets of the merge
+        requested (dict): The map types ('raster', 'vector', 'strds') as keys
+                          and lists of the requested map names as values
+
+    Returns:
+        (list): Messages of the missing or type-mismatched inputs, which is
+                empty if all inputs exist
+    """
+    problems = list()
+    for mapset in mapsets:
+        listing = maps.get(mapset)
+        if listing is None:
+            problems.append(f"mapset <{mapset}> does not exist")
+            continue
+        available = {
+            map_type: set(names) for map_type, names in listing.items()
+        }
+        for map_type, names in requested.items():
+            for name in names:
+                if name in available.get(map_type, set()):
+                    continue
+                other_types = sorted(
+                    other for other, other_names in available.items()
+                    if name in other_names
+                )
+                if other_types:
+                    problems.append(
+                        f"<{name}@{mapset}> is a {' and '.join(other_types)} "
+                        f"and not a {map_type}"
+                    )
+                else:
+                    problems.append(f"{map_type} <{name}@{mapset}> is missing")
+    return problems
+
+
+def check_stds_members(maps, member_mapsets):
+    """Check that the registered maps of the STRDS and STVDS exist in the
+    mapsets in which they are registered.
+
+    Args:
+        maps (dict): The listing of each mapset as for check_merge_inputs
+        member_mapsets (dict): The map types ('raster', 'vector') as keys and
+                               dicts with the map names as keys and the lists
+                               of the mapsets in which they are registered as
+                               values
+
+    Returns:
+        (list): Messages of the missing maps
+    """
+    stds_types = {"raster": "STRDS", "vector": "STVDS"}
+    problems = list()
+    for map_type, members in member_mapsets.items():
+        available = {
+            mapset: set(listing[map_type])
+            for mapset, listing in maps.items() if listing is not None
+        }
+        for name, mapsets in members.items():
+            for mapset in mapsets:
+                if name not in available.get(mapset, set()):
+                    problems.append(
+                        f"{map_type} <{name}@{mapset}> of the "
+                        f"{stds_types[map_type]} is missing"
+                    )
+    return problems
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Script to patch raster maps without changing the region of the mapset
+
+The script is started by the patch merge inside the GRASS GIS session of the
+actinia job. The region of each module is passed by GRASS_REGION, so that
+several rasters can be patched at the same time in the same mapset. If core
+regions are given, each input is cropped to its core region before patching,
+inputs with an empty core region are not cropped.
+With materialize a virtual raster, e.g. created by the virtual merge, is
+read from its mapset and written as real raster with the same name into the
+current mapset. The job removes the virtual raster marker of the mapset.
+
+The number of threads and the memory in MB of r.patch can be set by nprocs
+and memory (GRASS GIS 8.3 or newer). With region the rasters are patched in
+the saved region instead of the region which covers all inputs.
+
+Usage:
+    python patch_raster.py input=<raster1,raster2,...> output=<raster> \
+        [core_regions=<region1,region2,...>] [nprocs=<n>] [memory=<MB>] \
+        [region=<saved region>]
+    python patch_raster.py materialize=<raster@mapset>
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import os
+import sys
+from uuid import uuid4
+
+
+def region_env(**kwargs):
+    """Return a copy of the environment with the region given by the g.region
+    parameters, e.g. raster=<list of rasters> or region=<saved region>.
+    """
+    import grass.script as grass
+
+    env = os.environ.copy()
+    env["GRASS_REGION"] = grass.region_env(**kwargs)
+    return env
+
+
+def crop_rasters(rasters, core_regions):
+    """Crop each raster to its core region. The region is aligned to the
+    raster, so that only the extent changes and the raster is not resampled
+    to the resolution of the saved core region. Rasters with an empty core
+    region are not cropped. Returns the rasters to patch and the cropped
+    rasters.
+    """
+    import grass.script as grass
+
+    patch_inputs = list()
+    cropped = list()
+    for raster, core_region in zip(rasters, core_regions):
+        if not core_region:
+            patch_inputs.append(raster)
+            continue
+        name = f"{raster.split('@')[0]}_core_{uuid4().hex}"
+        grass.run_command(
+            "r.mapcalc", expression=f"{name} = {raster}", quiet=True,
+            env=region_env(region=core_region, align=raster),
+        )
+        patch_inputs.append(name)
+        cropped.append(name)
+    return patch_inputs, cropped
+
+
+def patch_rasters(rasters, output, nprocs=None, memory=None, region=None):
+    """Patch the rasters in the saved region or, if it is not given, in the
+    region which covers all of them.
+    """
+    import grass.script as grass
+
+    if region:
+        env = region_env(region=region)
+    else:
+        env = region_env(raster=",".join(rasters))
+    kwargs = dict()
+    if nprocs:
+        kwargs["nprocs"] = nprocs
+    if memory:
+        kwargs["memory"] = memory
+    grass.run_command(
+        "r.patch", input=",".join(rasters), output=output, quiet=True,
+        env=env, **kwargs,
+    )
+
+
+def materialize_raster(raster):
+    """Write the virtual raster, given with its mapset, as real raster with
+    the same name, the same color table and the same timestamp into the
+    current mapset.
+    """
+    import grass.script as grass
+
+    name = raster.split("@")[0]
+    grass.run_command(
+        "r.mapcalc", expression=f"{name} = {raster}", quiet=True,
+        env=region_env(raster=raster),
+    )
+    grass.run_command("r.colors", map=name, raster=raster, quiet=True)
+    timestamp = grass.read_command("r.timestamp", map=raster).strip()
+    if timestamp and timestamp != "none":
+        grass.run_command("r.timestamp", map=name, date=timestamp)
+
+
+def main(args):
+    import grass.script as grass
+
+    options = dict(arg.split("=", 1) for arg in args)
+    if options.get("materialize"):
+        materialize_raster(options["materialize"])
+        return
+    rasters = options["input"].split(",")
+    if options.get("core_regions"):
+        core_regions = options["core_regions"].split(",")
+        if len(core_regions) != len(rasters):
+            grass.fatal("The number of core regions and inputs differ.")
+        patch_inputs, cropped = crop_rasters(rasters, core_regions)
+        try:
+            patch_rasters(
+                patch_inputs, options["output"], options.get("nprocs"),
+                options.get("memory"), options.get("region"),
+            )
+        finally:
+            if cropped:
+                grass.run_command(
+                    "g.remove", type="raster", name=",".join(cropped),
+                    flags="f", quiet=True,
+                )
+    else:
+        patch_rasters(
+            rasters, options["output"], options.get("nprocs"),
+            options.get("memory"), options.get("region"),
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
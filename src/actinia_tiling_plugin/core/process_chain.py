@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Substitution of the tile variables in the process chain template of tiled runs
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import json
+import re
+
+
+# the variables which can be used in the process chain template
+TEMPLATE_VARIABLES = ["grid", "tile", "mapset"]
+# all jinja2 expressions, statements and comments
+TEMPLATE_EXPRESSION = re.compile(r"\{\{.*?\}\}|\{%.*?%\}|\{#.*?#\}", re.S)
+TEMPLATE_VARIABLE = re.compile(
+    r"^\{\{\s*(" + "|".join(TEMPLATE_VARIABLES) + r")\s*\}\}$"
+)
+
+
+def unsupported_expressions(template):
+    """Return the template expressions which are not one of the tile
+    variables, e.g. '{{ grid }}'.
+
+    Args:
+        template (str): The process chain template as JSON string
+
+    Returns:
+        (list): The unsupported expressions
+    """
+    return [
+        expression for expression in TEMPLATE_EXPRESSION.findall(template)
+        if not TEMPLATE_VARIABLE.match(expression)
+    ]
+
+
+def render_tile_template(template, values):
+    """Substitute the tile variables in the process chain template. The
+    template is not rendered by jinja2, so that no code of the template is
+    executed.
+
+    Args:
+        template (str): The process chain template as JSON string
+        values (dict): The values of the tile variables
+
+    Returns:
+        (str): The process chain as JSON string
+    """
+    unsupported = unsupported_expressions(template)
+    if unsupported:
+        raise ValueError(
+            "Only the variables "
+            f"{', '.join('{{ ' + var + ' }}' for var in TEMPLATE_VARIABLES)} "
+            f"can be used in the process chain template, not "
+            f"{', '.join(unsupported)}."
+        )
+
+    def substitute(match):
+        variable = TEMPLATE_VARIABLE.match(match.group(0)).group(1)
+        # the values are escaped for the JSON string they are placed in
+        return json.dumps(str(values[variable]))[1:-1]
+
+    return TEMPLATE_EXPRESSION.sub(substitute, template)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Script to list the registered maps of STRDS and STVDS in several mapsets
+
+The script is started by the patch merge inside the GRASS GIS session of the
+actinia job. The temporal framework is initialized once and the registered
+maps of each space time dataset in each mapset are read, so that not one
+t.rast.list or t.vect.list per mapset has to be started. The result is saved
+as JSON file with the types 'strds' and 'stvds' as keys and dicts with the
+space time datasets as keys and the values
+{"info": {"temporaltype": ..., "semantictype": ..., "title": ...,
+          "description": ...},
+ "maps": {<mapset>: {"name": [...], "start_time": [...],
+                     "end_time": [<end time or null>, ...]}}}
+as values, where the info is read from the first mapset. The maps of each
+mapset are stored in columns, so that they can be read without parsing
+every row.
+
+Usage:
+    python stds_maps.py [strds=<strds1,strds2,...>] \
+        [stvds=<stvds1,stvds2,...>] mapsets=<mapset1,mapset2,...> \
+        output=<json file>
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import json
+import sys
+
+
+def format_time(value):
+    """Return the time as written by t.rast.list, None if it is not set."""
+    if value is None:
+        return None
+    return str(value)
+
+
+def stds_info(stds):
+    """Return the information to create a copy of the space time dataset."""
+    return {
+        "temporaltype": stds.get_temporal_type(),
+        "semantictype": stds.get_semantic_type(),
+        "title": stds.metadata.get_title(),
+        "description": stds.metadata.get_description(),
+    }
+
+
+def stds_maps(stds, dbif):
+    """Return the columns name, start and end time of the registered maps
+    sorted by the start time.
+    """
+    rows = stds.get_registered_maps(
+        columns="name,start_time,end_time", order="start_time", dbif=dbif
+    ) or list()
+    return {
+        "name": [row["name"] for row in rows],
+        "start_time": [format_time(row["start_time"]) for row in rows],
+        "end_time": [format_time(row["end_time"]) for row in rows],
+    }
+
+
+def main(args):
+    import grass.temporal as tgis
+
+    options = dict(arg.split("=", 1) for arg in args)
+    tgis.init()
+    dbif = tgis.SQLDatabaseInterfaceConnection()
+    dbif.connect()
+    result = {"strds": dict(), "stvds": dict()}
+    try:
+        for stds_type in result:
+            if not options.get(stds_type):
+                continue
+            for name in options[stds_type].split(","):
+                result[stds_type][name] = {"info": None, "maps": dict()}
+                for mapset in options["mapsets"].split(","):
+                    stds = tgis.open_old_stds(
+                        f"{name}@{mapset}", stds_type, dbif
+                    )
+                    if result[stds_type][name]["info"] is None:
+                        result[stds_type][name]["info"] = stds_info(stds)
+                    result[stds_type][name]["maps"][mapset] = stds_maps(
+                        stds, dbif
+                    )
+    finally:
+        dbif.close()
+    with open(options["output"], "w") as f:
+        json.dump(result, f)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
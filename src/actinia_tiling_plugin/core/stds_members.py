@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Functions for the registered maps of space time datasets of several mapsets
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+# columns of the registered maps, which are needed to register them again
+MEMBER_COLUMNS = ["name", "start_time", "end_time"]
+
+
+class StdsMembers(object):
+    """Registered maps of a space time dataset in several mapsets, stored in
+    columns (one list per column) with an index of the map names, so that
+    adding and looking up a map does not scan the maps already added.
+    Maps which are only registered in some mapsets are kept and only patched
+    from these mapsets.
+    """
+
+    def __init__(self):
+        self.columns = {column: list() for column in MEMBER_COLUMNS}
+        # the row of each map name and the mapsets of each row
+        self.index = dict()
+        self.mapsets = list()
+
+    def __len__(self):
+        return len(self.mapsets)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def add(self, mapset, columns):
+        """Add the registered maps of a mapset.
+
+        Args:
+            mapset (str): The mapset of the maps
+            columns (dict): The lists of the name, start time and end time of
+                            the maps with the column names as keys
+        """
+        for row in zip(*(columns[column] for column in MEMBER_COLUMNS)):
+            idx = self.index.get(row[0])
+            if idx is None:
+                self.index[row[0]] = len(self.mapsets)
+                self.mapsets.append([mapset])
+                for column, value in zip(MEMBER_COLUMNS, row):
+                    self.columns[column].append(value)
+            else:
+                self.mapsets[idx].append(mapset)
+
+    @classmethod
+    def from_mapsets(cls, columns_per_mapset):
+        """Create the union of the registered maps of several mapsets, given
+        as dict with the mapsets as keys and the columns as values.
+        """
+        members = cls()
+        for mapset, columns in columns_per_mapset.items():
+            members.add(mapset, columns)
+        return members
+
+    def names(self):
+        return self.columns["name"]
+
+    def mapsets_of(self, name):
+        """Return the mapsets in which the map is registered."""
+        return self.mapsets[self.index[name]]
+
+    def registration_lines(self):
+        """Return the lines of a t.register file, the end time is left out
+        if it is not set.
+        """
+        return [
+            f"{name}|{start}|{end}" if end is not None else f"{name}|{start}"
+            for name, start, end in zip(
+                *(self.columns[column] for column in MEMBER_COLUMNS)
+            )
+        ]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Functions to find orphaned temporary mapsets and grids of tiled runs
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import os
+import re
+
+
+# the temporary grids of the grid tiling, grid_<uuid4().hex>
+GRID_PATTERN = re.compile(r"^grid_[0-9a-f]{32}$")
+
+
+def tile_mapset_pattern(mapset_name):
+    """Return the pattern of the temporary tile mapsets
+    '<mapset>_<run id>_tmp<N>' of the tiled runs of a mapset.
+    """
+    return re.compile(rf"^{re.escape(mapset_name)}_[0-9a-f]{{32}}_tmp[0-9]+$")
+
+
+def newest_mtime(path):
+    """Return the newest modification time of the directory and the entries
+    directly in it, e.g. of a mapset and its elements.
+    """
+    mtime = os.path.getmtime(path)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            mtime = max(mtime, entry.stat(follow_symlinks=False).st_mtime)
+    return mtime
+
+
+def select_orphans(names, pattern, referenced, mtime, before):
+    """Select the names which match the pattern, which are not referenced and
+    which are not modified since 'before'.
+
+    Args:
+        names (list): The names of the mapsets or maps
+        pattern (re.Pattern): The pattern of the temporary names, with None
+                              all names are selected
+        referenced (set): The names which are still referenced, e.g. by a
+                          tile manifest
+        mtime (function): Returns the modification time of a name
+        before (float): The timestamp before which the orphans have been
+                        modified the last time
+
+    Returns:
+        (list): The sorted names of the orphans
+    """
+    return sorted(
+        name for name in names
+        if (pattern is None or pattern.match(name))
+        and name not in referenced
+        and mtime(name) < before
+    )
@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Functions to compute tile extents
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import math
+import os
+
+import numpy as np
+
+
+# bytes per cell (DCELL) to convert a memory budget into a number of cells
+BYTES_PER_CELL = 8
+
+# keys of a GRASS GIS region (WIND) file and their names in the region dict
+REGION_KEYS = {
+    "north": "n",
+    "south": "s",
+    "east": "e",
+    "west": "w",
+    "n-s resol": "nsres",
+    "e-w resol": "ewres",
+    "rows": "rows",
+    "cols": "cols",
+}
+
+# tiling modes of the tiling endpoints, the grid endpoint supports 'virtual'
+# in addition
+TILE_MODES = ["vector", "region"]
+
+
+def parse_coordinate(value):
+    """Parse a coordinate or resolution of a region file, which can be given
+    as a float or for latitude-longitude projects as DMS, e.g. 35:41:08.4N.
+    """
+    value = value.strip()
+    sign = 1.
+    if value[-1] in "NSEW":
+        if value[-1] in "SW":
+            sign = -1.
+        value = value[:-1]
+    degree = 0.
+    for idx, part in enumerate(value.split(":")):
+        degree += float(part) / 60 ** idx
+    return sign * degree
+
+
+def read_region_file(region_file):
+    """Read a GRASS GIS region (WIND) file into a dict with the keys n, s,
+    e, w, nsres, ewres, rows and cols.
+    """
+    region = dict()
+    with open(region_file, "r") as f:
+        for line in f:
+            if ":" not in line:
+                continue
+            key, value = line.split(":", 1)
+            key = key.strip()
+            if key in ["rows", "cols"]:
+                region[REGION_KEYS[key]] = int(value)
+            elif key in REGION_KEYS:
+                region[REGION_KEYS[key]] = parse_coordinate(value)
+    return region
+
+
+def find_region_file(grass_data_base, grass_user_data_base, user_group,
+                     project_name, mapset_name):
+    """Return the path of the region file of a mapset. If the mapset does
+    not exist yet, the default region of the project is used, which is the
+    region a new mapset starts with. Returns None if nothing is found.
+    """
+    for name in [project_name, mapset_name]:
+        if name.startswith(".") or os.sep in name:
+            return None
+    project_paths = [
+        os.path.join(grass_user_data_base, user_group, project_name),
+        os.path.join(grass_data_base, project_name),
+    ]
+    region_files = [
+        os.path.join(project_path, mapset_name, "WIND")
+        for project_path in project_paths
+    ]
+    region_files.extend([
+        os.path.join(project_path, "PERMANENT", "DEFAULT_WIND")
+        for project_path in project_paths
+    ])
+    for region_file in region_files:
+        if os.path.isfile(region_file):
+            return region_file
+    return None
+
+
+def _balanced_cells(num_cells, max_cells):
+    """Return the number of tiles and the number of cells per tile to split
+    num_cells into tiles of at most max_cells with balanced tile sizes.
+    """
+    num_tiles = math.ceil(num_cells / max_cells)
+    return num_tiles, math.ceil(num_cells / num_tiles)
+
+
+def check_num_tiles(num_cols, num_rows, max_tiles=None):
+    """Raise a ValueError if the number of tiles exceeds max_tiles."""
+    if max_tiles is not None and num_cols * num_rows > max_tiles:
+        raise ValueError(
+            f"The {num_cols} x {num_rows} tiles exceed the maximum number of "
+            f"{max_tiles} tiles. Increase the tile size."
+        )
+
+
+def check_tile_mode(mode, modes=TILE_MODES):
+    """Raise a ValueError if the tiling mode is not one of the modes."""
+    if mode not in modes:
+        raise ValueError(
+            f"The tiling mode '{mode}' is not supported. Use one of "
+            f"{', '.join(repr(m) for m in modes)}."
+        )
+
+
+def compute_tile_layout(region, width=None, height=None,
+                        max_cells_per_tile=None, memory_budget_mb=None,
+                        max_tiles=None):
+    """Compute the tile size and the number of tiles.
+
+    The tile size is either given by the width and height in map units or
+    derived from a cell budget ('max_cells_per_tile' and/or
+    'memory_budget_mb', the smaller one is used). Derived tiles consist of
+    whole cells of the region, so the tile edges are aligned to the raster
+    grid, and the cells are balanced over the tiles to avoid small remainder
+    tiles.
+
+    Returns:
+        (dict): width and height in map units, num_cols and num_rows of the
+                tiles and for derived tiles cols and rows of cells per tile
+    """
+    budgets = list()
+    if max_cells_per_tile:
+        budgets.append(int(max_cells_per_tile))
+    if memory_budget_mb:
+        budgets.append(
+            int(float(memory_budget_mb) * 1024 ** 2 / BYTES_PER_CELL)
+        )
+    layout = dict()
+    if budgets:
+        budget = min(budgets)
+        if budget < 1:
+            raise ValueError("The cell budget of a tile must be positive.")
+        # start with square tiles in the shorter direction of the region and
+        # use the rest of the budget in the other direction
+        side = math.isqrt(budget)
+        if region["rows"] <= region["cols"]:
+            num_rows, rows = _balanced_cells(region["rows"], side)
+            num_cols, cols = _balanced_cells(region["cols"], budget // rows)
+        else:
+            num_cols, cols = _balanced_cells(region["cols"], side)
+            num_rows, rows = _balanced_cells(region["rows"], budget // cols)
+        layout["cols"] = cols
+        layout["rows"] = rows
+        layout["width"] = cols * region["ewres"]
+        layout["height"] = rows * region["nsres"]
+    elif width is not None and height is not None:
+        layout["width"] = float(width)
+        layout["height"] = float(height)
+        if layout["width"] <= 0 or layout["height"] <= 0:
+            raise ValueError("The tile width and height have to be positive.")
+    else:
+        raise ValueError(
+            "Either 'width' and 'height' or 'max_cells_per_tile' and/or "
+            "'memory_budget_mb' have to be set."
+        )
+    layout["num_cols"] = max(1, math.ceil(
+        round((region["e"] - region["w"]) / layout["width"], 9)
+    ))
+    layout["num_rows"] = max(1, math.ceil(
+        round((region["n"] - region["s"]) / layout["height"], 9)
+    ))
+    check_num_tiles(layout["num_cols"], layout["num_rows"], max_tiles)
+    return layout
+
+
+def format_tile_layout(layout):
+    """Return a short description of the tile layout."""
+    text = (
+        f"Tile layout: {layout['num_cols']} x {layout['num_rows']} tiles "
+        f"with a width of {layout['width']} and a height of "
+        f"{layout['height']} map units"
+    )
+    if "cols" in layout:
+        text += f" ({layout['cols']} x {layout['rows']} cells per tile)"
+    return text + "."
+
+
+def compute_grid_tiles(region, width, height, max_tiles=None):
+    """Compute the extents of grid tiles with the given width and height in
+    map units covering the region.
+
+    The tiles are laid out like v.mkgrid does: starting in the south-west
+    corner of the region row by row, so the last row and column can exceed
+    the region.
+
+    Returns:
+        (dict): numpy arrays with the n, s, e, w coordinates of the tiles
+    """
+    width = float(width)
+    height = float(height)
+    if width <= 0 or height <= 0:
+        raise ValueError("The tile width and height have to be positive.")
+    # small tolerance against floating point noise of the region file
+    num_cols = max(
+        1, math.ceil(round((region["e"] - region["w"]) / width, 9))
+    )
+    num_rows = max(
+        1, math.ceil(round((region["n"] - region["s"]) / height, 9))
+    )
+    check_num_tiles(num_cols, num_rows, max_tiles)
+    cols = np.tile(np.arange(num_cols), num_rows)
+    rows = np.repeat(np.arange(num_rows), num_cols)
+    tiles = dict()
+    tiles["w"] = region["w"] + cols * width
+    tiles["e"] = tiles["w"] + width
+    tiles["s"] = region["s"] + rows * height
+    tiles["n"] = tiles["s"] + height
+    return tiles
+
+
+def overlap_in_map_units(region, overlap, overlap_unit="map_units"):
+    """Return the overlap in east-west and north-south direction in map
+    units. With the unit 'cells' the overlap is given in number of cells of
+    the region.
+    """
+    overlap = float(overlap)
+    if overlap < 0:
+        raise ValueError("The overlap must not be negative.")
+    if overlap_unit == "cells":
+        return overlap * region["ewres"], overlap * region["nsres"]
+    elif overlap_unit == "map_units":
+        return overlap, overlap
+    raise ValueError(f"Overlap unit <{overlap_unit}> is not supported.")
+
+
+def add_overlap(tiles, overlap_ew, overlap_ns):
+    """Buffer the tiles by the overlap and keep the original extents as
+    core extents (core_n, core_s, core_e, core_w).
+    """
+    buffered = dict()
+    for key in ["n", "s", "e", "w"]:
+        buffered[f"core_{key}"] = tiles[key]
+    buffered["n"] = tiles["n"] + overlap_ns
+    buffered["s"] = tiles["s"] - overlap_ns
+    buffered["e"] = tiles["e"] + overlap_ew
+    buffered["w"] = tiles["w"] - overlap_ew
+    return buffered
+
+
+def tile_names(num_tiles, prefix):
+    """Return the tile names with the zero padded category as suffix."""
+    text = "{:0%s}" % len(str(num_tiles))
+    return [f"{prefix}{text.format(cat)}" for cat in range(1, num_tiles + 1)]
+
+
+def tiles_to_list(tiles, prefix):
+    """Convert the tile extents into a list of dicts with the tile name and
+    the n, s, e, w coordinates. Tiles with an overlap get the core extent
+    as dict in 'core'.
+    """
+    names = tile_names(len(tiles["n"]), prefix)
+    tile_list = [
+        {"name": name, "n": n, "s": s, "e": e, "w": w}
+        for name, n, s, e, w in zip(
+            names, tiles["n"].tolist(), tiles["s"].tolist(),
+            tiles["e"].tolist(), tiles["w"].tolist(),
+        )
+    ]
+    if "core_n" in tiles:
+        for tile, n, s, e, w in zip(
+            tile_list, tiles["core_n"].tolist(), tiles["core_s"].tolist(),
+            tiles["core_e"].tolist(), tiles["core_w"].tolist(),
+        ):
+            tile["core"] = {"n": n, "s": s, "e": e, "w": w}
+    return tile_list
+
+
+def grid_tiles_extent(region, layout):
+    """Return the extent and the number of rows and columns of the grid
+    tiles of the tile layout, which can exceed the region in the north and
+    east.
+    """
+    return {
+        "n": region["s"] + layout["num_rows"] * layout["height"],
+        "s": region["s"],
+        "e": region["w"] + layout["num_cols"] * layout["width"],
+        "w": region["w"],
+        "rows": layout["num_rows"],
+        "cols": layout["num_cols"],
+    }
+
+
+def prune_tiles(tile_list, coverage):
+    """Remove the grid tiles without coverage, e.g. without data in a mask.
+
+    Args:
+        tile_list (list): The grid tiles ordered like compute_grid_tiles
+        coverage (numpy.ndarray): The number of covered cells per tile on the
+                                  tile grid with the northern row first
+
+    Returns:
+        (list): The covered tiles
+    """
+    covered = np.flipud(np.asarray(coverage)).ravel() > 0
+    if len(covered) != len(tile_list):
+        raise ValueError("The coverage does not match the grid tiles.")
+    return [tile for tile, keep in zip(tile_list, covered) if keep]
+
+
+def buffered_tiles_to_list(region, tiles, prefix, overlap=0,
+                           overlap_unit="map_units"):
+    """Convert the tile extents into a list of tiles. If an overlap is
+    given, the tiles are buffered by it and get their core extent.
+    """
+    overlap_ew, overlap_ns = overlap_in_map_units(
+        region, overlap, overlap_unit
+    )
+    if overlap_ew > 0 or overlap_ns > 0:
+        tiles = add_overlap(tiles, overlap_ew, overlap_ns)
+    return tiles_to_list(tiles, prefix)
+
+
+def compute_grid_tile_list(region, width, height, prefix, overlap=0,
+                           overlap_unit="map_units", max_tiles=None):
+    """Compute the list of grid tiles covering the region. If an overlap is
+    given, the tiles are buffered by it and get their core extent.
+    """
+    tiles = compute_grid_tiles(region, width, height, max_tiles)
+    return buffered_tiles_to_list(region, tiles, prefix, overlap, overlap_unit)
+
+
+def quadtree_workload_grid(region, max_depth):
+    """Compute the grid on which the workload of the quadtree tiling is
+    measured. The grid is fine enough for 'max_depth' splits of the region
+    and consists of whole cells of the region, so the tile edges are aligned
+    to the raster grid. The last row and column can exceed the region.
+
+    Returns:
+        (dict): n, s, e, w, rows, cols, nsres and ewres of the grid
+    """
+    max_depth = int(max_depth)
+    if max_depth < 0:
+        raise ValueError("The maximum depth must not be negative.")
+    splits = 2 ** max_depth
+    cells_ns = max(1, math.ceil(region["rows"] / splits))
+    cells_ew = max(1, math.ceil(region["cols"] / splits))
+    grid = dict()
+    grid["rows"] = math.ceil(region["rows"] / cells_ns)
+    grid["cols"] = math.ceil(region["cols"] / cells_ew)
+    grid["nsres"] = cells_ns * region["nsres"]
+    grid["ewres"] = cells_ew * region["ewres"]
+    grid["n"] = region["n"]
+    grid["s"] = region["n"] - grid["rows"] * grid["nsres"]
+    grid["w"] = region["w"]
+    grid["e"] = region["w"] + grid["cols"] * grid["ewres"]
+    return grid
+
+
+def _split(start, end):
+    """Split the index range into two halves, if possible."""
+    if end - start > 1:
+        mid = start + (end - start) // 2
+        return [(start, mid), (mid, end)]
+    return [(start, end)]
+
+
+def compute_quadtree_tiles(region, grid, workload, max_workload):
+    """Split the region recursively into quadrants until the workload of
+    each tile is at most 'max_workload' or the tile is a single cell of the
+    workload grid.
+
+    Args:
+        region (dict): The region which is tiled
+        grid (dict): The workload grid (see quadtree_workload_grid)
+        workload (numpy.ndarray): The workload per grid cell, e.g. the number
+                                  of non-null raster cells or vector features,
+                                  with the northern row first
+        max_workload (float): The maximum workload of one tile
+
+    Returns:
+        (tuple): dict with numpy arrays of the n, s, e, w coordinates of the
+                 tiles and a numpy array with the workload of each tile
+    """
+    workload = np.nan_to_num(np.asarray(workload, dtype=float))
+    if workload.shape != (grid["rows"], grid["cols"]):
+        raise ValueError("The workload does not match the workload grid.")
+    max_workload = float(max_workload)
+    if max_workload <= 0:
+        raise ValueError("The maximum workload must be positive.")
+    # summed-area table for the workload of a block in constant time
+    sums = np.zeros((grid["rows"] + 1, grid["cols"] + 1))
+    sums[1:, 1:] = workload.cumsum(axis=0).cumsum(axis=1)
+
+    blocks = list()
+    block_workload = list()
+    stack = [(0, grid["rows"], 0, grid["cols"])]
+    while stack:
+        row0, row1, col0, col1 = stack.pop()
+        load = (
+            sums[row1, col1] - sums[row0, col1]
+            - sums[row1, col0] + sums[row0, col0]
+        )
+        if load <= max_workload or (row1 - row0 == 1 and col1 - col0 == 1):
+            blocks.append((row0, row1, col0, col1))
+            block_workload.append(load)
+            continue
+        # reversed, so that the tiles are ordered from north-west
+        for rows in reversed(_split(row0, row1)):
+            for cols in reversed(_split(col0, col1)):
+                stack.append(rows + cols)
+
+    blocks = np.array(blocks)
+    tiles = dict()
+    tiles["n"] = grid["n"] - blocks[:, 0] * grid["nsres"]
+    tiles["s"] = np.maximum(
+        grid["n"] - blocks[:, 1] * grid["nsres"], region["s"]
+    )
+    tiles["w"] = grid["w"] + blocks[:, 2] * grid["ewres"]
+    tiles["e"] = np.minimum(
+        grid["w"] + blocks[:, 3] * grid["ewres"], region["e"]
+    )
+    return tiles, np.array(block_workload)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Script to read the attribute tables of vector maps in several mapsets
+
+The script is started by the patch merge inside the GRASS GIS session of the
+actinia job. For each vector map in each mapset it is checked if the map has
+an attribute table in layer 1 and which columns the table has. Maps which do
+not exist in a mapset are skipped, e.g. the vectors of a STVDS which are only
+registered in some mapsets. The result is
+saved as JSON file with the keys '<vector>@<mapset>' and the values
+{"table": <bool>, "columns": [[<column>, <type>], ...]}.
+With features=true also the number of features of each map is added with the
+key 'features', e.g. for the cost estimate of the dry run of the merge.
+
+Usage:
+    python vector_attributes.py vectors=<vector1,vector2,...> \
+        mapsets=<mapset1,mapset2,...> output=<json file> [features=true]
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import json
+import sys
+
+
+def vector_attributes(name):
+    """Return if the vector map has an attribute table in layer 1 and the
+    columns of the table with their types.
+    """
+    import grass.script as grass
+
+    if 1 not in grass.vector_db(name):
+        return {"table": False, "columns": list()}
+    columns = grass.vector_columns(name, layer=1)
+    return {
+        "table": True,
+        "columns": [
+            [column, columns[column]["type"]]
+            for column in sorted(columns, key=lambda c: columns[c]["index"])
+        ],
+    }
+
+
+def vector_features(name):
+    """Return the number of features (primitives) of the vector map."""
+    import grass.script as grass
+
+    return int(grass.vector_info_topo(name)["primitives"])
+
+
+def main(args):
+    import grass.script as grass
+
+    options = dict(arg.split("=", 1) for arg in args)
+    features = options.get("features", "false").lower() == "true"
+    attributes = dict()
+    for mapset in options["mapsets"].split(","):
+        existing = set(grass.read_command(
+            "g.list", type="vector", mapset=mapset
+        ).split())
+        for vector in options["vectors"].split(","):
+            if vector not in existing:
+                continue
+            name = f"{vector}@{mapset}"
+            attributes[name] = vector_attributes(name)
+            if features:
+                attributes[name]["features"] = vector_features(name)
+    with open(options["output"], "w") as f:
+        json.dump(attributes, f)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
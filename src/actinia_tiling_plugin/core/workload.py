@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Script to measure the workload of a reference map on a coarse grid
+
+The script is started by the quadtree tiling inside the GRASS GIS session of
+the actinia job. For a raster map the workload of a grid cell is the number
+of non-null cells (r.resamp.stats method=count), for a vector map the number
+of features whose center lies in the grid cell. With method=cover the vector
+map is rasterized with the resolution of the current region and the
+non-null cells are counted, e.g. to check which grid cells are covered by a
+mask. The workload is saved as numpy array (.npy) with the northern row
+first.
+
+Usage:
+    python workload.py map=<reference map> type=<raster|vector> \
+        n=<north> s=<south> e=<east> w=<west> rows=<rows> cols=<cols> \
+        output=<npy file> [method=<features|cover>]
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import sys
+from uuid import uuid4
+
+import numpy as np
+
+
+def _count_non_null(name, north, south, east, west, rows, cols):
+    """Count the non-null cells of the raster map per grid cell. The region
+    is changed, so a temporary region has to be used.
+    """
+    import grass.script as grass
+    from grass.script import array as garray
+
+    count_name = f"workload_{uuid4().hex}"
+    grass.run_command(
+        "g.region", n=north, s=south, e=east, w=west, rows=rows, cols=cols,
+        quiet=True,
+    )
+    try:
+        grass.run_command(
+            "r.resamp.stats", input=name, output=count_name, method="count",
+            quiet=True,
+        )
+        return np.array(garray.array(count_name, null=0))
+    finally:
+        grass.run_command(
+            "g.remove", type="raster", name=count_name, flags="f",
+            quiet=True, errors="ignore",
+        )
+
+
+def raster_workload(name, north, south, east, west, rows, cols):
+    """Count the non-null cells of the raster map per grid cell."""
+    import grass.script as grass
+
+    grass.use_temp_region()
+    try:
+        return _count_non_null(name, north, south, east, west, rows, cols)
+    finally:
+        grass.del_temp_region()
+
+
+def vector_cover(name, north, south, east, west, rows, cols):
+    """Count the cells of the vector map rasterized with the resolution of
+    the current region per grid cell.
+    """
+    import grass.script as grass
+
+    cover_name = f"cover_{uuid4().hex}"
+    grass.use_temp_region()
+    try:
+        grass.run_command(
+            "g.region", n=north, s=south, e=east, w=west, quiet=True
+        )
+        grass.run_command(
+            "v.to.rast", input=name, output=cover_name, use="val",
+            type="point,line,area", quiet=True,
+        )
+        return _count_non_null(
+            cover_name, north, south, east, west, rows, cols
+        )
+    finally:
+        grass.run_command(
+            "g.remove", type="raster", name=cover_name, flags="f",
+            quiet=True, errors="ignore",
+        )
+        grass.del_temp_region()
+
+
+def vector_workload(name, north, south, east, west, rows, cols):
+    """Count the features of the vector map per grid cell by the center of
+    the features.
+    """
+    from grass.pygrass.vector import VectorTopo
+
+    xs = list()
+    ys = list()
+    with VectorTopo(name, mode="r") as vector_map:
+        for point in vector_map.viter("points"):
+            xs.append(point.x)
+            ys.append(point.y)
+        for feature_type in ["lines", "areas"]:
+            for feature in vector_map.viter(feature_type):
+                bbox = feature.bbox()
+                xs.append((bbox.east + bbox.west) / 2.)
+                ys.append((bbox.north + bbox.south) / 2.)
+    workload, _, _ = np.histogram2d(
+        ys, xs, bins=[rows, cols], range=[[south, north], [west, east]]
+    )
+    # histogram2d starts with the southern row
+    return np.flipud(workload)
+
+
+def main(args):
+    options = dict(arg.split("=", 1) for arg in args)
+    extent = [
+        float(options[key]) for key in ["n", "s", "e", "w"]
+    ] + [int(options["rows"]), int(options["cols"])]
+    if options.get("type", "raster") == "vector":
+        if options.get("method", "features") == "cover":
+            workload = vector_cover(options["map"], *extent)
+        else:
+            workload = vector_workload(options["map"], *extent)
+    else:
+        workload = raster_workload(options["map"], *extent)
+    np.save(options["output"], workload)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
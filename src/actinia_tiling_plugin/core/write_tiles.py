@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Script to write all grid tiles in one pass
+
+The script is started by the tiling processes inside the GRASS GIS session
+of the actinia job. It reads the grid vector map once and writes one vector
+map per grid cell, so that no v.extract process per grid cell is needed.
+Alternatively the tiles are read from a JSON file with the computed tile
+extents and written as vector maps or as saved regions. If a tile has a core
+extent, it is additionally saved as region <tile name>_core.
+
+Usage:
+    python write_tiles.py grid=<grid vector> prefix=<tile prefix> \
+        digits=<number of digits of the zero padded category>
+    python write_tiles.py tiles=<JSON file> type=<vector|region>
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import json
+import sys
+
+
+def write_tile(name, cat, north, south, east, west):
+    """Write a rectangular tile with one boundary and one centroid."""
+    from grass.pygrass.vector import VectorTopo
+    from grass.pygrass.vector.geometry import Boundary, Centroid
+
+    with VectorTopo(name, mode="w") as tile:
+        tile.write(Boundary(points=[
+            (west, north), (east, north), (east, south), (west, south),
+            (west, north),
+        ]))
+        tile.write(
+            Centroid(x=(west + east) / 2., y=(north + south) / 2.), cat=cat
+        )
+
+
+def write_region_tile(name, north, south, east, west):
+    """Save the tile extent with the resolution of the current region as
+    named region.
+    """
+    import grass.lib.gis as libgis
+    from grass.pygrass.gis.region import Region
+
+    region = Region()
+    region.north = north
+    region.south = south
+    region.east = east
+    region.west = west
+    region.adjust(rows=False, cols=False)
+    if libgis.G_put_element_window(region.byref(), "windows", name) < 0:
+        raise RuntimeError(f"Unable to save region <{name}>")
+
+
+def write_tiles(tiles_file, tile_type):
+    """Write the tiles of the JSON file as vector maps or saved regions."""
+    with open(tiles_file, "r") as f:
+        tiles = json.load(f)
+    for cat, tile in enumerate(tiles, start=1):
+        if tile_type == "region":
+            write_region_tile(
+                tile["name"], tile["n"], tile["s"], tile["e"], tile["w"]
+            )
+        else:
+            write_tile(
+                tile["name"], cat, tile["n"], tile["s"], tile["e"], tile["w"]
+            )
+        if "core" in tile:
+            core = tile["core"]
+            write_region_tile(
+                f"{tile['name']}_core",
+                core["n"], core["s"], core["e"], core["w"],
+            )
+
+
+def write_grid_tiles(grid, prefix, digits):
+    """Write one vector map per area of the grid vector map."""
+    from grass.pygrass.vector import VectorTopo
+
+    text = "{:0%s}" % digits
+    with VectorTopo(grid, mode="r") as grid_map:
+        for area in grid_map.viter("areas"):
+            bbox = area.bbox()
+            write_tile(
+                f"{prefix}{text.format(area.cat)}", area.cat,
+                bbox.north, bbox.south, bbox.east, bbox.west,
+            )
+
+
+def main(args):
+    options = dict(arg.split("=", 1) for arg in args)
+    if "tiles" in options:
+        write_tiles(options["tiles"], options.get("type", "vector"))
+    else:
+        write_grid_tiles(
+            options["grid"], options["prefix"], int(options["digits"])
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -29,6 +29,12 @@ from flask_restful_swagger_2 import Resource
 from actinia_tiling_plugin.api.tiling_list import TilingListResource
 from actinia_tiling_plugin.api.tiling.tiling_grid import \
     AsyncTilingProcessGridResource
+from actinia_tiling_plugin.api.tiling.tiling_grid_run import \
+    AsyncTilingProcessGridRunResource
+from actinia_tiling_plugin.api.tiling.tiling_quadtree import \
+    AsyncTilingProcessQuadtreeResource
+from actinia_tiling_plugin.api.tiling.tiling_sweep import \
+    AsyncTilingProcessSweepResource
 from actinia_tiling_plugin.api.merge_list import MergeListResource
 from actinia_tiling_plugin.api.merge.patch_merge import \
     AsyncMergeProcessPatchResource
@@ -77,6 +83,33 @@ def create_project_endpoints(flask_api, projects_url_part="projects"):
         ),
     )
 
+    flask_api.add_resource(
+        AsyncTilingProcessGridRunResource,
+        f"/{projects_url_part}/<string:project_name>/mapsets/"
+        "<string:mapset_name>/tiling_processes/grid/run",
+        endpoint=get_endpoint_class_name(
+            AsyncTilingProcessGridRunResource, projects_url_part
+        ),
+    )
+
+    flask_api.add_resource(
+        AsyncTilingProcessQuadtreeResource,
+        f"/{projects_url_part}/<string:project_name>/mapsets/"
+        "<string:mapset_name>/tiling_processes/quadtree",
+        endpoint=get_endpoint_class_name(
+            AsyncTilingProcessQuadtreeResource, projects_url_part
+        ),
+    )
+
+    flask_api.add_resource(
+        AsyncTilingProcessSweepResource,
+        f"/{projects_url_part}/<string:project_name>/mapsets/"
+        "<string:mapset_name>/tiling_processes/sweep",
+        endpoint=get_endpoint_class_name(
+            AsyncTilingProcessSweepResource, projects_url_part
+        ),
+    )
+
     # merge
     flask_api.add_resource(
         MergeListResource,
@@ -25,8 +25,11 @@ __copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
 __maintainer__ = "mundialis GmbH % Co. KG"
 
 
+from copy import deepcopy
 from flask_restful_swagger_2 import Schema
 
+from actinia_core.models.response_models import ProcessingResponseModel
+
 
 class MergeShortDescResponseModel(Schema):
     """Response schema for short description of merge processes."""
@@ -85,3 +88,65 @@ class MergeListResponseModel(Schema):
         },
         200
     ]
+
+
+class MergeDryRunResponseModel(ProcessingResponseModel):
+    """Response schema of the dry run of a merge."""
+
+    type = "object"
+    properties = deepcopy(ProcessingResponseModel.properties)
+    properties["process_results"] = {
+        "type": "object",
+        "description": "The missing or type-mismatched inputs in "
+        "'problems'. If there are none, the 'plan' as list of levels with "
+        "the commands which are executed concurrently, the number of "
+        "'processes' per module, the 'rasters' and 'vectors' to patch "
+        "including the maps of the STRDS and STVDS and the 'costs' of each "
+        "raster, vector and in 'total' estimated from the metadata of the "
+        "maps.",
+    }
+    example = {
+        "process_results": {
+            "problems": [],
+            "plan": [
+                [
+                    "patch_raster.py input=ndvi@tile1,ndvi@tile2 "
+                    "output=ndvi nprocs=2 memory=300",
+                    "v.patch input=points@tile1,points@tile2 "
+                    "output=points -e",
+                ],
+            ],
+            "processes": {"r.patch": 1, "v.patch": 1},
+            "rasters": ["ndvi"],
+            "vectors": ["points"],
+            "costs": {
+                "raster": {
+                    "ndvi": {
+                        "input_cells": 2000000,
+                        "input_bytes": 4200000,
+                        "output_cells": 2000000,
+                        "output_bytes": 4200000,
+                        "disk_bytes": 4200000,
+                    }
+                },
+                "vector": {
+                    "points": {
+                        "input_features": 1200,
+                        "input_bytes": 96000,
+                        "output_features": 1200,
+                        "output_bytes": 96000,
+                        "disk_bytes": 96000,
+                    }
+                },
+                "total": {
+                    "input_cells": 2000000,
+                    "input_features": 1200,
+                    "input_bytes": 4296000,
+                    "output_bytes": 4296000,
+                    "disk_bytes": 4296000,
+                },
+            },
+        },
+        "status": "finished",
+        "message": "Dry run finished. All inputs of the merge exist.",
+    }
@@ -151,362 +151,18 @@ class GridTilingResponseModel(ProcessingResponseModel):
                 "centroids=24\nareas=24\nislands=1\nprimitives=82\nmap3d=0\n",
             },
             {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 51630,
+                "executable": "/usr/bin/python3",
+                "id": "write_tiles",
+                "mapset_size": 422307,
                 "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=1",
-                    "output=grid1",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10028576850891113,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 67741,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=2",
-                    "output=grid2",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10046982765197754,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 83852,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=3",
-                    "output=grid3",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10047054290771484,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 99963,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=4",
-                    "output=grid4",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.1005702018737793,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 116074,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=5",
-                    "output=grid5",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10041236877441406,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 132185,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=6",
-                    "output=grid6",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10047578811645508,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 148296,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=7",
-                    "output=grid7",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10039210319519043,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 164407,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=8",
-                    "output=grid8",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10032200813293457,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 180518,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=9",
-                    "output=grid9",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10045933723449707,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 196633,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=10",
-                    "output=grid10",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10046982765197754,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 212748,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=11",
-                    "output=grid11",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10045719146728516,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 228863,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=12",
-                    "output=grid12",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10044598579406738,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 244978,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=13",
-                    "output=grid13",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10049009323120117,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 261093,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=14",
-                    "output=grid14",
-                    "--qq",
+                    "/usr/lib/python3.11/site-packages/actinia_tiling_plugin/"
+                    "core/write_tiles.py",
+                    "grid=grid_66fce2f6f4474641b97ebad81b3c9c71",
+                    "prefix=grid",
+                    "digits=2",
                 ],
                 "return_code": 0,
-                "run_time": 0.10048079490661621,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 277208,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=15",
-                    "output=grid15",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10041666030883789,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 293323,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=16",
-                    "output=grid16",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10049557685852051,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 309438,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=17",
-                    "output=grid17",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10041141510009766,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 325553,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=18",
-                    "output=grid18",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.1003267765045166,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 341668,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=19",
-                    "output=grid19",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10041117668151855,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 357783,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=20",
-                    "output=grid20",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.15062570571899414,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 373898,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=21",
-                    "output=grid21",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.1004018783569336,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 390013,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=22",
-                    "output=grid22",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.1506185531616211,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 406128,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=23",
-                    "output=grid23",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.15079355239868164,
-                "stderr": [""],
-                "stdout": "",
-            },
-            {
-                "executable": "v.extract",
-                "id": "",
-                "mapset_size": 422243,
-                "parameter": [
-                    "input=grid_66fce2f6f4474641b97ebad81b3c9c71",
-                    "cat=24",
-                    "output=grid24",
-                    "--qq",
-                ],
-                "return_code": 0,
-                "run_time": 0.10039138793945312,
+                "run_time": 0.40048480033874512,
                 "stderr": [""],
                 "stdout": "",
             },
@@ -552,7 +208,7 @@ class GridTilingResponseModel(ProcessingResponseModel):
             "grid23",
             "grid24",
         ],
-        "progress": {"num_of_steps": 0, "step": 27},
+        "progress": {"num_of_steps": 0, "step": 4},
         "resource_id": "resource_id-4f3d98a7-ac54-40ef-ad71-d790c012aed2",
         "status": "finished",
         "time_delta": 10.62972092628479,
@@ -564,3 +220,115 @@ class GridTilingResponseModel(ProcessingResponseModel):
         },
         "user_id": "actinia-gdi",
     }
+
+
+class VirtualGridTilingResponseModel(ProcessingResponseModel):
+    """Virtual grid tiling response schema."""
+
+    type = "object"
+    properties = deepcopy(ProcessingResponseModel.properties)
+    properties["process_results"] = {}
+    properties["process_results"]["type"] = "array"
+    properties["process_results"]["items"] = "object"
+    properties["process_results"][
+        "description"
+    ] = "The names and the extents (n, s, e, w) of all computed tiles."
+    example = {
+        "accept_datetime": "2022-03-18 07:21:38.154889",
+        "accept_timestamp": 1647588098.154888,
+        "api_info": {
+            "endpoint": "asynctilingprocessgridresource",
+            "method": "POST",
+            "path": f"{URL_PREFIX}/projects/loc_25832/mapsets/tiling_"
+            "user/tiling_processes/grid",
+            "request_url": f"http://localhost:8088{URL_PREFIX}/projects/"
+            "loc_25832/mapsets/tiling_user/tiling_processes/grid",
+        },
+        "datetime": "2022-03-18 07:21:38.157061",
+        "http_code": 200,
+        "message": "Processing successfully finished",
+        "process_chain_list": [],
+        "process_log": [],
+        "process_results": [
+            {
+                "name": "grid1",
+                "n": 5696000.0,
+                "s": 5692000.0,
+                "e": 364000.0,
+                "w": 360000.0,
+            },
+            {
+                "name": "grid2",
+                "n": 5696000.0,
+                "s": 5692000.0,
+                "e": 368000.0,
+                "w": 364000.0,
+            },
+        ],
+        "progress": {"num_of_steps": 0, "step": 0},
+        "resource_id": "resource_id-a8b8fa5c-9e8d-4b4a-9f8e-5d1d3c1f2a77",
+        "status": "finished",
+        "time_delta": 0.0021729469299316406,
+        "timestamp": 1647588098.1570609,
+        "urls": {
+            "resources": [],
+            "status": f"http://localhost:8088{URL_PREFIX}/resources/actinia-"
+            "gdi/resource_id-a8b8fa5c-9e8d-4b4a-9f8e-5d1d3c1f2a77",
+        },
+        "user_id": "actinia-gdi",
+    }
+
+
+class SweepResponseModel(ProcessingResponseModel):
+    """Sweep of orphaned tile mapsets and grids response schema."""
+
+    type = "object"
+    properties = deepcopy(ProcessingResponseModel.properties)
+    properties["process_results"] = {}
+    properties["process_results"]["type"] = "object"
+    properties["process_results"][
+        "description"
+    ] = (
+        "The deleted (or with 'dry_run' the orphaned) tile 'mapsets' and "
+        "grid 'vectors', the skipped 'locked' mapsets and the "
+        "'reclaimed_bytes'."
+    )
+    example = {
+        "accept_datetime": "2022-03-18 07:21:38.154889",
+        "accept_timestamp": 1647588098.154888,
+        "api_info": {
+            "endpoint": "asynctilingprocesssweepresource",
+            "method": "POST",
+            "path": f"{URL_PREFIX}/projects/loc_25832/mapsets/tiling_"
+            "user/tiling_processes/sweep",
+            "request_url": f"http://localhost:8088{URL_PREFIX}/projects/"
+            "loc_25832/mapsets/tiling_user/tiling_processes/sweep",
+        },
+        "datetime": "2022-03-18 07:21:48.784597",
+        "http_code": 200,
+        "message": "Processing successfully finished. 2 mapsets and 1 "
+        "vectors are deleted, 0 locked mapsets are skipped.",
+        "process_chain_list": [],
+        "process_log": [],
+        "process_results": {
+            "mapsets": [
+                "tiling_user_6f3e2c1d8b9a4f0e8d7c6b5a4f3e2d1c_tmp3",
+                "tiling_user_6f3e2c1d8b9a4f0e8d7c6b5a4f3e2d1c_tmp4",
+            ],
+            "locked": [],
+            "vectors": ["grid_66fce2f6f4474641b97ebad81b3c9c71"],
+            "reclaimed_bytes": 18439120,
+            "dry_run": False,
+        },
+        "progress": {"num_of_steps": 3, "step": 3},
+        "resource_id": "resource_id-a1b0e1b7-0b1a-4c55-9e5c-20f2d0c4e1f2",
+        "status": "finished",
+        "time_delta": 10.63,
+        "timestamp": 1647588108.7845979,
+        "urls": {
+            "resources": [],
+            "status": f"http://localhost:8088{URL_PREFIX}/resources/"
+            "actinia-gdi/resource_id-a1b0e1b7-0b1a-4c55-9e5c-20f2d0c4e1f2",
+        },
+        "user_id": "actinia-gdi",
+    }
@@ -44,6 +44,48 @@ class LOGCONFIG:
     type = 'stdout'
 
 
+class TILINGCONFIG:
+    """Default config for tiling
+    """
+    # maximum number of grid tiles of a tiling, which is checked before the
+    # tiles are computed
+    max_tiles = 100000
+
+
+class RUNCONFIG:
+    """Default config for tiled runs
+    """
+    # maximum number of tile jobs which are queued at the same time
+    max_parallel_jobs = 4
+    # seconds between two status polls of the tile jobs
+    poll_interval = 5
+    # seconds until the tile manifest of a run expires in the kvdb
+    manifest_expiration = 604800
+    # seconds after the last change until orphaned tile mapsets and grids
+    # are deleted by the sweeper
+    sweep_ttl = 86400
+
+
+class MERGECONFIG:
+    """Default config for merging
+    """
+    # number of maps which are patched at the same time inside a merge job,
+    # with 1 the maps are patched one after another
+    workers = 1
+    # number of maps which are patched into one intermediate map by the tree
+    # reduction, 0 patches the maps of all mapsets at once
+    fan_in = 0
+    # number of threads of each r.patch, 0 divides the CPUs of the worker by
+    # the number of workers
+    nprocs = 0
+    # memory in MB of all r.patch runs of a merge, which is divided by the
+    # number of workers
+    memory = 1200
+    # number of mapsets which are deleted at the same time, 0 deletes the
+    # mapsets at once up to the number of CPUs
+    deletion_workers = 0
+
+
 class Configfile:
 
     def __init__(self):
@@ -74,5 +116,39 @@ class Configfile:
             if config.has_option("LOGCONFIG", "type"):
                 LOGCONFIG.type = config.get("LOGCONFIG", "type")
 
+        # TILING
+        if config.has_section("TILINGCONFIG"):
+            if config.has_option("TILINGCONFIG", "max_tiles"):
+                TILINGCONFIG.max_tiles = config.getint(
+                    "TILINGCONFIG", "max_tiles")
+
+        # TILED RUNS
+        if config.has_section("RUNCONFIG"):
+            if config.has_option("RUNCONFIG", "max_parallel_jobs"):
+                RUNCONFIG.max_parallel_jobs = config.getint(
+                    "RUNCONFIG", "max_parallel_jobs")
+            if config.has_option("RUNCONFIG", "poll_interval"):
+                RUNCONFIG.poll_interval = config.getfloat(
+                    "RUNCONFIG", "poll_interval")
+            if config.has_option("RUNCONFIG", "manifest_expiration"):
+                RUNCONFIG.manifest_expiration = config.getint(
+                    "RUNCONFIG", "manifest_expiration")
+            if config.has_option("RUNCONFIG", "sweep_ttl"):
+                RUNCONFIG.sweep_ttl = config.getint("RUNCONFIG", "sweep_ttl")
+
+        # MERGING
+        if config.has_section("MERGECONFIG"):
+            if config.has_option("MERGECONFIG", "workers"):
+                MERGECONFIG.workers = config.getint("MERGECONFIG", "workers")
+            if config.has_option("MERGECONFIG", "fan_in"):
+                MERGECONFIG.fan_in = config.getint("MERGECONFIG", "fan_in")
+            if config.has_option("MERGECONFIG", "nprocs"):
+                MERGECONFIG.nprocs = config.getint("MERGECONFIG", "nprocs")
+            if config.has_option("MERGECONFIG", "memory"):
+                MERGECONFIG.memory = config.getint("MERGECONFIG", "memory")
+            if config.has_option("MERGECONFIG", "deletion_workers"):
+                MERGECONFIG.deletion_workers = config.getint(
+                    "MERGECONFIG", "deletion_workers")
+
 
 init = Configfile()
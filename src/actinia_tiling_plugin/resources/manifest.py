@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Tile manifest of tiled runs in the kvdb
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+import hashlib
+import json
+
+from actinia_tiling_plugin.resources.config import RUNCONFIG
+
+
+def process_chain_hash(process_chain):
+    """Return a hash of the process chain which is independent of the
+    order of the keys.
+    """
+    return hashlib.sha256(
+        json.dumps(process_chain, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class TileManifest(object):
+    """Manifest of a tiled run, which is stored as hash in the kvdb.
+
+    The manifest contains the request of the run, the tile names, the state
+    of the run and for every tile its status, its mapset, the resource id of
+    its job and the hash of the process chain which produced it.
+    """
+
+    manifest_prefix = "TILING-MANIFEST::"
+    tile_prefix = "tile::"
+
+    def __init__(self, kvdb_server, user_id, run_id, expiration=None):
+        """Constructor
+
+        Args:
+            kvdb_server: The kvdb client, e.g. the kvdb_server of the
+                         KvdbLockingInterface of the job
+            user_id (str): The user id
+            run_id (str): The id of the run, the resource id of the job which
+                          started the run
+            expiration (int): Number of seconds until the manifest expires
+        """
+        self.kvdb_server = kvdb_server
+        self.run_id = run_id
+        self.key = f"{self.manifest_prefix}{user_id}::{run_id}"
+        if expiration is None:
+            expiration = RUNCONFIG.manifest_expiration
+        self.expiration = int(expiration)
+
+    def _get(self, field):
+        value = self.kvdb_server.hget(self.key, field)
+        if value is None:
+            return None
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        return json.loads(value)
+
+    def _set(self, mapping):
+        self.kvdb_server.hset(
+            self.key,
+            mapping={key: json.dumps(val) for key, val in mapping.items()},
+        )
+        self.kvdb_server.expire(self.key, self.expiration)
+
+    def exists(self):
+        return bool(self.kvdb_server.exists(self.key))
+
+    def create(self, request_data, tiles, mapsets):
+        """Create the manifest with all tiles in the status 'pending'."""
+        mapping = {
+            "request": request_data,
+            "tiles": tiles,
+            "state": "running",
+        }
+        for tile, mapset in zip(tiles, mapsets):
+            mapping[f"{self.tile_prefix}{tile}"] = {
+                "status": "pending",
+                "mapset": mapset,
+                "pc_hash": None,
+                "resource_id": None,
+            }
+        self._set(mapping)
+
+    def get_request(self):
+        return self._get("request")
+
+    def get_tiles(self):
+        return self._get("tiles")
+
+    def get_state(self):
+        return self._get("state")
+
+    def set_state(self, state):
+        self._set({"state": state})
+
+    def get_tile(self, tile):
+        return self._get(f"{self.tile_prefix}{tile}")
+
+    def update_tile(self, tile, **values):
+        """Update the status, mapset, pc_hash or resource_id of a tile."""
+        tile_info = self.get_tile(tile) or dict()
+        tile_info.update(values)
+        self._set({f"{self.tile_prefix}{tile}": tile_info})
+
+    def get_job(self):
+        """Return the resource id of the job which runs the run, e.g. of the
+        job which resumed it.
+        """
+        return self._get("job") or self.run_id
+
+    def set_job(self, resource_id):
+        self._set({"job": resource_id})
+
+    def get_tile_jobs(self):
+        """Return the resource ids of the last jobs of all tiles, read at
+        once.
+        """
+        jobs = set()
+        for field, value in self.kvdb_server.hgetall(self.key).items():
+            if isinstance(field, bytes):
+                field = field.decode("utf-8")
+            if field.startswith(self.tile_prefix):
+                if isinstance(value, bytes):
+                    value = value.decode("utf-8")
+                resource_id = json.loads(value)["resource_id"]
+                if resource_id is not None:
+                    jobs.add(resource_id)
+        return jobs
+
+    def get_mapsets(self):
+        """Return the mapsets of all tiles, read at once."""
+        mapsets = set()
+        for field, value in self.kvdb_server.hgetall(self.key).items():
+            if isinstance(field, bytes):
+                field = field.decode("utf-8")
+            if field.startswith(self.tile_prefix):
+                if isinstance(value, bytes):
+                    value = value.decode("utf-8")
+                mapsets.add(json.loads(value)["mapset"])
+        return mapsets
+
+    @classmethod
+    def find(cls, kvdb_server, user_id):
+        """Return the manifests of all runs of the user which are not
+        expired yet.
+        """
+        prefix = f"{cls.manifest_prefix}{user_id}::"
+        manifests = list()
+        for key in kvdb_server.scan_iter(match=f"{prefix}*"):
+            if isinstance(key, bytes):
+                key = key.decode("utf-8")
+            manifests.append(cls(kvdb_server, user_id, key[len(prefix):]))
+        return manifests
+
+    def is_complete(self, tile, pc_hash):
+        """Check if the tile was finished with the same process chain."""
+        tile_info = self.get_tile(tile)
+        return (
+            tile_info is not None
+            and tile_info["status"] == "finished"
+            and tile_info["pc_hash"] == pc_hash
+        )
+
+
+class MosaicManifest(object):
+    """Record of the mapsets which are already merged into the mosaics of a
+    target mapset by the incremental merges of a run. The mapsets of each
+    mosaic are stored as set in the kvdb, so that a mapset which is merged
+    into one output is still merged into the other outputs.
+    """
+
+    manifest_prefix = "TILING-MOSAIC::"
+
+    def __init__(self, kvdb_server, user_id, project_name, mapset_name,
+                 run_id, expiration=None):
+        """Constructor
+
+        Args:
+            kvdb_server: The kvdb client, e.g. the kvdb_server of the
+                         KvdbLockingInterface of the job
+            user_id (str): The user id
+            project_name (str): The project of the target mapset
+            mapset_name (str): The target mapset with the mosaics
+            run_id (str): The id of the run, e.g. of the tiled run or the
+                          resource id of the merge
+            expiration (int): Number of seconds until the record expires
+        """
+        self.kvdb_server = kvdb_server
+        self.run_id = run_id
+        self.prefix = (
+            f"{self.manifest_prefix}{user_id}::{project_name}::{mapset_name}"
+            "::"
+        )
+        if expiration is None:
+            expiration = RUNCONFIG.manifest_expiration
+        self.expiration = int(expiration)
+
+    def _key(self, map_type, name):
+        return f"{self.prefix}{map_type}::{name}::{self.run_id}"
+
+    def get_merged(self, map_type, name):
+        """Return the set of the mapsets merged into the mosaic."""
+        return {
+            mapset.decode("utf-8") if isinstance(mapset, bytes) else mapset
+            for mapset in self.kvdb_server.smembers(self._key(map_type, name))
+        }
+
+    def add_merged(self, map_type, name, mapsets):
+        if mapsets:
+            key = self._key(map_type, name)
+            self.kvdb_server.sadd(key, *mapsets)
+            self.kvdb_server.expire(key, self.expiration)
+
+    def clear(self, map_type, name):
+        """Remove the records of all runs of the mosaic, e.g. because the
+        mosaic was replaced.
+        """
+        for key in self.kvdb_server.scan_iter(
+            match=f"{self.prefix}{map_type}::{name}::*"
+        ):
+            self.kvdb_server.delete(key)
+
+
+class MapsetDeletionMarks(object):
+    """Mapsets of a project which are marked for deletion, e.g. by a merge
+    whose background job deletes them or by a finished tiled run, which is
+    stored as set in the kvdb. Marked mapsets which are left, e.g. by a
+    cancelled deletion job, can be deleted later by the sweeper. The marks do
+    not expire, so that the mapsets are found after the manifests of their
+    runs expired. A mark is removed when its mapset is deleted.
+    """
+
+    manifest_prefix = "TILING-DELETION::"
+
+    def __init__(self, kvdb_server, user_id, project_name):
+        """Constructor
+
+        Args:
+            kvdb_server: The kvdb client, e.g. the kvdb_server of the
+                         KvdbLockingInterface of the job
+            user_id (str): The user id
+            project_name (str): The project of the mapsets
+        """
+        self.kvdb_server = kvdb_server
+        self.key = f"{self.manifest_prefix}{user_id}::{project_name}"
+
+    def get_marked(self):
+        """Return the set of the marked mapsets."""
+        return {
+            mapset.decode("utf-8") if isinstance(mapset, bytes) else mapset
+            for mapset in self.kvdb_server.smembers(self.key)
+        }
+
+    def mark(self, mapsets):
+        if mapsets:
+            self.kvdb_server.sadd(self.key, *mapsets)
+
+    def unmark(self, mapset):
+        self.kvdb_server.srem(self.key, mapset)
+
+
+class VirtualRasterSources(object):
+    """Mapsets of a project which are read by the virtual rasters of the
+    virtual merges, which are stored as set per virtual raster in the kvdb.
+    The record does not expire, because the mapsets are needed as long as
+    the virtual raster exists. It is cleared when the raster is replaced,
+    e.g. materialized.
+    """
+
+    manifest_prefix = "TILING-VRT::"
+
+    def __init__(self, kvdb_server, user_id, project_name):
+        """Constructor
+
+        Args:
+            kvdb_server: The kvdb client, e.g. the kvdb_server of the
+                         KvdbLockingInterface of the job
+            user_id (str): The user id
+            project_name (str): The project of the mapsets
+        """
+        self.kvdb_server = kvdb_server
+        self.prefix = f"{self.manifest_prefix}{user_id}::{project_name}::"
+
+    def _key(self, mapset_name, raster):
+        return f"{self.prefix}{mapset_name}::{raster}"
+
+    def set_sources(self, mapset_name, raster, mapsets):
+        """Replace the source mapsets of the virtual raster."""
+        key = self._key(mapset_name, raster)
+        self.kvdb_server.delete(key)
+        if mapsets:
+            self.kvdb_server.sadd(key, *mapsets)
+
+    def clear(self, mapset_name, raster):
+        self.kvdb_server.delete(self._key(mapset_name, raster))
+
+    def find(self):
+        """Return the source mapsets of all virtual rasters of the project
+        as dict with the mapset and the name of the virtual raster as key.
+        """
+        sources = dict()
+        for key in self.kvdb_server.scan_iter(match=f"{self.prefix}*"):
+            if isinstance(key, bytes):
+                key = key.decode("utf-8")
+            mapset_name, raster = key[len(self.prefix):].split("::", 1)
+            sources[(mapset_name, raster)] = {
+                mapset.decode("utf-8") if isinstance(mapset, bytes)
+                else mapset
+                for mapset in self.kvdb_server.smembers(key)
+            }
+        return sources
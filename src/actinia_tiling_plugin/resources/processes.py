@@ -25,18 +25,49 @@ __copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
 __maintainer__ = "mundialis GmbH % Co. KG"
 
 import json
+import os
+import sys
 
 from actinia_core.core.common.process_chain import ProcessChainConverter
+from actinia_core.core.common.process_object import Process
 
+from actinia_tiling_plugin import core
+from actinia_tiling_plugin.core.process_chain import render_tile_template
 from actinia_tiling_plugin.resources.templating import tplEnv
 
 
-pconv = ProcessChainConverter()
-
-
 def pctpl_to_pl(tpl_file, tpl_values):
+    # a new converter for each process chain, so that its output parser list
+    # contains only the outputs of this process chain
+    pconv = ProcessChainConverter()
     tpl = tplEnv.get_template(tpl_file)
     pc = json.loads(
         tpl.render(**tpl_values).replace('\n', '').replace(" ", ""))
     pl = pconv.process_chain_to_process_list(pc)
     return pl, pconv
+
+
+def render_process_chain(process_chain, tpl_values):
+    """Render a process chain template, given as dict or JSON string, e.g.
+    with '{{ grid }}' for the tile. Only the tile variables are substituted,
+    other template expressions raise a ValueError.
+    """
+    if not isinstance(process_chain, str):
+        process_chain = json.dumps(process_chain)
+    return json.loads(render_tile_template(process_chain, tpl_values))
+
+
+def script_to_pl(script, script_values, process_id):
+    """Create a process list which runs a script of the core package in the
+    GRASS GIS session of the job.
+    """
+    script_path = os.path.join(os.path.dirname(core.__file__), script)
+    params = [script_path]
+    params.extend([f"{key}={val}" for key, val in script_values.items()])
+    pl = [Process(
+        exec_type="exec",
+        executable=sys.executable,
+        executable_params=params,
+        id=process_id,
+    )]
+    return pl
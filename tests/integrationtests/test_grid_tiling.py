@@ -59,6 +59,44 @@ PC_TILING_GRID = """{
   "grid_prefix": "grid"
 }"""
 
+PC_TILING_GRID_REGION = """{
+  "width": "0.5",
+  "height": "0.5",
+  "grid_prefix": "grid",
+  "mode": "region"
+}"""
+
+PC_USE_REGION_TILE = """{
+  "list": [
+    {
+      "id": "set_region_to_tile",
+      "module": "g.region",
+      "inputs": [
+        {
+          "param": "region",
+          "value": "grid1@tiling_test_mapset"
+        }
+      ],
+      "flags": "g"
+    }
+  ],
+  "version": "1"
+}"""
+
+PC_TILING_GRID_VIRTUAL = """{
+  "width": "0.5",
+  "height": "0.5",
+  "grid_prefix": "grid",
+  "mode": "virtual"
+}"""
+
+PC_TILING_GRID_UNKNOWN_MODE = """{
+  "width": "0.5",
+  "height": "0.5",
+  "grid_prefix": "grid",
+  "mode": "raster"
+}"""
+
 
 class GridTilingTest(ActiniaResourceTestCaseBase):
 
@@ -121,6 +159,13 @@ class GridTilingTest(ActiniaResourceTestCaseBase):
         assert param_names == [
             "grid_prefix",
             "height",
+            "mask_raster",
+            "mask_vector",
+            "max_cells_per_tile",
+            "memory_budget_mb",
+            "mode",
+            "overlap",
+            "overlap_unit",
             "width",
         ], "Parameter names are wrong"
 
@@ -163,3 +208,84 @@ class GridTilingTest(ActiniaResourceTestCaseBase):
         )
         assert "process_results" in resp2, "No 'process_results' in response"
         assert resp2["process_results"] == ["grid1", "grid2", "grid3", "grid4"]
+
+    @pytest.mark.integrationtest
+    def test_post_grid_virtual(self):
+        """Test the post method of tiling grid endpoint in virtual mode"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/grid"
+        resp = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=PC_TILING_GRID_VIRTUAL,
+        )
+        assert resp.status_code == 200, "The status code is not 200"
+        assert resp.json["status"] == "finished", "Status is not 'finished'"
+        tiles = resp.json["process_results"]
+        assert [tile["name"] for tile in tiles] == [
+            "grid1", "grid2", "grid3", "grid4"
+        ]
+        for tile in tiles:
+            assert tile["n"] - tile["s"] == 0.5, "Tile height is wrong"
+            assert tile["e"] - tile["w"] == 0.5, "Tile width is wrong"
+
+        # no vector maps are created
+        rv = self.server.get(
+            f"{self.base_url}/vector_layers",
+            headers=self.user_auth_header,
+        )
+        assert "grid1" not in rv.json["process_results"], \
+            "Vector map 'grid1' created in virtual mode"
+
+    @pytest.mark.integrationtest
+    def test_post_grid_unknown_mode(self):
+        """Test that the tiling grid endpoint rejects unknown modes"""
+        url = f"{self.base_url}/tiling_processes/grid"
+        resp = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=PC_TILING_GRID_UNKNOWN_MODE,
+        )
+        assert resp.status_code == 400, "The status code is not 400"
+        assert "'vector', 'region', 'virtual'" in resp.json["message"], \
+            "The allowed modes are not listed"
+
+    @pytest.mark.integrationtest
+    def test_post_grid_region(self):
+        """Test the post method of tiling grid endpoint in region mode"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/grid"
+        rv = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=PC_TILING_GRID_REGION,
+        )
+        resp = self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
+        assert resp["process_results"] == ["grid1", "grid2", "grid3", "grid4"]
+
+        # the saved regions can be used to set the region
+        rv2 = self.server.post(
+            f"{URL_PREFIX}/{self.project_url_part}/{self.project}/"
+            "processing_async_export",
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=PC_USE_REGION_TILE,
+        )
+        self.waitAsyncStatusAssertHTTP(
+            rv2,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
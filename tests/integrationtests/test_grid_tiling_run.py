@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Tests for tiling grid run endpoints
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+from copy import deepcopy
+import json
+from unittest import mock
+
+import pytest
+from flask.json import loads as json_loads
+
+from actinia_core.core.common.config import global_config
+from actinia_core.version import init_versions, G_VERSION
+
+from ..test_resource_base import URL_PREFIX
+from ..test_resource_base import ActiniaResourceTestCaseBase
+
+PC_TILING_GRID_RUN = {
+    "width": "0.5",
+    "height": "0.5",
+    "grid_prefix": "grid",
+    "max_parallel_jobs": 2,
+    "process_chain": {
+        "list": [
+            {
+                "id": "set_region_for_grid",
+                "module": "g.region",
+                "inputs": [
+                    {"param": "vector", "value": "{{ grid }}"},
+                    {"param": "res", "value": "0.1"},
+                ],
+                "flags": "pa",
+            },
+            {
+                "id": "random_ndwi_raster",
+                "module": "r.surf.random",
+                "inputs": [
+                    {"param": "min", "value": "0"},
+                    {"param": "max", "value": "1"},
+                ],
+                "outputs": [{"param": "output", "value": "ndwi"}],
+                "flags": "i",
+            },
+        ],
+        "version": "1",
+    },
+    "outputs": [{"param": "raster", "value": "ndwi"}],
+}
+
+
+class GridTilingRunTest(ActiniaResourceTestCaseBase):
+
+    project_url_part = "projects"
+
+    # set project_url_part to "locations" if GRASS GIS version < 8.4
+    init_versions()
+    grass_version_s = G_VERSION["version"]
+    grass_version = [int(item) for item in grass_version_s.split(".")[:2]]
+    if grass_version < [8, 4]:
+        project_url_part = "locations"
+
+    project = "nc_spm_08"
+    mapset = "tiling_run_test_mapset"
+    base_url = f"{URL_PREFIX}/{project_url_part}/{project}/mapsets/{mapset}"
+    content_type = "application/json"
+
+    mapset_created = False
+
+    def tearDown(self):
+        if self.mapset_created is True:
+            rv = self.server.delete(
+                f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+                f"{self.mapset}/lock",
+                headers=self.admin_auth_header,
+            )
+            self.waitAsyncStatusAssertHTTP(rv, headers=self.admin_auth_header)
+            rv2 = self.server.delete(
+                f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+                f"{self.mapset}",
+                headers=self.admin_auth_header,
+            )
+            self.waitAsyncStatusAssertHTTP(rv2, headers=self.admin_auth_header)
+        else:
+            self.__class__.mapset_created = True
+        self.app_context.pop()
+
+    @pytest.mark.integrationtest
+    def test_get_grid_run_apidocs(self):
+        """Test the get method of tiling grid run endpoint"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/grid/run"
+        resp = self.server.get(url, headers=self.user_auth_header)
+
+        assert resp.status_code == 200, "The status code is not 200"
+        assert "description" in resp.json, "No 'description' in response"
+        assert "parameters" in resp.json, "No 'parameters' in response"
+        assert resp.json["tags"] == ["Tiling"], "'tags' are wrong"
+        param_names = list()
+        for param in resp.json["parameters"]:
+            param_names.append(param["name"])
+        param_names.sort()
+        assert param_names == [
+            "background_deletion",
+            "fan_in",
+            "grid_prefix",
+            "height",
+            "keep_mapsets",
+            "mask_raster",
+            "mask_vector",
+            "max_cells_per_tile",
+            "max_parallel_jobs",
+            "memory",
+            "memory_budget_mb",
+            "merge_batch_size",
+            "method",
+            "mode",
+            "nprocs",
+            "outputs",
+            "overlap",
+            "overlap_unit",
+            "process_chain",
+            "region",
+            "resume_run_id",
+            "snap_threshold",
+            "vector_topology",
+            "width",
+            "workers",
+        ], "Parameter names are wrong"
+
+    @pytest.mark.integrationtest
+    def test_post_grid_run(self):
+        """Test the post method of tiling grid run endpoint"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/grid/run"
+        rv = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=json.dumps(PC_TILING_GRID_RUN),
+        )
+        resp = self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
+        assert resp["process_results"] == ["grid1", "grid2", "grid3", "grid4"]
+
+        # the results are merged and the tile mapsets are deleted
+        rv_raster = self.server.get(
+            f"{self.base_url}/raster_layers",
+            headers=self.user_auth_header,
+        )
+        assert "ndwi" in json_loads(rv_raster.data)["process_results"], \
+            "Raster 'ndwi' not in list."
+        rv_mapset = self.server.get(
+            f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets",
+            headers=self.user_auth_header,
+        )
+        mapsets = json_loads(rv_mapset.data)["process_results"]
+        assert not [
+            mapset for mapset in mapsets
+            if mapset.startswith(f"{self.mapset}_") and "_tmp" in mapset
+        ], "Temporary tile mapsets not deleted."
+
+    @pytest.mark.integrationtest
+    def test_post_grid_run_overlap(self):
+        """Test that the core cropping of overlapping tiles keeps the
+        resolution of the tile outputs
+        """
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/grid/run"
+        request_data = dict(PC_TILING_GRID_RUN, overlap=0.2)
+        rv = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=json.dumps(request_data),
+        )
+        self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
+        rv_info = self.server.get(
+            f"{self.base_url}/raster_layers/ndwi",
+            headers=self.user_auth_header,
+        )
+        info = json_loads(rv_info.data)["process_results"]
+        assert float(info["nsres"]) == 0.1, "Raster 'ndwi' was resampled"
+        assert float(info["ewres"]) == 0.1, "Raster 'ndwi' was resampled"
+
+    def _post_grid_run(self, request_data, http_status=200, status="finished"):
+        rv = self.server.post(
+            f"{self.base_url}/tiling_processes/grid/run",
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=json.dumps(request_data),
+        )
+        return self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=http_status,
+            status=status,
+        )
+
+    @pytest.mark.integrationtest
+    def test_post_grid_run_per_user_queue(self):
+        """Test that the run does not wait for its own queue with per user
+        queues, because the tile jobs get their own queues
+        """
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        with mock.patch.object(global_config, "QUEUE_TYPE", "per_user"):
+            resp = self._post_grid_run(PC_TILING_GRID_RUN)
+        assert resp["process_results"] == ["grid1", "grid2", "grid3", "grid4"]
+        assert "4 of 4 tiles processed" in resp["message"]
+
+    @pytest.mark.integrationtest
+    def test_post_grid_run_resume(self):
+        """Test that a failed run is resumed and a merged run is not"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        # all tiles fail because the grid of the region does not exist
+        failing_run = deepcopy(PC_TILING_GRID_RUN)
+        failing_run["process_chain"]["list"][0]["inputs"][0]["value"] = \
+            "{{ tile }}_missing"
+        resp = self._post_grid_run(failing_run, 400, "error")
+        run_id = resp["resource_id"]
+        assert f"'resume_run_id': '{run_id}'" in resp["message"], \
+            "Run id not in error message"
+
+        # the resume request overwrites the process chain of the run
+        resp_resume = self._post_grid_run({
+            "resume_run_id": run_id,
+            "process_chain": PC_TILING_GRID_RUN["process_chain"],
+        })
+        assert resp_resume["process_results"] == [
+            "grid1", "grid2", "grid3", "grid4"
+        ]
+        assert "4 of 4 tiles processed" in resp_resume["message"]
+        rv_raster = self.server.get(
+            f"{self.base_url}/raster_layers",
+            headers=self.user_auth_header,
+        )
+        assert "ndwi" in json_loads(rv_raster.data)["process_results"], \
+            "Raster 'ndwi' not in list."
+
+        # the merged run can not be resumed again
+        resp_merged = self._post_grid_run(
+            {"resume_run_id": run_id}, 400, "error"
+        )
+        assert "already merged" in resp_merged["message"]
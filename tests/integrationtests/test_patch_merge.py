@@ -25,6 +25,8 @@ __copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
 __maintainer__ = "mundialis GmbH % Co. KG"
 
 
+import json
+
 import pytest
 from flask.json import loads as json_loads
 from jinja2 import Template
@@ -263,7 +265,9 @@ class PatchMergeTest(ActiniaResourceTestCaseBase):
     def setUpClass(cls):
         super(PatchMergeTest, cls).setUpClass()
         accessible_datasets = {"nc_spm_08": ["PERMANENT"]}
-        accessible_modules = ["t.create", "t.register"]
+        accessible_modules = [
+            "t.create", "t.register", "t.vect.list", "v.db.addtable"
+        ]
         cls.user_id, cls.user_group, cls.user_auth_header = cls.create_user(
             name="user", role="user", process_num_limit=30,
             process_time_limit=400, accessible_datasets=accessible_datasets,
@@ -309,9 +313,22 @@ class PatchMergeTest(ActiniaResourceTestCaseBase):
             param_names.append(param["name"])
         param_names.sort()
         assert param_names == [
+            "background_deletion",
+            "core_regions",
+            "dry_run",
+            "fan_in",
+            "incremental",
             "keep_mapsets",
             "mapsetlist",
+            "memory",
+            "method",
+            "nprocs",
             "outputs",
+            "region",
+            "run_id",
+            "snap_threshold",
+            "vector_topology",
+            "workers",
         ], "Parameter names are wrong"
 
     def _create_grid(self):
@@ -332,14 +349,63 @@ class PatchMergeTest(ActiniaResourceTestCaseBase):
         assert "process_results" in resp2, "No 'process_results' in response"
         assert resp2["process_results"] == self.grids
 
-    def _compute_in_tmp_mapsets(self):
+    def _tile_process_chain(self, grid):
+        """Returns the process chain of a tile as dict, which can be extended
+        by a test.
+        """
+        return json.loads(
+            Template(PC_TPL_COMPUTING_ON_TILES).render(
+                grid=f"{grid}@{self.mapset}"
+            )
+        )
+
+    def _partial_strds_process_chain(self, grid):
+        """Returns the process chain of a tile whose STRDS has the additional
+        raster 'ndvi_4' registered for 2022-04-01, which only this tile has.
+        """
+        pc = self._tile_process_chain(grid)
+        register_idx = [process["id"] for process in pc["list"]].index(
+            "ndvi_strds_register"
+        )
+        pc["list"].insert(register_idx, {
+            "id": "random_ndvi_4_raster",
+            "module": "r.surf.random",
+            "inputs": [
+                {"param": "min", "value": "0"},
+                {"param": "max", "value": "200"},
+            ],
+            "outputs": [{"param": "output", "value": "ndvi_4"}],
+            "flags": "i",
+        })
+        for param in pc["list"][register_idx + 1]["inputs"]:
+            if param["param"] == "maps":
+                param["value"] = "ndvi_1,ndvi_2,ndvi_3,ndvi_4"
+        return pc
+
+    def _raster_extent(self, raster):
+        rv = self.server.get(
+            f"{self.base_url}/raster_layers/{raster}",
+            headers=self.user_auth_header,
+        )
+        info = json_loads(rv.data)["process_results"]
+        return {
+            key: float(info[key])
+            for key in ["north", "south", "east", "west", "nsres", "ewres"]
+        }
+
+    def _compute_in_tmp_mapsets(self, process_chains=None):
         # compute raster and vector maps in temporary mapsets on different
-        # tiles
+        # tiles, tests can pass other process chains for some tiles
+        if process_chains is None:
+            process_chains = dict()
         procs = list()
         for grid in self.grids:
             proc = dict()
-            proc["tpl"] = Template(PC_TPL_COMPUTING_ON_TILES)
-            proc["pc"] = proc["tpl"].render(grid=f"{grid}@{self.mapset}")
+            if grid in process_chains:
+                proc["pc"] = json.dumps(process_chains[grid])
+            else:
+                proc["tpl"] = Template(PC_TPL_COMPUTING_ON_TILES)
+                proc["pc"] = proc["tpl"].render(grid=f"{grid}@{self.mapset}")
             proc["url"] = f"{self.base_url}_tmp_{grid}/processing_async"
             self.created_mapsets.append(f"{self.mapset}_tmp_{grid}")
             proc["rv"] = self.server.post(
@@ -495,3 +561,471 @@ class PatchMergeTest(ActiniaResourceTestCaseBase):
             status="finished",
         )
         self._check_merge(keep_mapsets)
+
+    def _post_merge(self, request_data, http_status=200, status="finished"):
+        rv = self.server.post(
+            f"{self.base_url}/merge_processes/patch",
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=json.dumps(request_data),
+        )
+        return self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=http_status,
+            status=status,
+        )
+
+    def _list_layers(self, layer_type):
+        """Returns the names of the rasters or vectors of the target
+        mapset.
+        """
+        rv = self.server.get(
+            f"{self.base_url}/{layer_type}_layers",
+            headers=self.user_auth_header,
+        )
+        return json_loads(rv.data)["process_results"]
+
+    def _merge_tiles(self, request_data, process_chains=None, **kwargs):
+        """Creates the grid, computes the tiles and merges their mapsets."""
+        self.create_new_mapset(self.mapset, self.project)
+        self.created_mapsets.append(self.mapset)
+        self._create_grid()
+        self._compute_in_tmp_mapsets(process_chains)
+        request_data["mapsetlist"] = [
+            f"{self.mapset}_tmp_{grid}" for grid in self.grids
+        ]
+        request_data.setdefault("keep_mapsets", True)
+        return self._post_merge(request_data, **kwargs)
+
+    @staticmethod
+    def _logged_processes(resp, executable):
+        """Returns the parameters of the processes of the executable in the
+        process log of the response.
+        """
+        return [
+            entry["parameter"] for entry in resp["process_log"]
+            if entry["executable"].endswith(executable)
+        ]
+
+    def _raster_univar(self, raster):
+        """Reads all cells of the raster in the target mapset in the region
+        of the raster and returns the univariate statistics.
+        """
+        pc = {
+            "list": [{
+                "id": "set_region",
+                "module": "g.region",
+                "inputs": [{"param": "raster", "value": raster}],
+            }, {
+                "id": "univar",
+                "module": "r.univar",
+                "inputs": [{"param": "map", "value": raster}],
+                "flags": "g",
+                "stdout": {"id": "stats", "format": "kv", "delimiter": "="},
+            }],
+            "version": "1",
+        }
+        rv = self.server.post(
+            f"{self.base_url}/processing_async",
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=json.dumps(pc),
+        )
+        resp = self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
+        return resp["process_results"]["stats"]
+
+    @pytest.mark.integrationtest
+    def test_post_virtual_and_materialize(self):
+        """Test that the materialized rasters are readable after the merged
+        mapsets are deleted
+        """
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+        self.created_mapsets.append(self.mapset)
+
+        self._create_grid()
+        self._compute_in_tmp_mapsets()
+        mapsetlist = [f"{self.mapset}_tmp_{grid}" for grid in self.grids]
+        outputs = [
+            {"param": "raster", "value": "ndwi"},
+            {"param": "strds", "value": "ndvi"},
+        ]
+
+        self._post_merge({
+            "mapsetlist": mapsetlist,
+            "outputs": outputs,
+            "method": "virtual",
+        })
+        self._post_merge({
+            "mapsetlist": mapsetlist,
+            "outputs": outputs,
+            "method": "materialize",
+            "keep_mapsets": False,
+        })
+        for mapset in mapsetlist:
+            self.created_mapsets.remove(mapset)
+
+        for rast in ["ndwi", "ndvi_1", "ndvi_2", "ndvi_3"]:
+            stats = self._raster_univar(rast)
+            assert int(stats["n"]) > 0, f"Raster '{rast}' is empty."
+
+    @pytest.mark.integrationtest
+    def test_post_incremental_per_output(self):
+        """Test that mapsets which are merged into one mosaic are still
+        merged into the other mosaics and that a run skips its merged mapsets
+        """
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+        self.created_mapsets.append(self.mapset)
+
+        self._create_grid()
+        self._compute_in_tmp_mapsets()
+        mapsetlist = [f"{self.mapset}_tmp_{grid}" for grid in self.grids]
+
+        request_data = {
+            "mapsetlist": mapsetlist,
+            "outputs": [{"param": "raster", "value": "ndwi"}],
+            "incremental": True,
+            "run_id": "incremental_test_run",
+            "keep_mapsets": True,
+        }
+        self._post_merge(request_data)
+        request_data["outputs"] = [{"param": "raster", "value": "ndvi_1"}]
+        resp = self._post_merge(request_data)
+        assert "already merged" not in resp["message"], \
+            "Raster 'ndvi_1' is skipped."
+        rv_raster = self.server.get(
+            f"{self.base_url}/raster_layers",
+            headers=self.user_auth_header,
+        )
+        rasters = json_loads(rv_raster.data)["process_results"]
+        for rast in ["ndwi", "ndvi_1"]:
+            assert rast in rasters, f"Raster '{rast}' not in list."
+
+        # the same run skips the mapsets which are already merged
+        resp = self._post_merge(request_data)
+        assert "already merged" in resp["message"], \
+            "Merged mapsets are not skipped."
+
+    @pytest.mark.integrationtest
+    def test_post_tree_reduction(self):
+        """Test the tree reduction with a fan-in and the removal of the
+        intermediate maps
+        """
+        self._merge_tiles({
+            "outputs": [
+                {"param": "raster", "value": "ndwi"},
+                {"param": "vector", "value": "points"},
+            ],
+            "fan_in": 2,
+        })
+        rasters = self._list_layers("raster")
+        vectors = self._list_layers("vector")
+        assert "ndwi" in rasters, "Raster 'ndwi' not in list."
+        assert "points" in vectors, "Vector 'points' not in list."
+        intermediates = [
+            name for name in rasters + vectors if "_level" in name
+        ]
+        assert intermediates == [], \
+            f"Intermediate maps {intermediates} are not deleted."
+        stats = self._raster_univar("ndwi")
+        # 4 tiles of 5 x 5 cells
+        assert int(stats["n"]) == 100, "Raster 'ndwi' is incomplete."
+
+    @pytest.mark.integrationtest
+    def test_post_dry_run_plan(self):
+        """Test that all patch steps are planned in one plan and that the dry
+        run does not change the target mapset
+        """
+        resp = self._merge_tiles({
+            "outputs": [
+                {"param": "raster", "value": "ndwi"},
+                {"param": "vector", "value": "points"},
+                {"param": "strds", "value": "ndvi"},
+            ],
+            "dry_run": True,
+        })
+        results = resp["process_results"]
+        assert results["problems"] == [], "Inputs of the merge are missing."
+        commands = [
+            command for level in results["plan"] for command in level
+        ]
+        for name in ["ndwi", "ndvi_1", "ndvi_2", "ndvi_3"]:
+            assert any(
+                command.startswith("patch_raster.py")
+                and f"output={name}" in command
+                for command in commands
+            ), f"Patch of raster '{name}' not planned."
+        assert any(
+            command.startswith("v.patch") and "output=points" in command
+            for command in commands
+        ), "Patch of vector 'points' not planned."
+        assert "ndwi" not in self._list_layers("raster"), \
+            "The dry run patched the raster 'ndwi'."
+
+    @pytest.mark.integrationtest
+    def test_post_dry_run_incremental_costs(self):
+        """Test that the costs of an incremental dry run include the
+        existing mosaic
+        """
+        request_data = {
+            "outputs": [
+                {"param": "raster", "value": "ndwi"},
+                {"param": "vector", "value": "points"},
+            ],
+            "incremental": True,
+            "dry_run": True,
+        }
+        resp = self._merge_tiles(dict(request_data))
+        first_costs = resp["process_results"]["costs"]
+        request_data["dry_run"] = False
+        request_data["mapsetlist"] = [
+            f"{self.mapset}_tmp_{grid}" for grid in self.grids
+        ]
+        request_data["keep_mapsets"] = True
+        self._post_merge(dict(request_data))
+        request_data["dry_run"] = True
+        resp = self._post_merge(request_data)
+        costs = resp["process_results"]["costs"]
+        assert costs["raster"]["ndwi"]["input_cells"] > \
+            first_costs["raster"]["ndwi"]["input_cells"], \
+            "The cells of the mosaic are not counted."
+        assert costs["vector"]["points"]["input_features"] > \
+            first_costs["vector"]["points"]["input_features"], \
+            "The features of the mosaic are not counted."
+
+    @pytest.mark.integrationtest
+    def test_post_dry_run_missing_mapset(self):
+        """Test that the dry run reports a missing mapset together with the
+        missing maps of the other mapsets
+        """
+        self.create_new_mapset(self.mapset, self.project)
+        self.created_mapsets.append(self.mapset)
+        self._create_grid()
+        self._compute_in_tmp_mapsets()
+        missing_mapset = f"{self.mapset}_tmp_missing"
+        resp = self._post_merge({
+            "outputs": [{"param": "raster", "value": "ndwi,missing"}],
+            "mapsetlist": [
+                f"{self.mapset}_tmp_{grid}" for grid in self.grids
+            ] + [missing_mapset],
+            "keep_mapsets": True,
+            "dry_run": True,
+        })
+        problems = resp["process_results"]["problems"]
+        assert f"mapset <{missing_mapset}> does not exist" in problems, \
+            "Missing mapset not reported."
+        for grid in self.grids:
+            assert f"raster <missing@{self.mapset}_tmp_{grid}> is missing" \
+                in problems, "Missing raster not reported."
+
+    @pytest.mark.integrationtest
+    def test_post_attribute_table_mismatch(self):
+        """Test that vectors with differing attribute tables are rejected
+        before anything is patched
+        """
+        pc_grid2 = self._tile_process_chain("grid2")
+        pc_grid2["list"].append({
+            "id": "add_attribute_table",
+            "module": "v.db.addtable",
+            "inputs": [
+                {"param": "map", "value": "areas"},
+                {"param": "columns", "value": "extra integer"},
+            ],
+        })
+        resp = self._merge_tiles(
+            {"outputs": [{"param": "vector", "value": "areas"}]},
+            {"grid2": pc_grid2},
+            http_status=400,
+            status="error",
+        )
+        assert "attribute tables of the vectors differ" in resp["message"]
+        assert f"{self.mapset}_tmp_grid2" in resp["message"]
+        assert "areas" not in self._list_layers("vector"), \
+            "Vector 'areas' is patched."
+
+    @pytest.mark.integrationtest
+    def test_post_deferred_topology(self):
+        """Test the patch without topology, the final v.build and the
+        v.clean with the snap threshold
+        """
+        resp = self._merge_tiles({
+            "outputs": [{"param": "vector", "value": "areas"}],
+            "vector_topology": "deferred",
+            "snap_threshold": 0.0001,
+        })
+        patches = self._logged_processes(resp, "v.patch")
+        assert patches, "v.patch is not run."
+        for params in patches:
+            assert any(
+                param.startswith("-") and "b" in param for param in params
+            ), "v.patch builds the topology."
+        assert len(self._logged_processes(resp, "v.build")) == 1, \
+            "The topology is not built once."
+        cleans = self._logged_processes(resp, "v.clean")
+        assert len(cleans) == 1, "v.clean is not run once."
+        assert "output=areas" in cleans[0]
+        assert "threshold=0.0001,0" in cleans[0]
+
+        vectors = self._list_layers("vector")
+        assert "areas" in vectors, "Vector 'areas' not in list."
+        assert not [name for name in vectors if "_unclean_" in name], \
+            "The uncleaned vector is not deleted."
+        rv_info = self.server.get(
+            f"{self.base_url}/vector_layers/areas",
+            headers=self.user_auth_header,
+        )
+        info = json_loads(rv_info.data)["process_results"]
+        # the areas of the 4 tiles with 3 buffered points each
+        assert int(info["areas"]) > 0, "Vector 'areas' has no topology."
+
+    @pytest.mark.integrationtest
+    def test_post_patch_resources(self):
+        """Test that 'nprocs' and 'memory' are passed to the raster patches"""
+        resp = self._merge_tiles({
+            "outputs": [{"param": "raster", "value": "ndwi"}],
+            "nprocs": 2,
+            "memory": 300,
+        })
+        # the script is run by the python executable of the worker
+        patches = [
+            entry["parameter"] for entry in resp["process_log"]
+            if entry["parameter"]
+            and entry["parameter"][0].endswith("patch_raster.py")
+        ]
+        assert patches, "patch_raster.py is not run."
+        for params in patches:
+            assert "nprocs=2" in params, "'nprocs' is not passed."
+            assert "memory=300" in params, "'memory' is not passed."
+        assert int(self._raster_univar("ndwi")["n"]) == 100, \
+            "Raster 'ndwi' is incomplete."
+
+    @pytest.mark.integrationtest
+    def test_post_union_region(self):
+        """Test that all rasters are patched in the union region of all
+        inputs, also if a raster of the STRDS exists only in some tiles
+        """
+        self._merge_tiles(
+            {
+                "outputs": [
+                    {"param": "strds", "value": "ndvi"},
+                    {"param": "raster", "value": "ndwi"},
+                ],
+                "region": "union",
+            },
+            {"grid4": self._partial_strds_process_chain("grid4")},
+        )
+        union = self._raster_extent("ndwi")
+        for rast in ["ndvi_1", "ndvi_4"]:
+            assert self._raster_extent(rast) == union, \
+                f"Raster '{rast}' is not patched in the union region."
+
+    @pytest.mark.integrationtest
+    def test_post_strds_partial_timestamps(self):
+        """Test that the merged STRDS has the union of the timestamps of all
+        mapsets and that each raster is patched only from the mapsets in which
+        it is registered
+        """
+        self._merge_tiles(
+            {"outputs": [{"param": "strds", "value": "ndvi"}]},
+            {"grid4": self._partial_strds_process_chain("grid4")},
+        )
+        rv = self.server.get(
+            f"{self.base_url}/strds/ndvi/raster_layers",
+            headers=self.user_auth_header,
+        )
+        registered = {
+            entry["id"]: entry["start_time"]
+            for entry in json_loads(rv.data)["process_results"]
+        }
+        assert sorted(registered) == [
+            f"ndvi_{idx}@{self.mapset}" for idx in range(1, 5)
+        ], "Rasters of STRDS 'ndvi' are wrong."
+        assert registered[f"ndvi_4@{self.mapset}"].startswith(
+            "2022-04-01"
+        ), "Timestamp of raster 'ndvi_4' is wrong."
+        # 'ndvi_4' is only patched from the tile with 5 x 5 cells
+        assert int(self._raster_univar("ndvi_4")["n"]) == 25
+        assert int(self._raster_univar("ndvi_3")["n"]) == 100
+
+    def _stvds_process_chain(self, grid):
+        """Returns the process chain of a tile which registers the vector
+        'points' in the STVDS 'points_stvds'.
+        """
+        pc = self._tile_process_chain(grid)
+        pc["list"].extend([
+            {
+                "id": "points_stvds_create",
+                "module": "t.create",
+                "inputs": [
+                    {"param": "type", "value": "stvds"},
+                    {"param": "description", "value": "example stvds"},
+                    {"param": "title", "value": "example_stvds"},
+                ],
+                "outputs": [{"param": "output", "value": "points_stvds"}],
+            },
+            {
+                "id": "points_stvds_register",
+                "module": "t.register",
+                "inputs": [
+                    {"param": "type", "value": "vector"},
+                    {"param": "input", "value": "points_stvds"},
+                    {"param": "maps", "value": "points"},
+                    {"param": "start", "value": "2022-01-01"},
+                ],
+            },
+        ])
+        return pc
+
+    @pytest.mark.integrationtest
+    def test_post_stvds(self):
+        """Test the merge of a STVDS and the registration of its vectors"""
+        self._merge_tiles(
+            {"outputs": [{"param": "stvds", "value": "points_stvds"}]},
+            {grid: self._stvds_process_chain(grid) for grid in self.grids},
+        )
+        pc = {
+            "list": [{
+                "id": "list_stvds",
+                "module": "t.vect.list",
+                "inputs": [
+                    {"param": "input", "value": "points_stvds"},
+                    {"param": "columns", "value": "name,mapset,start_time"},
+                ],
+                "flags": "u",
+                "stdout": {
+                    "id": "maps", "format": "table", "delimiter": "|"
+                },
+            }],
+            "version": "1",
+        }
+        rv = self.server.post(
+            f"{self.base_url}/processing_async",
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=json.dumps(pc),
+        )
+        resp = self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
+        maps = resp["process_results"]["maps"]
+        assert len(maps) == 1, "Vectors of STVDS 'points_stvds' are wrong."
+        assert maps[0][:2] == ["points", self.mapset]
+        assert maps[0][2].startswith("2022-01-01")
+
+        # the topology of the vector is built once
+        rv_info = self.server.get(
+            f"{self.base_url}/vector_layers/points",
+            headers=self.user_auth_header,
+        )
+        info = json_loads(rv_info.data)["process_results"]
+        assert int(info["points"]) == 12, "Vector 'points' is incomplete."
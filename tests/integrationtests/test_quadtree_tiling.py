@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Tests for tiling quadtree endpoints
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import pytest
+
+from actinia_core.version import init_versions, G_VERSION
+
+from ..test_resource_base import URL_PREFIX
+from ..test_resource_base import ActiniaResourceTestCaseBase
+
+PC_TILING_QUADTREE = """{
+  "reference_map": "boundary_county@PERMANENT",
+  "reference_type": "vector",
+  "max_workload": "50",
+  "max_depth": 2,
+  "tile_prefix": "quad"
+}"""
+
+PC_TILING_QUADTREE_MISSING = """{
+  "reference_map": "boundary_county@PERMANENT",
+  "tile_prefix": "quad"
+}"""
+
+
+class QuadtreeTilingTest(ActiniaResourceTestCaseBase):
+
+    project_url_part = "projects"
+
+    # set project_url_part to "locations" if GRASS GIS version < 8.4
+    init_versions()
+    grass_version_s = G_VERSION["version"]
+    grass_version = [int(item) for item in grass_version_s.split(".")[:2]]
+    if grass_version < [8, 4]:
+        project_url_part = "locations"
+
+    project = "nc_spm_08"
+    mapset = "tiling_test_mapset"
+    base_url = f"{URL_PREFIX}/{project_url_part}/{project}/mapsets/{mapset}"
+    content_type = "application/json"
+
+    mapset_created = False
+
+    def tearDown(self):
+        if self.mapset_created is True:
+            rv = self.server.delete(
+                f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+                f"{self.mapset}/lock",
+                headers=self.admin_auth_header,
+            )
+            self.waitAsyncStatusAssertHTTP(rv, headers=self.admin_auth_header)
+            rv2 = self.server.delete(
+                f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+                f"{self.mapset}",
+                headers=self.admin_auth_header,
+            )
+            self.waitAsyncStatusAssertHTTP(rv2, headers=self.admin_auth_header)
+        else:
+            self.__class__.mapset_created = True
+        self.app_context.pop()
+
+    @pytest.mark.integrationtest
+    def test_get_quadtree_apidocs(self):
+        """Test the get method of tiling quadtree endpoint"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/quadtree"
+        resp = self.server.get(url, headers=self.user_auth_header)
+
+        assert resp.status_code == 200, "The status code is not 200"
+        assert "description" in resp.json, "No 'description' in response"
+        assert "parameters" in resp.json, "No 'parameters' in response"
+        assert (
+            "process_results" in resp.json
+        ), "No 'process_results' in response"
+        assert resp.json["tags"] == ["Tiling"], "'tags' are wrong"
+        param_names = list()
+        for param in resp.json["parameters"]:
+            param_names.append(param["name"])
+        param_names.sort()
+        assert param_names == [
+            "max_depth",
+            "max_workload",
+            "mode",
+            "overlap",
+            "overlap_unit",
+            "reference_map",
+            "reference_type",
+            "tile_prefix",
+        ], "Parameter names are wrong"
+
+    @pytest.mark.integrationtest
+    def test_post_quadtree(self):
+        """Test the post method of tiling quadtree endpoint"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/quadtree"
+        rv = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=PC_TILING_QUADTREE,
+        )
+        resp = self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
+        assert "process_results" in resp, "No 'process_results' in response"
+        tiles = resp["process_results"]
+        assert 1 <= len(tiles) <= 16, "Number of quadtree tiles is wrong"
+        assert all(tile.startswith("quad") for tile in tiles)
+
+    @pytest.mark.integrationtest
+    def test_post_quadtree_missing_max_workload(self):
+        """Test that the quadtree endpoint rejects a request without the
+        required 'max_workload'
+        """
+        url = f"{self.base_url}/tiling_processes/quadtree"
+        resp = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=PC_TILING_QUADTREE_MISSING,
+        )
+        assert resp.status_code == 400, "The status code is not 400"
+        assert "'max_workload'" in resp.json["message"]
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Tests for tiling sweep endpoint
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import json
+from uuid import uuid4
+
+import pytest
+
+from actinia_core.version import init_versions, G_VERSION
+
+from ..test_resource_base import URL_PREFIX
+from ..test_resource_base import ActiniaResourceTestCaseBase
+
+
+class TilingSweepTest(ActiniaResourceTestCaseBase):
+
+    project_url_part = "projects"
+
+    # set project_url_part to "locations" if GRASS GIS version < 8.4
+    init_versions()
+    grass_version_s = G_VERSION["version"]
+    grass_version = [int(item) for item in grass_version_s.split(".")[:2]]
+    if grass_version < [8, 4]:
+        project_url_part = "locations"
+
+    project = "nc_spm_08"
+    mapset = "tiling_sweep_test_mapset"
+    base_url = f"{URL_PREFIX}/{project_url_part}/{project}/mapsets/{mapset}"
+    content_type = "application/json"
+
+    mapset_created = False
+
+    def tearDown(self):
+        if self.mapset_created is True:
+            rv = self.server.delete(
+                f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+                f"{self.mapset}/lock",
+                headers=self.admin_auth_header,
+            )
+            self.waitAsyncStatusAssertHTTP(rv, headers=self.admin_auth_header)
+            rv2 = self.server.delete(
+                f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+                f"{self.mapset}",
+                headers=self.admin_auth_header,
+            )
+            self.waitAsyncStatusAssertHTTP(rv2, headers=self.admin_auth_header)
+        else:
+            self.__class__.mapset_created = True
+        self.app_context.pop()
+
+    @pytest.mark.integrationtest
+    def test_get_sweep_apidocs(self):
+        """Test the get method of tiling sweep endpoint"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/sweep"
+        resp = self.server.get(url, headers=self.user_auth_header)
+
+        assert resp.status_code == 200, "The status code is not 200"
+        assert "description" in resp.json, "No 'description' in response"
+        assert "parameters" in resp.json, "No 'parameters' in response"
+        assert resp.json["tags"] == ["Tiling"], "'tags' are wrong"
+        param_names = list()
+        for param in resp.json["parameters"]:
+            param_names.append(param["name"])
+        param_names.sort()
+        assert param_names == [
+            "dry_run",
+            "ttl",
+            "workers",
+        ], "Parameter names are wrong"
+
+    @pytest.mark.integrationtest
+    def test_post_sweep_dry_run(self):
+        """Test the post method of tiling sweep endpoint with dry run"""
+        # create mapset
+        self.create_new_mapset(self.mapset, self.project)
+
+        url = f"{self.base_url}/tiling_processes/sweep"
+        rv = self.server.post(
+            url,
+            headers=self.user_auth_header,
+            content_type=self.content_type,
+            data=json.dumps({"ttl": 0, "dry_run": True}),
+        )
+        resp = self.waitAsyncStatusAssertHTTP(
+            rv,
+            headers=self.user_auth_header,
+            http_status=200,
+            status="finished",
+        )
+        results = resp["process_results"]
+        assert results["dry_run"] is True, "Sweep is not a dry run"
+        assert results["mapsets"] == [], "Orphaned mapsets found"
+        assert results["locked"] == [], "Locked mapsets found"
+        assert results["vectors"] == [], "Orphaned grids found"
+        assert results["reclaimed_bytes"] == 0, "Reclaimed bytes are wrong"
+
+    def _delete_mapset(self, mapset_name):
+        rv = self.server.delete(
+            f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+            f"{mapset_name}/lock",
+            headers=self.admin_auth_header,
+        )
+        self.waitAsyncStatusAssertHTTP(rv, headers=self.admin_auth_header)
+        rv2 = self.server.delete(
+            f"{URL_PREFIX}/{self.project_url_part}/{self.project}/mapsets/"
+            f"{mapset_name}",
+            headers=self.admin_auth_header,
+        )
+        self.waitAsyncStatusAssertHTTP(rv2, headers=self.admin_auth_header)
+
+    @pytest.mark.integrationtest
+    def test_post_sweep_unregistered_mapset(self):
+        """Test that a mapset with the name of a tile mapset which is not
+        registered by a tiled run or a merge is not deleted
+        """
+        # create mapset and a mapset of a manual workflow
+        self.create_new_mapset(self.mapset, self.project)
+        manual_mapset = f"{self.mapset}_{uuid4().hex}_tmp1"
+        self.create_new_mapset(manual_mapset, self.project)
+
+        try:
+            url = f"{self.base_url}/tiling_processes/sweep"
+            rv = self.server.post(
+                url,
+                headers=self.user_auth_header,
+                content_type=self.content_type,
+                data=json.dumps({"ttl": 0}),
+            )
+            resp = self.waitAsyncStatusAssertHTTP(
+                rv,
+                headers=self.user_auth_header,
+                http_status=200,
+                status="finished",
+            )
+            assert manual_mapset not in resp["process_results"]["mapsets"], \
+                "Unregistered mapset is swept."
+            rv_mapset = self.server.get(
+                f"{URL_PREFIX}/{self.project_url_part}/{self.project}/"
+                "mapsets",
+                headers=self.user_auth_header,
+            )
+            assert manual_mapset in json.loads(
+                rv_mapset.data
+            )["process_results"], "Unregistered mapset is deleted."
+        finally:
+            self._delete_mapset(manual_mapset)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Unit tests for the tile manifest of tiled runs
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+from fnmatch import fnmatch
+
+import pytest
+
+from actinia_tiling_plugin.resources.manifest import (
+    MapsetDeletionMarks,
+    MosaicManifest,
+    TileManifest,
+    VirtualRasterSources,
+    process_chain_hash,
+)
+
+
+class DictKvdb(object):
+    """Minimal in-memory kvdb with the hash and set commands of the
+    manifests
+    """
+
+    def __init__(self):
+        self.data = dict()
+        self.expirations = dict()
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, dict()))
+
+    def scan_iter(self, match):
+        return [
+            key.encode("utf-8") for key in self.data if fnmatch(key, match)
+        ]
+
+    def hget(self, key, field):
+        return self.data.get(key, dict()).get(field)
+
+    def hset(self, key, mapping):
+        self.data.setdefault(key, dict()).update(
+            {field: value.encode("utf-8") for field, value in mapping.items()}
+        )
+
+    def expire(self, key, seconds):
+        self.expirations[key] = seconds
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def sadd(self, key, *values):
+        self.data.setdefault(key, set()).update(
+            value.encode("utf-8") for value in values
+        )
+
+    def smembers(self, key):
+        return self.data.get(key, set())
+
+    def srem(self, key, *values):
+        self.data.get(key, set()).difference_update(
+            value.encode("utf-8") for value in values
+        )
+
+    def delete(self, key):
+        if isinstance(key, bytes):
+            key = key.decode("utf-8")
+        self.data.pop(key, None)
+
+
+@pytest.mark.unittest
+def test_process_chain_hash():
+    """Test that the hash does not depend on the order of the keys"""
+    pc1 = {"list": [{"id": "a", "module": "g.region"}], "version": "1"}
+    pc2 = {"version": "1", "list": [{"module": "g.region", "id": "a"}]}
+    assert process_chain_hash(pc1) == process_chain_hash(pc2)
+    pc2["list"][0]["id"] = "b"
+    assert process_chain_hash(pc1) != process_chain_hash(pc2)
+
+
+@pytest.mark.unittest
+def test_tile_manifest():
+    """Test the status of the tiles in the manifest"""
+    kvdb = DictKvdb()
+    manifest = TileManifest(kvdb, "user", "resource_id-1", expiration=60)
+    assert not manifest.exists()
+    manifest.create({"width": "10"}, ["grid1", "grid2"], ["m_tmp1", "m_tmp2"])
+    assert manifest.exists()
+    assert kvdb.expirations[manifest.key] == 60
+    assert manifest.get_request() == {"width": "10"}
+    assert manifest.get_tiles() == ["grid1", "grid2"]
+    assert manifest.get_state() == "running"
+    assert manifest.get_tile("grid2")["mapset"] == "m_tmp2"
+
+    assert manifest.get_tile_jobs() == set()
+    manifest.update_tile("grid1", resource_id="resource_id-3")
+    assert manifest.get_tile_jobs() == {"resource_id-3"}
+    manifest.update_tile("grid1", status="finished", pc_hash="abc")
+    manifest.update_tile("grid2", status="error", pc_hash="abc")
+    assert manifest.is_complete("grid1", "abc")
+    assert not manifest.is_complete("grid1", "def")
+    assert not manifest.is_complete("grid2", "abc")
+    assert manifest.get_tile("grid1")["mapset"] == "m_tmp1"
+
+    # the manifest is found again with the run id
+    manifest2 = TileManifest(kvdb, "user", "resource_id-1")
+    assert manifest2.is_complete("grid1", "abc")
+    manifest2.set_state("merged")
+    assert manifest.get_state() == "merged"
+
+    # the job of the run changes when the run is resumed
+    assert manifest.get_job() == "resource_id-1"
+    manifest.set_job("resource_id-2")
+    assert manifest.get_job() == "resource_id-2"
+    assert manifest.get_mapsets() == {"m_tmp1", "m_tmp2"}
+
+
+@pytest.mark.unittest
+def test_mosaic_manifest():
+    """Test the record of the merged mapsets of the incremental merge"""
+    kvdb = DictKvdb()
+    mosaic = MosaicManifest(
+        kvdb, "user", "project", "mapset", "run1", expiration=60
+    )
+    assert mosaic.get_merged("raster", "a") == set()
+    mosaic.add_merged("raster", "a", [])
+    assert not kvdb.expirations
+    mosaic.add_merged("raster", "a", ["m_tmp1", "m_tmp2"])
+    mosaic.add_merged("raster", "a", ["m_tmp2", "m_tmp3"])
+    assert mosaic.get_merged("raster", "a") == {"m_tmp1", "m_tmp2", "m_tmp3"}
+    assert list(kvdb.expirations.values()) == [60]
+    # the record is kept per output, per target mapset and per run
+    assert mosaic.get_merged("raster", "b") == set()
+    assert mosaic.get_merged("vector", "a") == set()
+    other = MosaicManifest(kvdb, "user", "project", "other", "run1")
+    assert other.get_merged("raster", "a") == set()
+    run2 = MosaicManifest(kvdb, "user", "project", "mapset", "run2")
+    assert run2.get_merged("raster", "a") == set()
+
+    # a replaced mosaic clears the records of all runs
+    run2.add_merged("raster", "a", ["n_tmp1"])
+    mosaic.add_merged("raster", "b", ["m_tmp1"])
+    run2.clear("raster", "a")
+    assert mosaic.get_merged("raster", "a") == set()
+    assert run2.get_merged("raster", "a") == set()
+    assert mosaic.get_merged("raster", "b") == {"m_tmp1"}
+
+
+@pytest.mark.unittest
+def test_mapset_deletion_marks():
+    """Test the marks of the mapsets which are deleted in the background"""
+    kvdb = DictKvdb()
+    marks = MapsetDeletionMarks(kvdb, "user", "project")
+    marks.mark(["m_tmp1", "m_tmp2"])
+    assert marks.get_marked() == {"m_tmp1", "m_tmp2"}
+    # the marks do not expire with the manifests of the runs
+    assert not kvdb.expirations
+    marks.unmark("m_tmp1")
+    assert marks.get_marked() == {"m_tmp2"}
+
+
+@pytest.mark.unittest
+def test_virtual_raster_sources():
+    """Test the record of the mapsets read by the virtual rasters"""
+    kvdb = DictKvdb()
+    sources = VirtualRasterSources(kvdb, "user", "project")
+    sources.set_sources("mapset", "a", ["m_tmp1", "m_tmp2"])
+    sources.set_sources("mapset", "b_2022", ["m_tmp1"])
+    sources.set_sources("other", "a", ["o_tmp1"])
+    VirtualRasterSources(kvdb, "user", "project2").set_sources(
+        "mapset", "a", ["p_tmp1"]
+    )
+    assert sources.find() == {
+        ("mapset", "a"): {"m_tmp1", "m_tmp2"},
+        ("mapset", "b_2022"): {"m_tmp1"},
+        ("other", "a"): {"o_tmp1"},
+    }
+    # a new virtual raster replaces the sources, the record does not expire
+    sources.set_sources("mapset", "a", ["m_tmp3"])
+    assert sources.find()[("mapset", "a")] == {"m_tmp3"}
+    assert not kvdb.expirations
+    sources.clear("mapset", "a")
+    sources.clear("other", "a")
+    assert sources.find() == {("mapset", "b_2022"): {"m_tmp1"}}
+
+
+@pytest.mark.unittest
+def test_find_manifests():
+    """Test that the mapsets of all runs of a user are found"""
+    kvdb = DictKvdb()
+    TileManifest(kvdb, "user", "run1").create(
+        {}, ["grid1", "grid2"], ["m_tmp1", "m_tmp2"]
+    )
+    TileManifest(kvdb, "user", "run2").create({}, ["grid1"], ["n_tmp1"])
+    TileManifest(kvdb, "other", "run3").create({}, ["grid1"], ["o_tmp1"])
+    manifests = TileManifest.find(kvdb, "user")
+    assert sorted(manifest.run_id for manifest in manifests) == [
+        "run1", "run2"
+    ]
+    assert set().union(*(manifest.get_mapsets() for manifest in manifests)) \
+        == {"m_tmp1", "m_tmp2", "n_tmp1"}
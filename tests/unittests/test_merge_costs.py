@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Unit tests for the cost estimate of the merge
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import pytest
+
+from actinia_tiling_plugin.core.merge_costs import (
+    count_patch_levels,
+    estimate_raster_costs,
+    estimate_vector_costs,
+    patch_groups,
+    raster_metadata,
+    sum_merge_costs,
+)
+
+
+CELLHD = """proj:       99
+zone:       0
+north:      {north}
+south:      {south}
+east:       {east}
+west:       {west}
+cols:       10
+rows:       10
+e-w resol:  1
+n-s resol:  1
+format:     -1
+compressed: 2
+"""
+
+
+def _write_raster(mapset_path, name, north, west, cell_size):
+    (mapset_path / "cellhd").mkdir(parents=True, exist_ok=True)
+    (mapset_path / "fcell").mkdir(exist_ok=True)
+    (mapset_path / "cellhd" / name).write_text(CELLHD.format(
+        north=north, south=north - 10, east=west + 10, west=west
+    ))
+    (mapset_path / "fcell" / name).write_bytes(b"0" * cell_size)
+
+
+@pytest.mark.unittest
+def test_count_patch_levels():
+    """Test the number of levels of the tree reduction"""
+    assert count_patch_levels(4, 4) == 1
+    assert count_patch_levels(5, 4) == 2
+    assert count_patch_levels(16, 4) == 2
+    assert count_patch_levels(17, 4) == 3
+
+
+@pytest.mark.unittest
+def test_patch_groups_incremental():
+    """Test that with 'fan_in' 0 the existing mosaic of an incremental merge
+    is patched together with the maps of all mapsets in one level
+    """
+    num_mapsets = 4
+    # the mosaic is an additional input
+    assert patch_groups(num_mapsets + 1, 0) is None
+    assert count_patch_levels(num_mapsets + 1, 0) == 1
+    assert patch_groups(5, 2) == [slice(0, 2), slice(2, 4), slice(4, 6)]
+    assert patch_groups(2, 2) is None
+
+
+@pytest.mark.unittest
+def test_estimate_raster_costs(tmp_path):
+    """Test the estimate of two rasters which overlap by half"""
+    _write_raster(tmp_path / "tile1", "ndvi", 10, 0, 1000)
+    _write_raster(tmp_path / "tile2", "ndvi", 10, 5, 1000)
+    metadata = [
+        raster_metadata(str(tmp_path / mapset), "ndvi")
+        for mapset in ["tile1", "tile2"]
+    ]
+    header_size = metadata[0]["bytes"] - 1000
+    costs = estimate_raster_costs(metadata, 1)
+    assert costs["input_cells"] == 200
+    assert costs["input_bytes"] == 2 * (1000 + header_size)
+    assert costs["output_cells"] == 150
+    assert costs["output_bytes"] == round(costs["input_bytes"] * 0.75)
+    assert costs["disk_bytes"] == costs["output_bytes"]
+    # intermediate maps of the tree reduction and virtual rasters
+    assert estimate_raster_costs(metadata, 3)["disk_bytes"] == \
+        2 * costs["output_bytes"]
+    assert estimate_raster_costs(metadata, 1, virtual=True)[
+        "output_bytes"] == 0
+
+
+@pytest.mark.unittest
+def test_sum_merge_costs():
+    """Test the total costs of rasters and vectors"""
+    vector_costs = estimate_vector_costs(
+        [{"features": 10, "bytes": 100}, {"features": 5, "bytes": 50}], 2
+    )
+    assert vector_costs["output_features"] == 15
+    assert vector_costs["disk_bytes"] == 300
+    raster_costs = {
+        "input_cells": 200, "input_bytes": 20, "output_cells": 100,
+        "output_bytes": 10, "disk_bytes": 10,
+    }
+    assert sum_merge_costs({"ndvi": raster_costs}, {"points": vector_costs}) \
+        == {
+            "input_cells": 200,
+            "input_features": 15,
+            "input_bytes": 170,
+            "output_bytes": 160,
+            "disk_bytes": 310,
+        }
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Unit tests for the check of the merge inputs
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import pytest
+
+from actinia_tiling_plugin.core.merge_inputs import (
+    check_merge_inputs,
+    check_stds_members,
+)
+
+
+MAPS = {
+    "tmp1": {"raster": ["ndvi", "ndwi"], "vector": ["points"], "strds": []},
+    "tmp2": {"raster": ["ndvi", "points"], "vector": [], "strds": ["ndvi"]},
+    "tmp3": None,
+}
+
+
+@pytest.mark.unittest
+def test_check_merge_inputs_valid():
+    """Test that existing inputs are valid"""
+    assert check_merge_inputs(
+        MAPS, ["tmp1", "tmp2"], {"raster": ["ndvi"], "vector": []}
+    ) == []
+
+
+@pytest.mark.unittest
+def test_check_merge_inputs_problems():
+    """Test that all missing or type-mismatched inputs are reported"""
+    problems = check_merge_inputs(
+        MAPS,
+        ["tmp1", "tmp2", "tmp3"],
+        {"raster": ["ndwi"], "vector": ["points"], "strds": ["ndvi"]},
+    )
+    assert problems == [
+        "<ndvi@tmp1> is a raster and not a strds",
+        "raster <ndwi@tmp2> is missing",
+        "<points@tmp2> is a raster and not a vector",
+        "mapset <tmp3> does not exist",
+    ]
+
+
+@pytest.mark.unittest
+def test_check_stds_members():
+    """Test that the maps of the STRDS and STVDS are only checked in the
+    mapsets in which they are registered
+    """
+    assert check_stds_members(MAPS, {
+        "raster": {"ndvi": ["tmp1", "tmp2"], "ndwi": ["tmp1"]},
+        "vector": {"points": ["tmp1"]},
+    }) == []
+    assert check_stds_members(MAPS, {
+        "raster": {"ndwi": ["tmp2", "tmp3"]},
+        "vector": {"points": ["tmp2"]},
+    }) == [
+        "raster <ndwi@tmp2> of the STRDS is missing",
+        "raster <ndwi@tmp3> of the STRDS is missing",
+        "vector <points@tmp2> of the STVDS is missing",
+    ]
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Unit tests for the process chain template of tiled runs
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import json
+
+import pytest
+
+from actinia_tiling_plugin.core.process_chain import (
+    render_tile_template,
+    unsupported_expressions,
+)
+
+VALUES = {"grid": "grid1@target", "tile": "grid1", "mapset": "target_tmp1"}
+
+
+@pytest.mark.unittest
+def test_render_tile_template():
+    """Test that the tile variables are substituted"""
+    template = json.dumps({"list": [{
+        "module": "g.region",
+        "inputs": [
+            {"param": "vector", "value": "{{ grid }}"},
+            {"param": "save", "value": "{{tile}}_{{  mapset }}"},
+        ],
+    }]})
+    process_chain = json.loads(render_tile_template(template, VALUES))
+    inputs = process_chain["list"][0]["inputs"]
+    assert inputs[0]["value"] == "grid1@target"
+    assert inputs[1]["value"] == "grid1_target_tmp1"
+
+
+@pytest.mark.unittest
+def test_render_tile_template_escapes_values():
+    """Test that the values can not break the JSON string"""
+    template = json.dumps({"value": "{{ tile }}"})
+    process_chain = json.loads(
+        render_tile_template(template, {"tile": 'a", "b": "c'})
+    )
+    assert process_chain == {"value": 'a", "b": "c'}
+
+
+@pytest.mark.unittest
+@pytest.mark.parametrize("expression", [
+    "{{ cycler.__init__.__globals__.os.popen('id').read() }}",
+    "{{ grid.__class__ }}",
+    "{{ tile|upper }}",
+    "{% for x in range(3) %}{{ x }}{% endfor %}",
+    "{# comment #}",
+])
+def test_render_tile_template_rejects_expressions(expression):
+    """Test that template expressions other than the tile variables are
+    rejected
+    """
+    template = json.dumps({"value": f"{{{{ grid }}}} {expression}"})
+    assert unsupported_expressions(template)
+    with pytest.raises(ValueError):
+        render_tile_template(template, VALUES)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Unit tests for the registered maps of space time datasets
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import pytest
+
+from actinia_tiling_plugin.core.stds_members import StdsMembers
+
+
+@pytest.mark.unittest
+def test_stds_members():
+    """Test that the maps of all mapsets are kept in columns"""
+    members = StdsMembers.from_mapsets({
+        "tile1": {
+            "name": ["ndvi_1", "ndvi_2"],
+            "start_time": ["2020-01-01 00:00:00", "2020-01-02 00:00:00"],
+            "end_time": ["2020-01-02 00:00:00", "2020-01-03 00:00:00"],
+        },
+        "tile2": {
+            "name": ["ndvi_2", "ndvi_3"],
+            "start_time": ["2020-01-02 00:00:00", "2020-01-03 00:00:00"],
+            "end_time": ["2020-01-03 00:00:00", None],
+        },
+    })
+    assert len(members) == 3
+    assert "ndvi_3" in members
+    assert members.names() == ["ndvi_1", "ndvi_2", "ndvi_3"]
+    assert members.mapsets_of("ndvi_1") == ["tile1"]
+    assert members.mapsets_of("ndvi_2") == ["tile1", "tile2"]
+    assert members.mapsets_of("ndvi_3") == ["tile2"]
+    assert members.registration_lines() == [
+        "ndvi_1|2020-01-01 00:00:00|2020-01-02 00:00:00",
+        "ndvi_2|2020-01-02 00:00:00|2020-01-03 00:00:00",
+        "ndvi_3|2020-01-03 00:00:00",
+    ]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Unit tests for the search of orphaned tile mapsets and grids
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import os
+
+import pytest
+
+from actinia_tiling_plugin.core.sweep import (
+    GRID_PATTERN,
+    newest_mtime,
+    select_orphans,
+    tile_mapset_pattern,
+)
+
+
+@pytest.mark.unittest
+def test_select_orphan_mapsets():
+    """Test that only old and unreferenced tile mapsets are selected"""
+    run = "a1b0e1b70b1a4c559e5c20f2d0c4e1f2"
+    mtimes = {
+        f"target_{run}_tmp1": 10, f"target_{run}_tmp2": 10,
+        f"target_{run}_tmp3": 100, f"target_{run}_tmp": 10,
+        f"other_{run}_tmp1": 10, "target_tmp1": 10, "target": 10,
+    }
+    assert select_orphans(
+        mtimes, tile_mapset_pattern("target"), {f"target_{run}_tmp2"},
+        mtimes.get, 50,
+    ) == [f"target_{run}_tmp1"]
+
+
+@pytest.mark.unittest
+def test_select_orphan_marked_mapsets():
+    """Test that without pattern all old and unreferenced names are
+    selected, e.g. the mapsets marked for deletion
+    """
+    mtimes = {"tile_a": 10, "tile_b": 10, "tile_c": 100}
+    assert select_orphans(
+        mtimes, None, {"tile_b"}, mtimes.get, 50
+    ) == ["tile_a"]
+
+
+@pytest.mark.unittest
+def test_select_orphan_grids():
+    """Test that only the temporary grids are selected"""
+    grid = "grid_66fce2f6f4474641b97ebad81b3c9c71"
+    names = [grid, "grid1", "grid_66fce2f6"]
+    assert select_orphans(
+        names, GRID_PATTERN, set(), lambda name: 0, 1
+    ) == [grid]
+
+
+@pytest.mark.unittest
+def test_newest_mtime(tmp_path):
+    """Test that the elements of a mapset are taken into account"""
+    (tmp_path / "cell").mkdir()
+    os.utime(tmp_path / "cell", (0, 2000))
+    os.utime(tmp_path, (0, 1000))
+    assert newest_mtime(str(tmp_path)) == 2000
@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Copyright (c) 2022 mundialis GmbH & Co. KG
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+Unit tests for the tile computation
+"""
+
+__license__ = "GPLv3"
+__author__ = "Anika Weinmann"
+__copyright__ = "Copyright 2022 mundialis GmbH & Co. KG"
+__maintainer__ = "mundialis GmbH % Co. KG"
+
+
+import numpy as np
+import pytest
+
+from actinia_tiling_plugin.core.tiles import (
+    TILE_MODES,
+    check_tile_mode,
+    compute_grid_tile_list,
+    compute_grid_tiles,
+    compute_quadtree_tiles,
+    compute_tile_layout,
+    grid_tiles_extent,
+    parse_coordinate,
+    prune_tiles,
+    quadtree_workload_grid,
+    read_region_file,
+    tiles_to_list,
+)
+
+WIND = """proj:       99
+zone:       0
+north:      228500
+south:      215000
+east:       645000
+west:       630000
+cols:       1500
+rows:       1350
+e-w resol:  10
+n-s resol:  10
+"""
+
+REGION = {"n": 20., "s": 0., "e": 30., "w": 0., "nsres": 1., "ewres": 1.}
+
+
+@pytest.mark.unittest
+def test_parse_coordinate():
+    """Test parsing of float and DMS coordinates"""
+    assert parse_coordinate(" 228500 ") == 228500.
+    assert parse_coordinate("35:30N") == 35.5
+    assert parse_coordinate("78:45:36W") == -78.76
+
+
+@pytest.mark.unittest
+def test_read_region_file(tmp_path):
+    """Test reading a region file"""
+    region_file = tmp_path / "WIND"
+    region_file.write_text(WIND)
+    region = read_region_file(str(region_file))
+    assert region == {
+        "n": 228500., "s": 215000., "e": 645000., "w": 630000.,
+        "cols": 1500, "rows": 1350, "ewres": 10., "nsres": 10.,
+    }
+
+
+@pytest.mark.unittest
+def test_compute_grid_tiles():
+    """Test the tile layout of the grid tiles"""
+    tiles = compute_grid_tiles(REGION, "10", "10")
+    assert len(tiles["n"]) == 6, "Number of tiles is wrong"
+    # first tile in the south-west corner, then row by row
+    assert tiles["w"].tolist() == [0., 10., 20., 0., 10., 20.]
+    assert tiles["s"].tolist() == [0., 0., 0., 10., 10., 10.]
+    assert (tiles["e"] - tiles["w"] == 10.).all()
+    assert (tiles["n"] - tiles["s"] == 10.).all()
+
+
+@pytest.mark.unittest
+def test_compute_grid_tiles_partial():
+    """Test that the tiles cover the whole region"""
+    tiles = compute_grid_tiles(REGION, 7, 20)
+    assert len(tiles["n"]) == 5, "Number of tiles is wrong"
+    assert tiles["e"].max() >= REGION["e"]
+    with pytest.raises(ValueError):
+        compute_grid_tiles(REGION, 0, 20)
+
+
+@pytest.mark.unittest
+def test_check_tile_mode():
+    """Test that unknown tiling modes are rejected with the allowed modes"""
+    check_tile_mode("region")
+    check_tile_mode("virtual", TILE_MODES + ["virtual"])
+    with pytest.raises(ValueError, match="'vector', 'region'"):
+        check_tile_mode("virtual")
+    with pytest.raises(ValueError):
+        check_tile_mode("raster", TILE_MODES + ["virtual"])
+
+
+@pytest.mark.unittest
+def test_max_tiles():
+    """Test that too many tiles are rejected before they are computed"""
+    assert len(compute_grid_tiles(REGION, 10, 10, max_tiles=6)["n"]) == 6
+    with pytest.raises(ValueError):
+        compute_grid_tiles(REGION, 10, 10, max_tiles=5)
+    with pytest.raises(ValueError):
+        compute_grid_tiles(REGION, 1e-6, 1e-6, max_tiles=100000)
+    with pytest.raises(ValueError):
+        compute_tile_layout(REGION, 1e-6, 1e-6, max_tiles=100000)
+
+
+@pytest.mark.unittest
+def test_tiles_to_list():
+    """Test the names and extents of the tile list"""
+    tiles = tiles_to_list(compute_grid_tiles(REGION, 3, 2), "tile_")
+    assert len(tiles) == 100, "Number of tiles is wrong"
+    assert tiles[0] == {"name": "tile_001", "n": 2., "s": 0., "e": 3.,
+                        "w": 0.}
+    assert tiles[-1]["name"] == "tile_100"
+
+
+@pytest.mark.unittest
+def test_compute_grid_tile_list_overlap():
+    """Test the buffered tiles and their core extents"""
+    tiles = compute_grid_tile_list(REGION, 10, 10, "tile", 2)
+    assert tiles[0] == {
+        "name": "tile1", "n": 12., "s": -2., "e": 12., "w": -2.,
+        "core": {"n": 10., "s": 0., "e": 10., "w": 0.},
+    }
+    tiles = compute_grid_tile_list(
+        dict(REGION, ewres=0.5), 10, 10, "tile", 2, "cells"
+    )
+    assert tiles[0]["e"] == 11. and tiles[0]["n"] == 12.
+    assert "core" not in compute_grid_tile_list(REGION, 10, 10, "tile")[0]
+    with pytest.raises(ValueError):
+        compute_grid_tile_list(REGION, 10, 10, "tile", 2, "km")
+
+
+@pytest.mark.unittest
+def test_compute_tile_layout_cell_budget():
+    """Test the tile size derived from the cell budget"""
+    region = dict(REGION, cols=30, rows=20)
+    layout = compute_tile_layout(region, max_cells_per_tile=100)
+    assert layout == {"cols": 10, "rows": 10, "width": 10., "height": 10.,
+                      "num_cols": 3, "num_rows": 2}
+    # cells are balanced over the tiles and the budget is kept
+    layout = compute_tile_layout(region, max_cells_per_tile=50)
+    assert layout["rows"] * layout["cols"] <= 50
+    assert layout["num_rows"] == 3 and layout["rows"] == 7
+    # 100 MB of DCELL cells are more than the region
+    layout = compute_tile_layout(region, 5, 5, memory_budget_mb=100)
+    assert layout["num_cols"] == 1 and layout["num_rows"] == 1
+    # given width and height
+    layout = compute_tile_layout(region, "7", "20")
+    assert layout == {"width": 7., "height": 20., "num_cols": 5,
+                      "num_rows": 1}
+    with pytest.raises(ValueError):
+        compute_tile_layout(region)
+
+
+@pytest.mark.unittest
+def test_quadtree_workload_grid():
+    """Test the workload grid aligned to the cells of the region"""
+    region = dict(REGION, cols=30, rows=20)
+    grid = quadtree_workload_grid(region, 2)
+    assert grid["rows"] == 4 and grid["cols"] == 4
+    assert grid["nsres"] == 5. and grid["ewres"] == 8.
+    assert grid["n"] == 20. and grid["s"] == 0.
+    assert grid["w"] == 0. and grid["e"] == 32.
+    assert quadtree_workload_grid(region, 10)["cols"] == 30
+
+
+@pytest.mark.unittest
+def test_compute_quadtree_tiles():
+    """Test the recursive split by the workload"""
+    region = dict(REGION, cols=30, rows=20)
+    grid = quadtree_workload_grid(region, 2)
+    workload = np.zeros((4, 4))
+    # dense north-west quadrant
+    workload[:2, :2] = [[5, 1], [1, 1]]
+    tiles, tile_workload = compute_quadtree_tiles(region, grid, workload, 4)
+    # north-west quadrant split into 4, the other quadrants are kept
+    assert len(tiles["n"]) == 7, "Number of tiles is wrong"
+    assert tile_workload.sum() == workload.sum()
+    assert tile_workload.max() == 5.
+    assert tiles["n"][0] == 20. and tiles["w"][0] == 0.
+    assert tiles["s"][0] == 15. and tiles["e"][0] == 8.
+    # tiles are clipped to the region
+    assert tiles["e"].max() == 30.
+    # the tiles cover the region without gaps
+    area = ((tiles["n"] - tiles["s"]) * (tiles["e"] - tiles["w"])).sum()
+    assert area == 600.
+    with pytest.raises(ValueError):
+        compute_quadtree_tiles(region, grid, np.zeros((2, 2)), 4)
+
+
+@pytest.mark.unittest
+def test_prune_tiles():
+    """Test the removal of grid tiles without coverage"""
+    region = dict(REGION, cols=30, rows=20)
+    layout = compute_tile_layout(region, 10, 10)
+    extent = grid_tiles_extent(region, layout)
+    assert extent == {"n": 20., "s": 0., "e": 30., "w": 0., "rows": 2,
+                      "cols": 3}
+    tile_list = compute_grid_tile_list(region, 10, 10, "tile")
+    # northern row first, the tiles start in the south-west corner
+    coverage = np.array([[0, 0, 3], [1, 0, 0]])
+    tiles = prune_tiles(tile_list, coverage)
+    assert [tile["name"] for tile in tiles] == ["tile1", "tile6"]
+    with pytest.raises(ValueError):
+        prune_tiles(tile_list, np.ones((1, 3)))